@@ -4,6 +4,7 @@
 # Databas:
 #   exercises(id, name, cue, icon_path)
 #   program_weeks(week, day, exercise_id, sets, rep_min, rep_max)   # dag-kolumnen heter "day"
+#     unik nyckel (week, day, exercise_id) + RPC sync_program_weeks: kör supabase_migration_legacy_program_weeks.sql
 #   workouts(id, date, day_label)
 #   sets(workout_id, exercise_id, set_no, reps, weight_kg, pr_flag)
 #
@@ -17,6 +18,7 @@
 # OBS: Om "Program"-fliken visar fel vecka, justera i UI så att den läser st.session_state["active_week"].
 
 import os
+import re
 from datetime import date
 from typing import List, Tuple, Optional, Dict
 
@@ -108,6 +110,8 @@ sb: Client = get_supabase_client()
 # ---- Konstanter & Helpers
 # =========================
 DEFAULT_DELOAD_FACTOR = 0.6
+SUPABASE_PAGE_SIZE = 1000   # PostgREST kapar svar vid max-rows (1000 som standard) utan att säga till
+START_WEIGHT_RE = re.compile(r"(\d+(\.\d+)?)")
 
 def is_lower_body(name: str) -> bool:
     low = name.lower()
@@ -127,9 +131,24 @@ def double_progression_bump(ex_name: str) -> float:
 # =========================
 # ---- DB helpers
 # =========================
+def start_weight_from_cue(cue: Optional[str]) -> float:
+    # Första talet i cue-texten tolkas som startvikt
+    m = START_WEIGHT_RE.search(cue or "")
+    return float(m.group(1)) if m else 0.0
+
+@st.cache_resource(show_spinner=False)
+def exercise_catalog() -> Dict[str, Dict[str, Dict]]:
+    # Alla övningar i ett anrop, delade av alla sessioner: {"by_id": ..., "by_name": ...}
+    rows = sb.from_("exercises").select("*").execute().data or []
+    for r in rows:
+        r["start_weight"] = start_weight_from_cue(r.get("cue"))
+    return {"by_id": {r["id"]: r for r in rows}, "by_name": {r["name"]: r for r in rows}}
+
+def refresh_exercise_catalog() -> None:
+    exercise_catalog.clear()
+
 def fetch_exercise(ex_id: str) -> Optional[Dict]:
-    res = sb.from_("exercises").select("*").eq("id", ex_id).limit(1).execute().data
-    return res[0] if res else None
+    return exercise_catalog()["by_id"].get(ex_id)
 
 def fetch_program_for_day(week_idx: int, canon_day: str) -> List[Dict]:
     # week_idx 0..11 -> DB week 1..12
@@ -156,19 +175,29 @@ def fetch_sets_for_workout(workout_id: str) -> List[Dict]:
         .data or []
     )
 
-def personal_bests_map() -> Dict[Tuple[str,float], int]:
-    # (exercise_id, weight) -> max reps
-    rows = (
-        sb.from_("sets")
-        .select("exercise_id,weight_kg,reps")
-        .execute()
-        .data or []
-    )
+def personal_bests_map(exercise_ids: List[str]) -> Dict[Tuple[str,float], int]:
+    # (exercise_id, weight) -> max reps, bara för övningarna som loggas.
+    # Hämtas sida för sida tills en tom sida kommer; sets saknar id, så sidorna tas med range i fast ordning.
     best: Dict[Tuple[str,float], int] = {}
-    for r in rows:
-        key = (r["exercise_id"], float(r["weight_kg"]))
-        best[key] = max(best.get(key, 0), int(r["reps"]))
-    return best
+    start = 0
+    while True:
+        rows = (
+            sb.from_("sets")
+            .select("exercise_id,weight_kg,reps")
+            .in_("exercise_id", exercise_ids)
+            .order("workout_id", desc=False)
+            .order("exercise_id", desc=False)
+            .order("set_no", desc=False)
+            .range(start, start + SUPABASE_PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        if not rows:
+            return best
+        for r in rows:
+            key = (r["exercise_id"], float(r["weight_kg"]))
+            best[key] = max(best.get(key, 0), int(r["reps"]))
+        start += len(rows)
 
 # =========================
 # ---- Progressionslogik
@@ -191,20 +220,8 @@ def propose_weight(ex_name: str, rep_min: int, rep_max: int, week_idx: int, hist
 
     # Ingen historik – föreslå "startvikt" via cue (om siffra finns) annars 0
     if last_weight is None:
-        ex = (
-            sb.from_("exercises")
-            .select("cue")
-            .eq("name", ex_name)
-            .limit(1)
-            .execute()
-            .data
-        )
-        start_weight = 0.0
-        if ex and ex[0].get("cue"):
-            import re
-            m = re.search(r"(\d+(\.\d+)?)", ex[0]["cue"])
-            if m: start_weight = float(m.group(1))
-        last_weight = start_weight
+        ex = exercise_catalog()["by_name"].get(ex_name) or {}
+        last_weight = ex.get("start_weight", 0.0)
 
     bump = double_progression_bump(ex_name)
 
@@ -239,7 +256,7 @@ def compact_history_for_day(canon_day: str) -> List[Dict]:
     """
     rows = (
         sb.from_("workouts")
-        .select("id, date, day_label, sets(*)")
+        .select("id, date, day_label, sets(*, exercises(name))")
         .eq("day_label", canon_day)
         .order("date", desc=True)
         .limit(10)
@@ -252,13 +269,13 @@ def compact_history_for_day(canon_day: str) -> List[Dict]:
         per_ex: Dict[str, Dict] = {}
         for s in sets:
             eid = s["exercise_id"]
-            per_ex.setdefault(eid, {"weight": float(s["weight_kg"]), "reps": []})
+            ex = s.get("exercises") or fetch_exercise(eid) or {}
+            per_ex.setdefault(eid, {"name": ex.get("name", eid[:8]), "weight": float(s["weight_kg"]), "reps": []})
             per_ex[eid]["reps"].append(int(s["reps"]))
         for eid, rec in per_ex.items():
-            ex = fetch_exercise(eid) or {}
             out.append({
                 "exercise_id": eid,
-                "exercise": ex.get("name", eid[:8]),
+                "exercise": rec["name"],
                 "weight": rec["weight"],
                 "reps": rec["reps"],
             })
@@ -307,7 +324,6 @@ with tabs[0]:
             collected: List[Tuple[str, str, int, List[int], float]] = []  # (exercise_id, name, sets, reps[], weight)
 
             hist = compact_history_for_day(day_canon)
-            bests = personal_bests_map()
 
             for i, row in enumerate(plan):
                 ex = row["exercises"] or {}
@@ -341,7 +357,7 @@ with tabs[0]:
                         workout_id = ins[0]["id"]
 
                         # Spara set + PR-flagga
-                        current_bests = personal_bests_map()
+                        current_bests = personal_bests_map([ex_id for ex_id, *_ in collected])
                         to_insert = []
                         pr_flags = []
                         for ex_id, name, sets_n, reps_val, weight in collected:
@@ -382,9 +398,12 @@ def seed_program() -> int:
     Huvudlyft hålls konstanta. Accessoarer roteras.
     """
 
-    # --- Hämta övningar
-    ex_rows = sb.from_("exercises").select("id,name").execute().data or []
-    name_to_id = {r["name"]: r["id"] for r in ex_rows}
+    # --- Hämta övningar (färsk katalog, så att nya övningar kommer med)
+    refresh_exercise_catalog()
+    name_to_id = {name: r["id"] for name, r in exercise_catalog()["by_name"].items()}
+
+    # Gemener byggs en gång per seed, inte en gång per uppslag
+    lowmap = {k.lower(): v for k,v in name_to_id.items()}
 
     def _resolve(name_to_id: Dict[str,str], *aliases: str) -> Optional[str]:
         # exakt träff
@@ -392,9 +411,10 @@ def seed_program() -> int:
             if a in name_to_id:
                 return name_to_id[a]
         # fuzzy: innehåller
-        lowmap = {k.lower(): v for k,v in name_to_id.items()}
         for a in aliases:
             a_low = a.lower()
+            if a_low in lowmap:
+                return lowmap[a_low]
             for k,v in lowmap.items():
                 if a_low in k:
                     return v
@@ -483,6 +503,14 @@ def seed_program() -> int:
         if 9 <= week <= 11: return "Styrka"
         return "Deload"
 
+    # Varje aliastupel slås upp en gång, inte en gång per vecka
+    alias_ids: Dict[Tuple[str,...], Optional[str]] = {}
+    for tpl in (base_template, var_template):
+        for day_rows in tpl.values():
+            for name, _, _, aliases in day_rows:
+                if aliases not in alias_ids:
+                    alias_ids[aliases] = _resolve(name_to_id, *aliases) or name_to_id.get(name)
+
     rows = []
     for week in range(1, 13):
         block = _block_for_week(week)
@@ -491,7 +519,7 @@ def seed_program() -> int:
 
         for canon_day in DAY_CANON:
             for name, is_base, sets_n, aliases in tpl[canon_day]:
-                ex_id = _resolve(name_to_id, *aliases) or name_to_id.get(name)
+                ex_id = alias_ids[aliases]
                 if not ex_id:
                     # hoppa över om övningen inte finns i tabellen
                     continue
@@ -520,13 +548,38 @@ def seed_program() -> int:
                     "rep_max": int(rep_max),
                 })
 
-    # Rensa och skriv in
-    sb.table("program_weeks").delete().neq("week", -1).execute()
-    if rows:
-        BATCH = 200
-        for i in range(0, len(rows), BATCH):
-            sb.table("program_weeks").insert(rows[i:i+BATCH]).execute()
-    return len(rows)
+    # Diffa mot befintliga rader i stället för att rensa och skriva om allt.
+    # Nyckeln är (week, day, exercise_id); två alias som pekar på samma övning ger bara en rad.
+    target: Dict[Tuple[int,str,str], Dict] = {}
+    for r in rows:
+        target.setdefault((r["week"], r["day"], r["exercise_id"]), r)
+
+    existing = (
+        sb.table("program_weeks")
+        .select("week,day,exercise_id,sets,rep_min,rep_max")
+        .execute()
+        .data or []
+    )
+    current = {(r["week"], r["day"], r["exercise_id"]): r for r in existing}
+
+    to_upsert = [
+        r for key, r in target.items()
+        if key not in current
+        or (int(current[key]["sets"]), int(current[key]["rep_min"]), int(current[key]["rep_max"]))
+        != (r["sets"], r["rep_min"], r["rep_max"])
+    ]
+    to_delete = [key for key in current if key not in target]
+
+    # Upsert och radering i en transaktion (RPC), så ett avbrutet anrop aldrig lämnar ett halvt program
+    if to_upsert or to_delete:
+        try:
+            sb.rpc("sync_program_weeks", {
+                "p_upsert": to_upsert,
+                "p_delete": [{"week": week, "day": day, "exercise_id": ex_id} for week, day, ex_id in to_delete],
+            }).execute()
+        except Exception as e:
+            raise RuntimeError(f"{e} (kör supabase_migration_legacy_program_weeks.sql)") from e
+    return len(target)
 
 with tabs[1]:
     st.subheader("Program")
@@ -582,28 +635,33 @@ with tabs[1]:
                         st.error(f"⚠️ Rep max för {name} måste vara ≥ Rep min.", icon="🚨")
                         valid_form = False
 
-                    rows_to_save.append((row["exercise_id"], sets_v, rmin_v, rmax_v))
+                    if (int(sets_v), int(rmin_v), int(rmax_v)) != (int(row["sets"]), int(row["rep_min"]), int(row["rep_max"])):
+                        rows_to_save.append({
+                            "week": int(sel_week),
+                            "day": canon_day,
+                            "exercise_id": row["exercise_id"],
+                            "sets": int(sets_v),
+                            "rep_min": int(rmin_v),
+                            "rep_max": int(rmax_v),
+                        })
 
                 saved = st.form_submit_button("💾 Spara ändringar för detta pass", use_container_width=True)
                 if saved:
                     if not valid_form:
                         st.error("Korrigera fel innan du sparar.")
+                    elif not rows_to_save:
+                        st.info("Inga ändringar att spara.")
                     else:
                         with st.spinner("Sparar..."):
                             try:
-                                for ex_id, sets_v, rmin_v, rmax_v in rows_to_save:
-                                    sb.table("program_weeks").update({
-                                        "sets": int(sets_v),
-                                        "rep_min": int(rmin_v),
-                                        "rep_max": int(rmax_v),
-                                    }).match({
-                                        "week": int(sel_week),
-                                        "day": canon_day,
-                                        "exercise_id": ex_id,
-                                    }).execute()
-                                st.success("Program uppdaterat.")
+                                # Endast ändrade rader, i ett anrop (en transaktion).
+                                # Kräver unik nyckel på (week, day, exercise_id) från supabase_migration_legacy_program_weeks.sql.
+                                sb.table("program_weeks").upsert(
+                                    rows_to_save, on_conflict="week,day,exercise_id"
+                                ).execute()
+                                st.success(f"Program uppdaterat ({len(rows_to_save)} rader).")
                             except Exception as e:
-                                st.error(f"Kunde inte spara: {e}")
+                                st.error(f"Kunde inte spara: {e} (kör supabase_migration_legacy_program_weeks.sql)")
 
 # =========================
 # ---- HISTORIK ----------------
@@ -615,6 +673,7 @@ with tabs[2]:
     go = st.checkbox("Visa set per övning")
 
     if st.button("🔄 Uppdatera", use_container_width=True):
+        refresh_exercise_catalog()
         st.experimental_rerun()
 
     if filt_ui == "Alla":
@@ -2,16 +2,21 @@ from __future__ import annotations
 
 import json
 import os
+import queue
 import sqlite3
+import threading
+from concurrent.futures import Future, wait
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from html import escape
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import streamlit.components.v1 as components
 
 try:
@@ -23,8 +28,15 @@ except Exception:  # Supabase is only required in cloud mode.
 
 APP_DIR = Path(__file__).parent
 DB_PATH = APP_DIR / "gymapp.db"
+SQLITE_POOL_SIZE = 4
+SQLITE_BUSY_TIMEOUT_MS = 5000
+# Page-load reads running at once; matches SQLITE_POOL_SIZE, so none waits on a pooled connection.
+PAGE_LOAD_WORKERS = 4
 DAY_NAMES = ["Pass 1", "Pass 2", "Pass 3", "Pass 4"]
 VIEWS = ["Idag", "Program", "PB", "Trend", "Historik", "Profiler", "Export"]
+HISTORY_PAGE_SIZE = 20
+# PostgREST silently truncates responses at its max-rows setting (1000 by default).
+SUPABASE_PAGE_SIZE = 1000
 TECHNIQUE_DEMOS = {
     "ab roller": "ab_roller",
     "ab roller?": "ab_roller",
@@ -140,6 +152,13 @@ class Profile:
     name: str
 
 
+@dataclass(frozen=True)
+class ProfileOverview:
+    workouts: int = 0
+    last_date: str | None = None
+    last_day: str | None = None
+
+
 @dataclass(frozen=True)
 class ProgramExercise:
     id: int
@@ -155,10 +174,47 @@ class ProgramExercise:
 
 
 @dataclass(frozen=True)
-class WeightSuggestion:
-    weight: float
-    label: str
-    reason: str
+class ExerciseHistory:
+    sets: pd.DataFrame
+    last_weight: float
+    last_reps: tuple[int, ...]
+    max_weight: float
+    max_weight_reps: int
+    best_reps: dict[float, int]
+
+
+HistoryIndex = dict[int, ExerciseHistory]
+
+
+@dataclass
+class SqlitePool:
+    path: Path
+    idle: queue.LifoQueue = field(default_factory=lambda: queue.LifoQueue(SQLITE_POOL_SIZE))
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return open_sqlite(self.path)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@dataclass
+class DataVersions:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    versions: dict[tuple[int, str], int] = field(default_factory=dict)
+
+
+@dataclass
+class HistoryIndexStore:
+    # One index per profile, tagged with the history version it was built from.
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    indexes: dict[int, tuple[int, HistoryIndex]] = field(default_factory=dict)
 
 
 def _secret_value(section: str, key: str) -> str | None:
@@ -243,11 +299,27 @@ def supabase_client() -> Client:
     return create_client(url, key)
 
 
-@contextmanager
-def db_connection():
-    conn = sqlite3.connect(DB_PATH)
+def open_sqlite(path: Path) -> sqlite3.Connection:
+    # Connections are shared between session threads, one borrower at a time via SqlitePool.
+    conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
     conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+@st.cache_resource
+def sqlite_pool(path: str) -> SqlitePool:
+    return SqlitePool(Path(path))
+
+
+@contextmanager
+def db_connection():
+    # Reusing connections skips the connect/PRAGMA cost per call and keeps sqlite3's statement cache warm.
+    pool = sqlite_pool(str(DB_PATH))
+    conn = pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -255,7 +327,19 @@ def db_connection():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+def _execute_statements(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() commits any open transaction first, so a migration step runs its script one statement at a time.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
 
 
 def _sqlite_column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
@@ -323,84 +407,161 @@ def _migrate_local_program_profiles(conn: sqlite3.Connection, default_profile_id
     conn.execute("DROP TABLE program_exercises_legacy")
 
 
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    _execute_statements(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS program_exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            day_name TEXT NOT NULL,
+            exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+            sort_order INTEGER NOT NULL,
+            sets INTEGER NOT NULL,
+            rep_min INTEGER NOT NULL,
+            rep_max INTEGER NOT NULL,
+            start_weight_kg REAL,
+            start_reps TEXT,
+            active INTEGER NOT NULL DEFAULT 1
+        );
+
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            workout_date TEXT NOT NULL,
+            day_name TEXT NOT NULL,
+            notes TEXT DEFAULT '',
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+            exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+            set_no INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight_kg REAL NOT NULL,
+            is_pr INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(workout_id, exercise_id, set_no)
+        );
+        """
+    )
+    _default_profile_id(conn)
+
+
+def _default_profile_id(conn: sqlite3.Connection) -> int:
+    default = conn.execute("SELECT id FROM profiles ORDER BY id LIMIT 1").fetchone()
+    if default:
+        return int(default["id"])
+    return int(
+        conn.execute(
+            "INSERT INTO profiles(name, created_at) VALUES (?, ?)",
+            ("Tobias", datetime.now().isoformat(timespec="seconds")),
+        ).lastrowid
+    )
+
+
+def _migrate_program_profiles(conn: sqlite3.Connection) -> None:
+    _migrate_local_program_profiles(conn, _default_profile_id(conn))
+
+
+def _add_program_start_values(conn: sqlite3.Connection) -> None:
+    if not _sqlite_column_exists(conn, "program_exercises", "start_weight_kg"):
+        conn.execute("ALTER TABLE program_exercises ADD COLUMN start_weight_kg REAL")
+    if not _sqlite_column_exists(conn, "program_exercises", "start_reps"):
+        conn.execute("ALTER TABLE program_exercises ADD COLUMN start_reps TEXT")
+
+
+def _migrate_workout_profiles(conn: sqlite3.Connection) -> None:
+    if not _sqlite_column_exists(conn, "workouts", "profile_id"):
+        conn.execute("ALTER TABLE workouts ADD COLUMN profile_id INTEGER REFERENCES profiles(id)")
+    conn.execute("UPDATE workouts SET profile_id = ? WHERE profile_id IS NULL", (_default_profile_id(conn),))
+
+
+def _create_program_profile_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS program_profile_exercise_idx "
+        "ON program_exercises(profile_id, day_name, exercise_id)"
+    )
+
+
+def _create_workout_profile_date_index(conn: sqlite3.Connection) -> None:
+    # Same index as workouts_profile_date_idx in Supabase; serves the overview reads.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS workouts_profile_date_idx "
+        "ON workouts(profile_id, workout_date DESC, id DESC)"
+    )
+
+
+# Applied steps are recorded by name in schema_migrations. app_v2 and app_v3 share gymapp.db with
+# different step lists, so a single PRAGMA user_version number could not describe both. Steps stay idempotent.
+SCHEMA_STEPS: list[tuple[str, Callable[[sqlite3.Connection], None]]] = [
+    ("base_tables", _create_base_tables),
+    ("program_profiles", _migrate_program_profiles),
+    ("program_start_values", _add_program_start_values),
+    ("workout_profiles", _migrate_workout_profiles),
+    ("program_profile_index", _create_program_profile_index),
+    ("workout_profile_date_index", _create_workout_profile_date_index),
+]
+
+
+@st.cache_resource(show_spinner=False)
+def _migrated_schema(path: str) -> bool:
+    # Runs once per process and database file; warm reruns only hit the cache.
+    with db_connection() as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"
+        )
+        applied = {row["name"] for row in conn.execute("SELECT name FROM schema_migrations")}
+    for name, step in SCHEMA_STEPS:
+        if name in applied:
+            continue
+        with db_connection() as conn:
+            # One write transaction per step, so the step and its record commit together. Another process
+            # starting at the same moment waits here and then finds the step already recorded.
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE name = ?", (name,)).fetchone():
+                continue
+            step(conn)
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_migrations(name, applied_at) VALUES (?, ?)",
+                (name, datetime.now().isoformat(timespec="seconds")),
+            )
+    return True
+
+
 def init_db() -> None:
     if use_supabase():
         return
-    with db_connection() as conn:
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS profiles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
-            );
-
-            CREATE TABLE IF NOT EXISTS program_exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
-                day_name TEXT NOT NULL,
-                exercise_id INTEGER NOT NULL REFERENCES exercises(id),
-                sort_order INTEGER NOT NULL,
-                sets INTEGER NOT NULL,
-                rep_min INTEGER NOT NULL,
-                rep_max INTEGER NOT NULL,
-                start_weight_kg REAL,
-                start_reps TEXT,
-                active INTEGER NOT NULL DEFAULT 1
-            );
-
-            CREATE TABLE IF NOT EXISTS workouts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                profile_id INTEGER REFERENCES profiles(id),
-                workout_date TEXT NOT NULL,
-                day_name TEXT NOT NULL,
-                notes TEXT DEFAULT '',
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS workout_sets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
-                exercise_id INTEGER NOT NULL REFERENCES exercises(id),
-                set_no INTEGER NOT NULL,
-                reps INTEGER NOT NULL,
-                weight_kg REAL NOT NULL,
-                is_pr INTEGER NOT NULL DEFAULT 0,
-                UNIQUE(workout_id, exercise_id, set_no)
-            );
-            """
-        )
+    _migrated_schema(str(DB_PATH))
+
+
+@st.cache_resource
+def data_versions() -> DataVersions:
+    return DataVersions()
 
-        default = conn.execute("SELECT id FROM profiles ORDER BY id LIMIT 1").fetchone()
-        if not default:
-            default_id = conn.execute(
-                "INSERT INTO profiles(name, created_at) VALUES (?, ?)",
-                ("Tobias", datetime.now().isoformat(timespec="seconds")),
-            ).lastrowid
-        else:
-            default_id = default["id"]
-
-        _migrate_local_program_profiles(conn, int(default_id))
-        if not _sqlite_column_exists(conn, "program_exercises", "start_weight_kg"):
-            conn.execute("ALTER TABLE program_exercises ADD COLUMN start_weight_kg REAL")
-        if not _sqlite_column_exists(conn, "program_exercises", "start_reps"):
-            conn.execute("ALTER TABLE program_exercises ADD COLUMN start_reps TEXT")
-        if not _sqlite_column_exists(conn, "workouts", "profile_id"):
-            conn.execute("ALTER TABLE workouts ADD COLUMN profile_id INTEGER REFERENCES profiles(id)")
-        conn.execute("UPDATE workouts SET profile_id = ? WHERE profile_id IS NULL", (default_id,))
-        conn.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS program_profile_exercise_idx "
-            "ON program_exercises(profile_id, day_name, exercise_id)"
-        )
 
+def data_version(profile_id: int, kind: str) -> int:
+    return data_versions().versions.get((profile_id, kind), 0)
 
-def clear_data_cache() -> None:
-    st.cache_data.clear()
+
+def invalidate_profile_data(profile_id: int, *kinds: str) -> None:
+    # Cached readers take the version as an argument, so bumping it only misses that profile's entries.
+    versions = data_versions()
+    with versions.lock:
+        for kind in kinds:
+            versions.versions[(profile_id, kind)] = versions.versions.get((profile_id, kind), 0) + 1
 
 
 @st.cache_data(ttl=30, show_spinner=False)
@@ -455,6 +616,7 @@ def seed_program_for_profile(profile_id: int) -> None:
                     }
                 )
         sb.table("program_exercises").insert(rows).execute()
+        invalidate_profile_data(profile_id, "program")
         return
 
     with db_connection() as conn:
@@ -477,6 +639,7 @@ def seed_program_for_profile(profile_id: int) -> None:
                     """,
                     (profile_id, day_name, exercise_id, order, sets, rep_min, rep_max),
                 )
+    invalidate_profile_data(profile_id, "program")
 
 
 def create_profile(name: str) -> Profile:
@@ -500,19 +663,36 @@ def create_profile(name: str) -> Profile:
         profile = Profile(int(profile_id), clean_name)
 
     seed_program_for_profile(profile.id)
-    clear_data_cache()
+    list_profiles.clear()
     return profile
 
 
 def list_program(profile_id: int, day_name: str) -> list[ProgramExercise]:
+    return program_by_day(profile_id).get(day_name, [])
+
+
+def program_by_day(profile_id: int) -> dict[str, list[ProgramExercise]]:
+    return _program_by_day(profile_id, data_version(profile_id, "program"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _program_by_day(profile_id: int, version: int) -> dict[str, list[ProgramExercise]]:
+    # All four days in one query; day switches and widget reruns then read from the cache.
+    days: dict[str, list[ProgramExercise]] = {day_name: [] for day_name in DAY_NAMES}
+    for exercise in _fetch_program(profile_id):
+        days.setdefault(exercise.day_name, []).append(exercise)
+    return days
+
+
+def _fetch_program(profile_id: int) -> list[ProgramExercise]:
     if use_supabase():
         rows = (
             supabase_client()
             .table("program_exercises")
             .select("id,exercise_id,day_name,sort_order,sets,rep_min,rep_max,start_weight_kg,start_reps,exercises(name)")
             .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
             .eq("active", True)
+            .order("day_name")
             .order("sort_order")
             .execute()
             .data
@@ -541,10 +721,10 @@ def list_program(profile_id: int, day_name: str) -> list[ProgramExercise]:
                    pe.sets, pe.rep_min, pe.rep_max, pe.start_weight_kg, pe.start_reps
             FROM program_exercises pe
             JOIN exercises e ON e.id = pe.exercise_id
-            WHERE pe.profile_id = ? AND pe.day_name = ? AND pe.active = 1
-            ORDER BY pe.sort_order, e.name
+            WHERE pe.profile_id = ? AND pe.active = 1
+            ORDER BY pe.day_name, pe.sort_order, e.name
             """,
-            (profile_id, day_name),
+            (profile_id,),
         ).fetchall()
     return [
         ProgramExercise(
@@ -563,8 +743,12 @@ def list_program(profile_id: int, day_name: str) -> list[ProgramExercise]:
     ]
 
 
-@st.cache_data(ttl=30, show_spinner=False)
 def profile_overview(profile_id: int) -> tuple[int, str | None]:
+    return _profile_overview(profile_id, data_version(profile_id, "overview"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _profile_overview(profile_id: int, version: int) -> tuple[int, str | None]:
     if use_supabase():
         result = (
             supabase_client()
@@ -587,6 +771,48 @@ def profile_overview(profile_id: int) -> tuple[int, str | None]:
     return count, row["day_name"] if row else None
 
 
+def profile_overviews(profile_ids: list[int]) -> dict[int, ProfileOverview]:
+    # Keyed on every profile's overview version, so a save only misses the entry it changed.
+    return _profile_overviews(tuple((pid, data_version(pid, "overview")) for pid in profile_ids))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _profile_overviews(versions: tuple[tuple[int, int], ...]) -> dict[int, ProfileOverview]:
+    # One grouped read for the Profiles view instead of two queries per profile.
+    profile_ids = [pid for pid, _ in versions]
+    overviews = {pid: ProfileOverview() for pid in profile_ids}
+    if not profile_ids:
+        return overviews
+    if use_supabase():
+        try:
+            rows = supabase_client().rpc("profile_overviews", {"p_profile_ids": profile_ids}).execute().data or []
+        except Exception as exc:
+            raise RuntimeError("Kunde inte läsa profilöversikten. Databasen behöver v10-migreringen.") from exc
+    else:
+        with db_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT profile_id, workout_count, last_workout_date, last_day_name
+                FROM (
+                    SELECT profile_id,
+                           workout_date AS last_workout_date,
+                           day_name AS last_day_name,
+                           COUNT(*) OVER (PARTITION BY profile_id) AS workout_count,
+                           ROW_NUMBER() OVER (PARTITION BY profile_id ORDER BY workout_date DESC, id DESC) AS position
+                    FROM workouts
+                    WHERE profile_id IN ({",".join("?" * len(profile_ids))})
+                )
+                WHERE position = 1
+                """,
+                profile_ids,
+            ).fetchall()
+    for row in rows:
+        overviews[int(row["profile_id"])] = ProfileOverview(
+            int(row["workout_count"]), row["last_workout_date"], row["last_day_name"]
+        )
+    return overviews
+
+
 def suggested_day(profile_id: int) -> str:
     _, last_day = profile_overview(profile_id)
     if last_day not in DAY_NAMES:
@@ -594,42 +820,56 @@ def suggested_day(profile_id: int) -> str:
     return DAY_NAMES[(DAY_NAMES.index(last_day) + 1) % len(DAY_NAMES)]
 
 
-@st.cache_data(ttl=30, show_spinner=False)
 def history_dataframe(profile_id: int) -> pd.DataFrame:
+    return _history_dataframe(profile_id, data_version(profile_id, "history"))
+
+
+def supabase_pages(query: Callable[[], Any], after_id: int = 0, page_size: int = SUPABASE_PAGE_SIZE) -> Iterator[list[dict]]:
+    # Stop on an empty page, not a short one: a max-rows setting below page_size shortens every page.
+    last_id = after_id
+    while True:
+        rows = query().gt("id", last_id).order("id").limit(page_size).execute().data or []
+        if not rows:
+            return
+        yield rows
+        last_id = int(rows[-1]["id"])
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _history_dataframe(profile_id: int, version: int) -> pd.DataFrame:
     columns = ["workout_id", "set_id", "datum", "pass", "anteckning", "ovning", "exercise_id", "set_nr", "vikt_kg", "reps", "pb"]
     if use_supabase():
-        rows = (
-            supabase_client()
-            .table("workout_sets")
-            .select(
-                "id,exercise_id,set_no,weight_kg,reps,is_pr,"
-                "workouts!inner(id,profile_id,workout_date,day_name,notes),exercises(name)"
+        def query() -> Any:
+            return (
+                supabase_client()
+                .table("workout_sets")
+                .select(
+                    "id,exercise_id,set_no,weight_kg,reps,is_pr,"
+                    "workouts!inner(id,profile_id,workout_date,day_name,notes),exercises(name)"
+                )
+                .eq("workouts.profile_id", profile_id)
             )
-            .eq("workouts.profile_id", profile_id)
-            .order("id")
-            .execute()
-            .data
-            or []
-        )
+
         data = []
-        for row in rows:
-            workout = row.get("workouts") or {}
-            exercise = row.get("exercises") or {}
-            data.append(
-                {
-                    "workout_id": workout.get("id"),
-                    "set_id": row.get("id"),
-                    "datum": workout.get("workout_date"),
-                    "pass": workout.get("day_name"),
-                    "anteckning": workout.get("notes") or "",
-                    "ovning": exercise.get("name"),
-                    "exercise_id": row.get("exercise_id"),
-                    "set_nr": row.get("set_no"),
-                    "vikt_kg": row.get("weight_kg"),
-                    "reps": row.get("reps"),
-                    "pb": row.get("is_pr"),
-                }
-            )
+        for rows in supabase_pages(query):
+            for row in rows:
+                workout = row.get("workouts") or {}
+                exercise = row.get("exercises") or {}
+                data.append(
+                    {
+                        "workout_id": workout.get("id"),
+                        "set_id": row.get("id"),
+                        "datum": workout.get("workout_date"),
+                        "pass": workout.get("day_name"),
+                        "anteckning": workout.get("notes") or "",
+                        "ovning": exercise.get("name"),
+                        "exercise_id": row.get("exercise_id"),
+                        "set_nr": row.get("set_no"),
+                        "vikt_kg": row.get("weight_kg"),
+                        "reps": row.get("reps"),
+                        "pb": row.get("is_pr"),
+                    }
+                )
         return pd.DataFrame(data, columns=columns)
 
     with db_connection() as conn:
@@ -650,69 +890,147 @@ def history_dataframe(profile_id: int) -> pd.DataFrame:
         )
 
 
-def best_for_exercise(name: str, history: pd.DataFrame) -> tuple[float, int] | None:
-    rows = history[history["ovning"] == name]
-    if rows.empty:
+@st.cache_resource
+def history_index_store() -> HistoryIndexStore:
+    return HistoryIndexStore()
+
+
+def history_index(profile_id: int) -> HistoryIndex:
+    """The profile's per-exercise history, shared by every session until its history version changes.
+
+    Treat it and its frames as read-only; a caller that needs to change something works on a copy.
+    """
+    store = history_index_store()
+    version = data_version(profile_id, "history")
+    with store.lock:
+        cached = store.indexes.get(profile_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Built outside the lock; a slower build never replaces an index of a newer version.
+    index = build_history_index(history_dataframe(profile_id))
+    with store.lock:
+        current = store.indexes.get(profile_id)
+        if current is None or current[0] <= version:
+            store.indexes[profile_id] = (version, index)
+    return index
+
+
+def build_history_index(history: pd.DataFrame) -> HistoryIndex:
+    if history.empty:
+        return {}
+    ordered = history.astype({"exercise_id": int, "vikt_kg": float, "reps": int}).sort_values(
+        ["datum", "workout_id", "set_nr"], kind="stable"
+    )
+    best_reps = ordered.groupby(["exercise_id", "vikt_kg"])["reps"].max()
+    index: HistoryIndex = {}
+    for exercise_id, rows in ordered.groupby("exercise_id", sort=False):
+        latest = rows[rows["workout_id"] == rows["workout_id"].iat[-1]]
+        by_weight = {float(weight): int(reps) for weight, reps in best_reps.loc[exercise_id].items()}
+        max_weight = max(by_weight)
+        index[int(exercise_id)] = ExerciseHistory(
+            sets=rows.reset_index(drop=True),
+            last_weight=float(latest["vikt_kg"].iat[-1]),
+            last_reps=tuple(int(value) for value in latest["reps"].tolist()),
+            max_weight=max_weight,
+            max_weight_reps=by_weight[max_weight],
+            best_reps=by_weight,
+        )
+    return index
+
+
+def best_for_exercise(exercise_id: int, index: HistoryIndex) -> tuple[float, int] | None:
+    entry = index.get(exercise_id)
+    if entry is None:
         return None
-    max_weight = float(rows["vikt_kg"].max())
-    max_reps = int(rows.loc[rows["vikt_kg"].astype(float) == max_weight, "reps"].max())
-    return max_weight, max_reps
+    return entry.max_weight, entry.max_weight_reps
+
+
+BARBELL_LOWER = ["knäböj", "frontböj", "marklyft", "raka marklyft"]
 
 
 def weight_step_for(name: str) -> float:
-    barbell_lower = ["knäböj", "frontböj", "marklyft", "raka marklyft"]
-    return 5.0 if any(term in name.lower() for term in barbell_lower) else 2.5
-
-
-def suggest_weight(exercise: ProgramExercise, history: pd.DataFrame) -> WeightSuggestion:
-    rows = history[history["exercise_id"].astype(str) == str(exercise.exercise_id)] if not history.empty else history
-    if rows.empty:
-        if exercise.start_weight_kg is not None:
-            return WeightSuggestion(
-                exercise.start_weight_kg,
-                f"Börja på {exercise.start_weight_kg:g} kg",
-                "Startvärde från din tidigare träningslogg.",
-            )
-        return WeightSuggestion(0.0, "Välj startvikt", "Första gången du loggar övningen.")
-
-    rows = rows.sort_values(["datum", "workout_id", "set_nr"])
-    latest_workout = rows.iloc[-1]["workout_id"]
-    latest = rows[rows["workout_id"] == latest_workout].sort_values("set_nr")
-    last_weight = float(latest.iloc[-1]["vikt_kg"])
-    reps = [int(value) for value in latest["reps"].tolist()]
-    step = weight_step_for(exercise.name)
-
-    if len(reps) < exercise.sets:
-        return WeightSuggestion(last_weight, f"Behåll {last_weight:g} kg", "Förra loggen hade färre set än programmet.")
-    if all(rep >= exercise.rep_max for rep in reps):
-        suggested = last_weight + step
-        return WeightSuggestion(suggested, f"Höj till {suggested:g} kg", "Alla set nådde övre repmålet senast.")
-    if all(rep < exercise.rep_min for rep in reps):
-        suggested = max(0.0, last_weight - step)
-        return WeightSuggestion(suggested, f"Sänk till {suggested:g} kg", "Alla set låg under repmålet senast.")
-    return WeightSuggestion(last_weight, f"Behåll {last_weight:g} kg", f"Senast: {', '.join(map(str, reps))} reps.")
-
-
-def suggested_reps(exercise: ProgramExercise, history: pd.DataFrame) -> list[int]:
-    rows = history[history["exercise_id"].astype(str) == str(exercise.exercise_id)] if not history.empty else history
-    if rows.empty:
-        values = list(exercise.start_reps)
-    else:
-        rows = rows.sort_values(["datum", "workout_id", "set_nr"])
-        latest_workout = rows.iloc[-1]["workout_id"]
-        values = [int(value) for value in rows[rows["workout_id"] == latest_workout]["reps"].tolist()]
-    return (values + [exercise.rep_min] * exercise.sets)[: exercise.sets]
+    return 5.0 if any(term in name.lower() for term in BARBELL_LOWER) else 2.5
 
 
-def _pr_flags(exercise_id: int, weight: float, reps: list[int], history: pd.DataFrame) -> list[bool]:
-    if history.empty:
-        running_best = 0
-    else:
-        previous = history[
-            (history["exercise_id"].astype(str) == str(exercise_id))
-            & (history["vikt_kg"].astype(float) == float(weight))
-        ]
-        running_best = int(previous["reps"].max()) if not previous.empty else 0
+SUGGESTION_TEXTS = {
+    "first": ("Börja på {weight:g} kg", "Startvärde från din tidigare träningslogg."),
+    "start": ("Välj startvikt", "Första gången du loggar övningen."),
+    "short": ("Behåll {weight:g} kg", "Förra loggen hade färre set än programmet."),
+    "raise": ("Höj till {weight:g} kg", "Alla set nådde övre repmålet senast."),
+    "lower": ("Sänk till {weight:g} kg", "Alla set låg under repmålet senast."),
+    "hold": ("Behåll {weight:g} kg", "Senast: {reps} reps."),
+}
+
+
+def suggest_weights(plan: list[ProgramExercise], history: pd.DataFrame) -> pd.DataFrame:
+    # The progression rules for a whole day in one pass, indexed by exercise_id. From each exercise's
+    # latest workout: no history -> the program's start weight if set, else start; fewer sets than
+    # planned -> keep the weight; every set at rep_max or above -> raise by the step; every set under
+    # rep_min -> lower by the step, not below 0; otherwise keep the weight. Reps repeat the latest
+    # workout (or start_reps), padded with rep_min to the planned sets.
+    exercises = list({exercise.exercise_id: exercise for exercise in plan}.values())
+    exercise_ids = pd.Index([exercise.exercise_id for exercise in exercises], dtype="int64")
+    sets = np.array([exercise.sets for exercise in exercises])
+    rep_min = np.array([exercise.rep_min for exercise in exercises])
+    rep_max = np.array([exercise.rep_max for exercise in exercises])
+    step = np.array([weight_step_for(exercise.name) for exercise in exercises])
+    start_weight = np.array([exercise.start_weight_kg if exercise.start_weight_kg is not None else np.nan for exercise in exercises])
+    last_reps = [exercise.start_reps for exercise in exercises]
+
+    rows = history[history["exercise_id"].astype("int64").isin(exercise_ids)]
+    slot = exercise_ids.get_indexer(rows["exercise_id"].astype("int64"))
+    workout = rows["workout_id"].to_numpy()
+    # Chronological within each exercise, with the exercise as the primary key.
+    order = np.lexsort((rows["set_nr"].to_numpy(), workout, rows["datum"].to_numpy(), slot))
+    slot, workout = slot[order], workout[order]
+    group_sizes = np.bincount(slot, minlength=len(exercises))
+    group_sizes = group_sizes[group_sizes > 0]
+    latest = workout == np.repeat(workout[np.cumsum(group_sizes) - 1], group_sizes)
+    slot = slot[latest]
+    reps = rows["reps"].to_numpy(dtype="int64")[order][latest]
+    weights = rows["vikt_kg"].to_numpy(dtype="float64")[order][latest]
+
+    logged_sets = np.bincount(slot, minlength=len(exercises))
+    at_max = np.bincount(slot, weights=reps >= rep_max[slot], minlength=len(exercises)) == logged_sets
+    under_min = np.bincount(slot, weights=reps < rep_min[slot], minlength=len(exercises)) == logged_sets
+    last_weight = np.zeros(len(exercises))
+    last_weight[slot] = weights
+    for chunk_slot, chunk in zip(np.unique(slot), np.split(reps, np.flatnonzero(np.diff(slot)) + 1)):
+        last_reps[chunk_slot] = tuple(chunk.tolist())
+
+    seen = logged_sets > 0
+    first = ~seen & ~np.isnan(start_weight)
+    short = seen & (logged_sets < sets)
+    raise_ = seen & ~short & at_max
+    lower = seen & ~short & ~raise_ & under_min
+    suggested = np.select(
+        [first, raise_, lower],
+        [start_weight, last_weight + step, np.maximum(0.0, last_weight - step)],
+        last_weight,
+    )
+    actions = np.select([first, ~seen, short, raise_, lower], ["first", "start", "short", "raise", "lower"], "hold")
+
+    texts = [
+        tuple(text.format(weight=weight, reps=", ".join(map(str, reps))) for text in SUGGESTION_TEXTS[action])
+        for action, weight, reps in zip(actions, suggested.tolist(), last_reps)
+    ]
+    return pd.DataFrame(
+        {
+            "weight": suggested,
+            "reps": [
+                (list(values) + [exercise.rep_min] * exercise.sets)[: exercise.sets]
+                for exercise, values in zip(exercises, last_reps)
+            ],
+            "label": [label for label, _ in texts],
+            "reason": [reason for _, reason in texts],
+        },
+        index=exercise_ids.rename("exercise_id"),
+    )
+
+
+def _pr_flags(exercise_id: int, weight: float, reps: list[int], index: HistoryIndex) -> list[bool]:
+    entry = index.get(exercise_id)
+    running_best = entry.best_reps.get(float(weight), 0) if entry else 0
     flags = []
     for rep in reps:
         flags.append(rep > running_best)
@@ -720,13 +1038,13 @@ def _pr_flags(exercise_id: int, weight: float, reps: list[int], history: pd.Data
     return flags
 
 
-def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str, logged: list[dict], history: pd.DataFrame) -> None:
+def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str, logged: list[dict], index: HistoryIndex) -> None:
     if not logged:
         raise ValueError("Markera minst en övning som klar.")
 
     set_rows = []
     for item in logged:
-        flags = _pr_flags(item["exercise_id"], item["weight_kg"], item["reps"], history)
+        flags = _pr_flags(item["exercise_id"], item["weight_kg"], item["reps"], index)
         for set_no, (reps, is_pr) in enumerate(zip(item["reps"], flags), start=1):
             set_rows.append(
                 {
@@ -754,7 +1072,7 @@ def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str,
             ).execute()
         except Exception as exc:
             raise RuntimeError("Kunde inte spara passet atomiskt. Databasen behöver v3-migreringen.") from exc
-        clear_data_cache()
+        invalidate_profile_data(profile_id, "overview", "history", "recent")
         return
 
     with db_connection() as conn:
@@ -775,7 +1093,7 @@ def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str,
                 for row in set_rows
             ],
         )
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "overview", "history", "recent")
 
 
 def update_program_exercise(row_id: int, profile_id: int, sets: int, rep_min: int, rep_max: int, sort_order: int) -> None:
@@ -788,7 +1106,7 @@ def update_program_exercise(row_id: int, profile_id: int, sets: int, rep_min: in
                 "UPDATE program_exercises SET sets=?, rep_min=?, rep_max=?, sort_order=? WHERE id=? AND profile_id=?",
                 (sets, rep_min, rep_max, sort_order, row_id, profile_id),
             )
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "program")
 
 
 def add_program_exercise(profile_id: int, day_name: str, name: str, sets: int, rep_min: int, rep_max: int) -> None:
@@ -797,59 +1115,42 @@ def add_program_exercise(profile_id: int, day_name: str, name: str, sets: int, r
         raise ValueError("Skriv ett övningsnamn först.")
     if rep_max < rep_min:
         raise ValueError("Rep max måste vara minst lika högt som rep min.")
-    exercise_id = _ensure_exercise(clean_name)
 
+    # Exercise lookup, next sort_order and the upsert happen in one round trip, so they cannot race an edit.
+    # A re-added exercise is reactivated and moved to the end of the day on both backends.
     if use_supabase():
-        sb = supabase_client()
-        existing = (
-            sb.table("program_exercises")
-            .select("id")
-            .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
-            .eq("exercise_id", exercise_id)
-            .limit(1)
-            .execute().data or []
-        )
-        orders = (
-            sb.table("program_exercises")
-            .select("sort_order")
-            .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
-            .order("sort_order", desc=True)
-            .limit(1)
-            .execute().data or []
-        )
-        order = int(orders[0]["sort_order"]) + 1 if orders else 1
-        payload = {
-            "profile_id": profile_id,
-            "day_name": day_name,
-            "exercise_id": exercise_id,
-            "sort_order": order,
-            "sets": sets,
-            "rep_min": rep_min,
-            "rep_max": rep_max,
-            "active": True,
-        }
-        if existing:
-            sb.table("program_exercises").update(payload).eq("id", existing[0]["id"]).execute()
-        else:
-            sb.table("program_exercises").insert(payload).execute()
+        try:
+            supabase_client().rpc(
+                "add_program_exercise_atomic",
+                {
+                    "p_profile_id": profile_id,
+                    "p_day_name": day_name,
+                    "p_exercise_name": clean_name,
+                    "p_sets": sets,
+                    "p_rep_min": rep_min,
+                    "p_rep_max": rep_max,
+                },
+            ).execute()
+        except Exception as exc:
+            raise RuntimeError("Kunde inte lägga till övningen. Databasen behöver v7-migreringen.") from exc
     else:
         with db_connection() as conn:
-            order = int(conn.execute(
-                "SELECT COALESCE(MAX(sort_order),0)+1 FROM program_exercises WHERE profile_id=? AND day_name=?",
-                (profile_id, day_name),
-            ).fetchone()[0])
+            conn.execute("INSERT OR IGNORE INTO exercises(name) VALUES (?)", (clean_name,))
             conn.execute(
                 """
                 INSERT INTO program_exercises(profile_id,day_name,exercise_id,sort_order,sets,rep_min,rep_max,active)
-                VALUES (?,?,?,?,?,?,?,1)
+                SELECT ?, ?, e.id,
+                       (SELECT COALESCE(MAX(sort_order),0)+1 FROM program_exercises WHERE profile_id=? AND day_name=?),
+                       ?, ?, ?, 1
+                FROM exercises e
+                WHERE e.name=?
                 ON CONFLICT(profile_id,day_name,exercise_id) DO UPDATE SET
-                    active=1, sets=excluded.sets, rep_min=excluded.rep_min, rep_max=excluded.rep_max
+                    active=1, sort_order=excluded.sort_order,
+                    sets=excluded.sets, rep_min=excluded.rep_min, rep_max=excluded.rep_max
                 """,
-                (profile_id, day_name, exercise_id, order, sets, rep_min, rep_max),
+                (profile_id, day_name, profile_id, day_name, sets, rep_min, rep_max, clean_name),
             )
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "program")
 
 
 def deactivate_program_exercise(row_id: int, profile_id: int) -> None:
@@ -858,11 +1159,15 @@ def deactivate_program_exercise(row_id: int, profile_id: int) -> None:
     else:
         with db_connection() as conn:
             conn.execute("UPDATE program_exercises SET active=0 WHERE id=? AND profile_id=?", (row_id, profile_id))
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "program")
+
+
+def recent_workouts(profile_id: int, limit: int = HISTORY_PAGE_SIZE, offset: int = 0) -> list[dict]:
+    return _recent_workouts(profile_id, limit, offset, data_version(profile_id, "recent"))
 
 
 @st.cache_data(ttl=30, show_spinner=False)
-def recent_workouts(profile_id: int, limit: int = 20) -> list[dict]:
+def _recent_workouts(profile_id: int, limit: int, offset: int, version: int) -> list[dict]:
     if use_supabase():
         return (
             supabase_client().table("workouts")
@@ -870,24 +1175,43 @@ def recent_workouts(profile_id: int, limit: int = 20) -> list[dict]:
             .eq("profile_id", profile_id)
             .order("workout_date", desc=True)
             .order("id", desc=True)
-            .limit(limit)
+            .range(offset, offset + limit - 1)
             .execute().data or []
         )
+    # One query for the page and all of its sets; the LEFT JOIN keeps workouts without sets.
     with db_connection() as conn:
-        workouts = [dict(row) for row in conn.execute(
-            "SELECT id,workout_date,day_name,notes FROM workouts WHERE profile_id=? ORDER BY workout_date DESC,id DESC LIMIT ?",
-            (profile_id, limit),
-        ).fetchall()]
-        for workout in workouts:
-            workout["workout_sets"] = [dict(row) for row in conn.execute(
-                """
-                SELECT ws.id,ws.set_no,ws.reps,ws.weight_kg,ws.is_pr,e.name
-                FROM workout_sets ws JOIN exercises e ON e.id=ws.exercise_id
-                WHERE ws.workout_id=? ORDER BY ws.id
-                """,
-                (workout["id"],),
-            ).fetchall()]
-    return workouts
+        rows = conn.execute(
+            """
+            WITH page AS (
+                SELECT id, workout_date, day_name, notes FROM workouts
+                WHERE profile_id=? ORDER BY workout_date DESC, id DESC LIMIT ? OFFSET ?
+            )
+            SELECT p.id AS workout_id, p.workout_date, p.day_name, p.notes,
+                   ws.id, ws.set_no, ws.reps, ws.weight_kg, ws.is_pr, e.name
+            FROM page p
+            LEFT JOIN workout_sets ws ON ws.workout_id=p.id
+            LEFT JOIN exercises e ON e.id=ws.exercise_id
+            ORDER BY p.workout_date DESC, p.id DESC, ws.id
+            """,
+            (profile_id, limit, offset),
+        ).fetchall()
+    workouts: dict[int, dict] = {}
+    for row in rows:
+        workout = workouts.setdefault(
+            row["workout_id"],
+            {
+                "id": row["workout_id"],
+                "workout_date": row["workout_date"],
+                "day_name": row["day_name"],
+                "notes": row["notes"],
+                "workout_sets": [],
+            },
+        )
+        if row["id"] is not None:
+            workout["workout_sets"].append(
+                {key: row[key] for key in ("id", "set_no", "reps", "weight_kg", "is_pr", "name")}
+            )
+    return list(workouts.values())
 
 
 def delete_workout(workout_id: int, profile_id: int) -> None:
@@ -896,7 +1220,7 @@ def delete_workout(workout_id: int, profile_id: int) -> None:
     else:
         with db_connection() as conn:
             conn.execute("DELETE FROM workouts WHERE id=? AND profile_id=?", (workout_id, profile_id))
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "overview", "history", "recent")
 
 
 def pb_summary_dataframe(history: pd.DataFrame) -> pd.DataFrame:
@@ -1042,6 +1366,7 @@ def technique_demo_html(exercise_name: str) -> str | None:
 
 
 dialog_decorator = getattr(st, "dialog", None) or st.experimental_dialog
+fragment_decorator = getattr(st, "fragment", None) or st.experimental_fragment
 
 
 @dialog_decorator("Utförande", width="large")
@@ -1057,6 +1382,55 @@ def render_technique_dialog(exercise_name: str) -> None:
     components.html(demo_html, height=460, scrolling=False)
 
 
+@st.cache_resource
+def page_load_slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(PAGE_LOAD_WORKERS)
+
+
+def _start_page_load(ctx: Any, fn: Callable[..., Any], *args: Any) -> Future:
+    # Cached readers look up the current session, so each read runs on a short-lived thread that gets
+    # the script run context before it starts, through the public add_script_run_ctx. Nothing is left
+    # attached to a thread that outlives the rerun; page_load_slots bounds how many reads run at once.
+    slots = page_load_slots()
+    future: Future = Future()
+
+    def run() -> None:
+        with slots:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    thread = threading.Thread(target=run, name="page-load", daemon=True)
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    thread.start()
+    return future
+
+
+def load_page_data(profile_id: int | None, view: str) -> list[Profile]:
+    """Warm every independent read the page needs at the same time and return the profiles.
+
+    The readers are the usual cached functions, so main() and the views pick the results up from
+    the cache afterwards. Errors are left for those calls to raise and handle as before.
+    """
+    ctx = get_script_run_ctx()
+
+    def warm(pid: int) -> list[Future]:
+        readers: list[Callable[[int], Any]] = [profile_overview]
+        if view == VIEWS[0]:
+            readers += [program_by_day, history_index]
+        return [_start_page_load(ctx, reader, pid) for reader in readers]
+
+    # The profile from the last run is almost always still valid, so it need not wait for list_profiles.
+    pending = warm(profile_id) if profile_id is not None else []
+    profiles = _start_page_load(ctx, list_profiles).result()
+    if profile_id is None and profiles:
+        pending = warm(profiles[0].id)
+    wait(pending)
+    return profiles
+
+
 def page_styles() -> None:
     st.markdown(
         """
@@ -1124,51 +1498,44 @@ def render_today(profile: Profile) -> None:
     key = f"selected_day_{profile.id}"
     selected_day = st.selectbox("Pass", DAY_NAMES, index=DAY_NAMES.index(st.session_state.get(key, default_day)), key=key)
     plan = list_program(profile.id, selected_day)
-    history = history_dataframe(profile.id)
+    index = history_index(profile.id)
     if not plan:
         st.info("Det finns inga övningar i det här passet.")
         return
+    suggestions = suggest_weights(plan, history_dataframe(profile.id))
 
-    logged: list[dict] = []
     with st.expander("Datum och anteckning"):
-        workout_date = st.date_input("Datum", value=date.today(), key=f"date_{profile.id}")
-        notes = st.text_area(
+        st.date_input("Datum", value=date.today(), key=f"date_{profile.id}")
+        st.text_area(
             "Anteckning",
             placeholder="Valfritt, t.ex. sömn, energi eller skada.",
             key=f"notes_{profile.id}_{selected_day}",
         )
     for exercise in plan:
-        pb = best_for_exercise(exercise.name, history)
-        suggestion = suggest_weight(exercise, history)
-        rep_defaults = suggested_reps(exercise, history)
-        demo_path = technique_demo_path(exercise.name)
-        with st.container(border=True):
-            hint = f"{exercise.sets} set · {exercise.rep_min}-{exercise.rep_max} reps"
-            if pb:
-                hint += f" · PB {pb[0]:g} kg x {pb[1]}"
-            if demo_path:
-                title_col, demo_col = st.columns(
-                    [5, 1],
-                    gap="small",
-                    vertical_alignment="top",
-                )
-                with title_col:
-                    st.markdown(
-                        f"""
-                        <div class="exercise-head"><div><div class="exercise-title">{escape(exercise.name)}</div>
-                        <div class="hint">{escape(hint)}</div></div></div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                with demo_col:
-                    show_demo = st.button(
-                        "▶",
-                        key=f"technique_{profile.id}_{exercise.id}",
-                        help="Visa utförande",
-                    )
-                if show_demo:
-                    render_technique_dialog(exercise.name)
-            else:
+        render_exercise_card(
+            profile,
+            exercise,
+            suggestions.loc[exercise.exercise_id],
+            best_for_exercise(exercise.exercise_id, index),
+        )
+    render_save_bar(profile, selected_day, plan)
+
+
+@fragment_decorator
+def render_exercise_card(profile: Profile, exercise: ProgramExercise, suggestion: pd.Series, pb: tuple[float, int] | None) -> None:
+    # A checkbox, weight or rep change reruns only this card; the save bar reads the values from session state.
+    demo_path = technique_demo_path(exercise.name)
+    with st.container(border=True):
+        hint = f"{exercise.sets} set · {exercise.rep_min}-{exercise.rep_max} reps"
+        if pb:
+            hint += f" · PB {pb[0]:g} kg x {pb[1]}"
+        if demo_path:
+            title_col, demo_col = st.columns(
+                [5, 1],
+                gap="small",
+                vertical_alignment="top",
+            )
+            with title_col:
                 st.markdown(
                     f"""
                     <div class="exercise-head"><div><div class="exercise-title">{escape(exercise.name)}</div>
@@ -1176,21 +1543,57 @@ def render_today(profile: Profile) -> None:
                     """,
                     unsafe_allow_html=True,
                 )
+            with demo_col:
+                show_demo = st.button(
+                    "▶",
+                    key=f"technique_{profile.id}_{exercise.id}",
+                    help="Visa utförande",
+                )
+            if show_demo:
+                render_technique_dialog(exercise.name)
+        else:
             st.markdown(
                 f"""
-                <div class="suggestion"><strong>{escape(suggestion.label)}</strong><span>{escape(suggestion.reason)}</span></div>
+                <div class="exercise-head"><div><div class="exercise-title">{escape(exercise.name)}</div>
+                <div class="hint">{escape(hint)}</div></div></div>
                 """,
                 unsafe_allow_html=True,
             )
-            done = st.checkbox("Klar", key=f"done_{profile.id}_{exercise.id}")
-            weight = st.number_input("Vikt kg", min_value=0.0, max_value=500.0, value=float(suggestion.weight), step=0.5, key=f"weight_{profile.id}_{exercise.id}")
-            reps: list[int] = []
-            columns = st.columns(min(exercise.sets, 4))
-            for set_index in range(1, exercise.sets + 1):
-                with columns[(set_index - 1) % len(columns)]:
-                    reps.append(st.number_input(f"Set {set_index}", min_value=0, max_value=100, value=rep_defaults[set_index - 1], step=1, key=f"reps_{profile.id}_{exercise.id}_{set_index}"))
-        if done:
-            logged.append({"exercise_id": exercise.exercise_id, "name": exercise.name, "weight_kg": float(weight), "reps": reps})
+        st.markdown(
+            f"""
+            <div class="suggestion"><strong>{escape(suggestion.label)}</strong><span>{escape(suggestion.reason)}</span></div>
+            """,
+            unsafe_allow_html=True,
+        )
+        st.checkbox("Klar", key=f"done_{profile.id}_{exercise.id}")
+        st.number_input("Vikt kg", min_value=0.0, max_value=500.0, value=float(suggestion.weight), step=0.5, key=f"weight_{profile.id}_{exercise.id}")
+        columns = st.columns(min(exercise.sets, 4))
+        for set_index in range(1, exercise.sets + 1):
+            with columns[(set_index - 1) % len(columns)]:
+                st.number_input(f"Set {set_index}", min_value=0, max_value=100, value=suggestion.reps[set_index - 1], step=1, key=f"reps_{profile.id}_{exercise.id}_{set_index}")
+
+
+def logged_exercises(profile_id: int, plan: list[ProgramExercise]) -> list[dict]:
+    logged = []
+    for exercise in plan:
+        if not st.session_state.get(f"done_{profile_id}_{exercise.id}"):
+            continue
+        logged.append(
+            {
+                "exercise_id": exercise.exercise_id,
+                "name": exercise.name,
+                "weight_kg": float(st.session_state[f"weight_{profile_id}_{exercise.id}"]),
+                "reps": [
+                    int(st.session_state[f"reps_{profile_id}_{exercise.id}_{set_index}"])
+                    for set_index in range(1, exercise.sets + 1)
+                ],
+            }
+        )
+    return logged
+
+
+@fragment_decorator
+def render_save_bar(profile: Profile, selected_day: str, plan: list[ProgramExercise]) -> None:
     submitted = st.button(
         "Spara pass",
         key=f"save_workout_{profile.id}_{selected_day}",
@@ -1200,11 +1603,18 @@ def render_today(profile: Profile) -> None:
 
     if submitted:
         try:
-            save_workout(profile.id, selected_day, workout_date, notes, logged, history)
+            save_workout(
+                profile.id,
+                selected_day,
+                st.session_state.get(f"date_{profile.id}", date.today()),
+                st.session_state.get(f"notes_{profile.id}_{selected_day}", ""),
+                logged_exercises(profile.id, plan),
+                history_index(profile.id),
+            )
         except Exception as exc:
             st.error(str(exc))
         else:
-            st.session_state[key] = DAY_NAMES[(DAY_NAMES.index(selected_day) + 1) % len(DAY_NAMES)]
+            st.session_state[f"selected_day_{profile.id}"] = DAY_NAMES[(DAY_NAMES.index(selected_day) + 1) % len(DAY_NAMES)]
             st.success("Passet är sparat.")
             st.rerun()
 
@@ -1285,10 +1695,23 @@ def render_charts(profile: Profile) -> None:
 
 
 def render_history(profile: Profile) -> None:
-    workouts = recent_workouts(profile.id)
-    if not workouts:
+    page_key = f"history_page_{profile.id}"
+    page = st.session_state.get(page_key, 0)
+    # One extra row tells whether an older page exists without a separate count query.
+    workouts = recent_workouts(profile.id, HISTORY_PAGE_SIZE + 1, page * HISTORY_PAGE_SIZE)
+    has_older = len(workouts) > HISTORY_PAGE_SIZE
+    workouts = workouts[:HISTORY_PAGE_SIZE]
+    if not workouts and page == 0:
         st.info("Ingen historik ännu.")
         return
+    if page or has_older:
+        newer_col, older_col = st.columns(2)
+        if newer_col.button("Nyare pass", key=f"history_newer_{profile.id}", disabled=page == 0, use_container_width=True):
+            st.session_state[page_key] = page - 1
+            st.rerun()
+        if older_col.button("Äldre pass", key=f"history_older_{profile.id}", disabled=not has_older, use_container_width=True):
+            st.session_state[page_key] = page + 1
+            st.rerun()
     for workout in workouts:
         with st.expander(f"{workout['workout_date']} · {workout['day_name']}"):
             if workout.get("notes"):
@@ -1306,10 +1729,19 @@ def render_history(profile: Profile) -> None:
 
 
 def render_profiles(active_profile: Profile) -> None:
-    for profile in list_profiles():
-        count, _ = profile_overview(profile.id)
+    profiles = list_profiles()
+    try:
+        overviews = profile_overviews([profile.id for profile in profiles])
+    except RuntimeError as exc:
+        st.error(str(exc))
+        overviews = {}
+    for profile in profiles:
+        # Without the overviews (the error is shown above) the profiles are still listed by name.
+        overview = overviews.get(profile.id)
+        count = f" · {overview.workouts} pass" if overview else ""
+        last = f" · senast {overview.last_date}" if overview and overview.last_date else ""
         marker = " · aktiv" if profile.id == active_profile.id else ""
-        st.write(f"**{profile.name}** · {count} pass{marker}")
+        st.write(f"**{profile.name}**{count}{last}{marker}")
     st.subheader("Ny profil")
     with st.form("create_profile"):
         name = st.text_input("Namn", placeholder="T.ex. Erik")
@@ -1342,7 +1774,7 @@ def main() -> None:
     init_db()
 
     try:
-        profiles = list_profiles()
+        profiles = load_page_data(st.session_state.get("profile_id"), st.session_state.get("active_view", VIEWS[0]))
     except Exception:
         st.error("Databasen behöver uppgraderas till Lyftlogg v3 innan appen kan starta.")
         st.caption("Kör filen supabase_migration_profiles_v3.sql i Supabase SQL Editor.")
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import functools
+import json
 import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future, wait
+from collections import Counter
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import date, datetime
 from html import escape
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 try:
     from supabase import Client, create_client
@@ -21,8 +31,31 @@ except Exception:  # Supabase is only required in cloud mode.
 
 APP_DIR = Path(__file__).parent
 DB_PATH = APP_DIR / "gymapp.db"
+SQLITE_POOL_SIZE = 4
+SQLITE_BUSY_TIMEOUT_MS = 5000
+# Page-load reads running at once; matches SQLITE_POOL_SIZE, so none waits on a pooled connection.
+PAGE_LOAD_WORKERS = 4
 DAY_NAMES = ["Pass 1", "Pass 2", "Pass 3", "Pass 4"]
 VIEWS = ["Idag", "Program", "PB", "Trend", "Historik", "Profiler", "Export"]
+HISTORY_PAGE_SIZE = 20
+HISTORY_COLUMNS = ["workout_id", "set_id", "datum", "pass", "anteckning", "ovning", "exercise_id", "set_nr", "vikt_kg", "reps", "pb"]
+HISTORY_DTYPES = {
+    "workout_id": "int32",
+    "set_id": "int32",
+    "pass": "category",
+    "anteckning": "category",
+    "ovning": "category",
+    "exercise_id": "int32",
+    "set_nr": "int32",
+    "vikt_kg": "float32",
+    "reps": "int32",
+    "pb": "bool",
+}
+HISTORY_TTL_SECONDS = 30
+# Catches edits to existing sets by other processes, which the count and max(id) check cannot see.
+HISTORY_FULL_RELOAD_SECONDS = 600
+# PostgREST silently truncates responses at its max-rows setting (1000 by default).
+SUPABASE_PAGE_SIZE = 1000
 
 STARTER_PROGRAM = {
     "Pass 1": [
@@ -55,12 +88,35 @@ STARTER_PROGRAM = {
 }
 
 
+@dataclass(frozen=True)
+class StorageBackend:
+    kind: str
+    url: str | None = None
+    key: str | None = None
+    server_key: bool = False
+
+    @property
+    def is_supabase(self) -> bool:
+        return self.kind == "supabase"
+
+    @property
+    def label(self) -> str:
+        return "Supabase" if self.is_supabase else "SQLite"
+
+
 @dataclass(frozen=True)
 class Profile:
     id: int
     name: str
 
 
+@dataclass(frozen=True)
+class ProfileOverview:
+    workouts: int = 0
+    last_date: str | None = None
+    last_day: str | None = None
+
+
 @dataclass(frozen=True)
 class ProgramExercise:
     id: int
@@ -74,10 +130,131 @@ class ProgramExercise:
 
 
 @dataclass(frozen=True)
-class WeightSuggestion:
-    weight: float
-    label: str
-    reason: str
+class ExerciseHistory:
+    sets: pd.DataFrame
+    last_weight: float
+    last_reps: tuple[int, ...]
+    max_weight: float
+    max_weight_reps: int
+
+
+HistoryIndex = dict[int, ExerciseHistory]
+
+
+@dataclass
+class HistorySnapshot:
+    frame: pd.DataFrame
+    last_set_id: int = 0
+    refreshed_at: float = 0.0
+    loaded_at: float = 0.0
+    version: int = 0
+    index: HistoryIndex | None = None
+
+
+@dataclass
+class HistoryStore:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    snapshots: dict[int, HistorySnapshot] = field(default_factory=dict)
+
+
+@dataclass
+class SqlitePool:
+    path: Path
+    idle: queue.LifoQueue = field(default_factory=lambda: queue.LifoQueue(SQLITE_POOL_SIZE))
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return open_sqlite(self.path)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@dataclass
+class DataVersions:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    versions: dict[tuple[int, str], int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class CallTiming:
+    function: str
+    ms: float
+    cache: str
+    backend: str
+    rows: int | None
+    queries: int
+    depth: int
+    thread: str
+
+
+@dataclass
+class RerunTimings:
+    session_id: str
+    rerun: int
+    log_path: Path | None
+    started_at: float = field(default_factory=time.perf_counter)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    calls: list[CallTiming] = field(default_factory=list)
+
+
+@dataclass
+class QueryCount:
+    sqlite: int = 0
+    supabase: int = 0
+    by_function: Counter = field(default_factory=Counter)
+    statements: Counter = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        return self.sqlite + self.supabase
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {statement: count for statement, count in self.statements.items() if count > threshold}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class TracedConnection(sqlite3.Connection):
+    # Lets the query counter see an executemany as one statement instead of one per row.
+    in_batch = False
+    batch_counted = False
+
+    def executemany(self, sql: str, parameters: Any) -> sqlite3.Cursor:
+        self.in_batch, self.batch_counted = True, False
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            self.in_batch = False
+
+
+class CountingProxy:
+    """Wraps the Supabase client and its query builders so that every execute() counts as one request."""
+
+    def __init__(self, target: Any, path: str = "") -> None:
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return CountingProxy(attribute, f"{self._path}.{name}") if hasattr(attribute, "execute") else attribute
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if name == "execute":
+                note_query("supabase", self._path)
+                return attribute(*args, **kwargs)
+            label = f"{name}({args[0]})" if args and isinstance(args[0], str) else name
+            return CountingProxy(attribute(*args, **kwargs), f"{self._path}.{label}" if self._path else label)
+
+        return call
 
 
 def _secret_value(section: str, key: str) -> str | None:
@@ -103,6 +280,144 @@ def app_pin() -> str | None:
     return _secret_value("app", "pin")
 
 
+# Per thread: the rerun's timing recorder, the stack of @timed calls and any open query budgets.
+# Page-load threads are handed the recorder by _start_page_load.
+_call_state = threading.local()
+SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SQL_TRANSACTION_RE = re.compile(r"\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+
+
+def timings_enabled() -> bool:
+    return (_secret_value("debug", "timings") or "").lower() in ("1", "true", "yes")
+
+
+def start_rerun_timings() -> RerunTimings | None:
+    timings = None
+    if timings_enabled():
+        ctx = get_script_run_ctx()
+        rerun = st.session_state["timing_rerun"] = st.session_state.get("timing_rerun", 0) + 1
+        log_path = _secret_value("debug", "timings_path")
+        timings = RerunTimings(ctx.session_id if ctx else "-", rerun, Path(log_path) if log_path else None)
+    _call_state.recorder = timings
+    return timings
+
+
+def query_accounting_active() -> bool:
+    return bool(getattr(_call_state, "stack", None) or getattr(_call_state, "query_counts", None))
+
+
+def note_query(backend: str, statement: str) -> None:
+    stack = getattr(_call_state, "stack", ())
+    for frame in stack:
+        frame["queries"] += 1
+    function = stack[-1]["name"] if stack else "-"
+    for count in getattr(_call_state, "query_counts", ()):
+        setattr(count, backend, getattr(count, backend) + 1)
+        count.by_function[function] += 1
+        count.statements[statement] += 1
+
+
+def _trace_sqlite(conn: sqlite3.Connection, statement: str) -> None:
+    if not query_accounting_active() or SQL_TRANSACTION_RE.match(statement):
+        return
+    if getattr(conn, "in_batch", False):
+        if conn.batch_counted:
+            return
+        conn.batch_counted = True
+    # sqlite3 traces statements with the values bound, so strip them to group repeats of one query.
+    note_query("sqlite", " ".join(SQL_LITERAL_RE.sub("?", statement).split()))
+
+
+@contextmanager
+def query_budget(
+    total: int | None = None,
+    *,
+    sqlite: int | None = None,
+    supabase: int | None = None,
+    max_repeats: int | None = None,
+) -> Iterator[QueryCount]:
+    """Count the queries issued on this thread inside the block and fail if they exceed the budget.
+
+    SQLite statements come from a trace callback that db_connection() installs while a budget is
+    open (an executemany counts once) and Supabase requests from the execute() calls on
+    supabase_client(). max_repeats catches
+    N+1 loops: the same statement, values stripped, issued more often than that inside the block.
+    """
+    count = QueryCount()
+    counts = _call_state.__dict__.setdefault("query_counts", [])
+    counts.append(count)
+    try:
+        yield count
+    finally:
+        counts.remove(count)
+    problems = [
+        f"{label} {used} > {limit}"
+        for label, used, limit in (("totalt", count.total, total), ("SQLite", count.sqlite, sqlite), ("Supabase", count.supabase, supabase))
+        if limit is not None and used > limit
+    ]
+    if max_repeats is not None:
+        problems += [f"{used} x {statement}" for statement, used in count.repeated(max_repeats).items()]
+    if problems:
+        raise QueryBudgetExceeded(
+            "Frågebudgeten överskreds: " + "; ".join(problems) + f" (per funktion: {dict(count.by_function)})"
+        )
+
+
+def _row_count(result: Any) -> int | None:
+    if isinstance(result, dict) and all(isinstance(value, list) for value in result.values()):
+        return sum(len(value) for value in result.values())
+    if isinstance(result, (list, dict, pd.DataFrame)):
+        return len(result)
+    return None
+
+
+def _record_call(timings: RerunTimings, call: CallTiming) -> None:
+    with timings.lock:
+        timings.calls.append(call)
+        if timings.log_path is not None:
+            line = {"session": timings.session_id, "rerun": timings.rerun, "at": datetime.now().isoformat(timespec="milliseconds"), **asdict(call)}
+            with timings.log_path.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def timed(function: Callable | None = None, *, cached: bool = True) -> Callable:
+    """Record wall time, cache hit or miss, backend, row and query counts of a data-layer call.
+
+    Does nothing unless debug timings are switched on for the rerun or a query_budget is open,
+    which uses the call stack to attribute queries. Writes pass cached=False, since there is no
+    cache to hit.
+    """
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timings = getattr(_call_state, "recorder", None)
+            if timings is None and not getattr(_call_state, "query_counts", None):
+                return function(*args, **kwargs)
+            stack = _call_state.__dict__.setdefault("stack", [])
+            frame = {"name": function.__name__, "queries": 0}
+            stack.append(frame)
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                stack.pop()
+            if timings is None:
+                return result
+            # A call that never reached SQLite or Supabase was answered from a cache.
+            cache = "-" if not cached else ("miss" if frame["queries"] else "hit")
+            _record_call(
+                timings,
+                CallTiming(
+                    function.__name__, round(elapsed, 2), cache, storage_backend().label,
+                    _row_count(result), frame["queries"], len(stack), threading.current_thread().name,
+                ),
+            )
+            return result
+        return wrapper
+    return decorate(function) if function is not None else decorate
+
+
 def require_pin_if_configured() -> None:
     pin = app_pin()
     if not pin or st.session_state.get("unlocked"):
@@ -138,35 +453,74 @@ def supabase_credentials() -> tuple[str | None, str | None]:
     return url, key
 
 
-def use_supabase() -> bool:
+@st.cache_resource
+def storage_backend() -> StorageBackend:
+    """Resolved once per process; call reload_storage_backend() after changing the secrets."""
     url, key = supabase_credentials()
-    return bool(url and key)
+    if not url or not key:
+        return StorageBackend("sqlite")
+    server_key = bool(_secret_value("supabase", "service_role_key") or _secret_value("supabase", "secret_key"))
+    return StorageBackend("supabase", url, key, server_key)
+
+
+def reload_storage_backend() -> None:
+    storage_backend.clear()
+    _supabase_client.clear()
+    history_store.clear()
+    st.cache_data.clear()
+
+
+def use_supabase() -> bool:
+    return storage_backend().is_supabase
 
 
 def uses_server_key() -> bool:
-    return bool(
-        _secret_value("supabase", "service_role_key")
-        or _secret_value("supabase", "secret_key")
-    )
+    return storage_backend().server_key
+
+
+def supabase_client() -> Client | CountingProxy:
+    client = _supabase_client()
+    return CountingProxy(client) if query_accounting_active() else client
 
 
 @st.cache_resource
-def supabase_client() -> Client:
+def _supabase_client() -> Client:
     if create_client is None:
         st.error("Supabase-paketet saknas.")
         st.stop()
-    url, key = supabase_credentials()
-    if not url or not key:
+    backend = storage_backend()
+    if not backend.is_supabase:
         st.error("Supabase-inställningarna saknas.")
         st.stop()
-    return create_client(url, key)
+    return create_client(backend.url, backend.key)
 
 
-@contextmanager
-def db_connection():
-    conn = sqlite3.connect(DB_PATH)
+def open_sqlite(path: Path) -> sqlite3.Connection:
+    # Connections are shared between session threads, one borrower at a time via SqlitePool.
+    conn = sqlite3.connect(path, check_same_thread=False, factory=TracedConnection)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
     conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+@st.cache_resource
+def sqlite_pool(path: str) -> SqlitePool:
+    return SqlitePool(Path(path))
+
+
+@contextmanager
+def db_connection():
+    # Reusing connections skips the connect/PRAGMA cost per call and keeps sqlite3's statement cache warm.
+    pool = sqlite_pool(str(DB_PATH))
+    conn = pool.acquire()
+    # Traced only while a query budget or timing recorder is counting, since the callback runs for
+    # every statement; cleared again so the pooled connection goes back untraced.
+    traced = query_accounting_active()
+    if traced:
+        conn.set_trace_callback(functools.partial(_trace_sqlite, conn))
     try:
         yield conn
         conn.commit()
@@ -174,7 +528,21 @@ def db_connection():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        if traced:
+            conn.set_trace_callback(None)
+        pool.release(conn)
+
+
+def _execute_statements(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() commits any open transaction first, so a migration step runs its script one statement at a time.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
 
 
 def _sqlite_column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
@@ -240,82 +608,229 @@ def _migrate_local_program_profiles(conn: sqlite3.Connection, default_profile_id
     conn.execute("DROP TABLE program_exercises_legacy")
 
 
-def init_db() -> None:
-    if use_supabase():
-        return
-    with db_connection() as conn:
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS profiles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
-            );
-
-            CREATE TABLE IF NOT EXISTS program_exercises (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
-                day_name TEXT NOT NULL,
-                exercise_id INTEGER NOT NULL REFERENCES exercises(id),
-                sort_order INTEGER NOT NULL,
-                sets INTEGER NOT NULL,
-                rep_min INTEGER NOT NULL,
-                rep_max INTEGER NOT NULL,
-                active INTEGER NOT NULL DEFAULT 1
-            );
-
-            CREATE TABLE IF NOT EXISTS workouts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                profile_id INTEGER REFERENCES profiles(id),
-                workout_date TEXT NOT NULL,
-                day_name TEXT NOT NULL,
-                notes TEXT DEFAULT '',
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS workout_sets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
-                exercise_id INTEGER NOT NULL REFERENCES exercises(id),
-                set_no INTEGER NOT NULL,
-                reps INTEGER NOT NULL,
-                weight_kg REAL NOT NULL,
-                is_pr INTEGER NOT NULL DEFAULT 0,
-                UNIQUE(workout_id, exercise_id, set_no)
-            );
-            """
+PERSONAL_BESTS_AGGREGATE = """
+    INSERT INTO personal_bests
+        (profile_id, exercise_id, weight_kg, max_reps, best_e1rm, set_count, total_volume)
+    SELECT w.profile_id, ws.exercise_id, ws.weight_kg, MAX(ws.reps),
+           MAX(ws.weight_kg * (1 + ws.reps / 30.0)), COUNT(*), SUM(ws.weight_kg * ws.reps)
+    FROM workout_sets ws
+    JOIN workouts w ON w.id = ws.workout_id
+"""
+
+
+def _install_personal_bests(conn: sqlite3.Connection) -> None:
+    # Kept current by triggers, so every writer to this database (app_v2 included) updates it in its own transaction.
+    backfill = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'personal_bests'"
+    ).fetchone() is None
+    _execute_statements(
+        conn,
+        f"""
+        CREATE TABLE IF NOT EXISTS personal_bests (
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+            weight_kg REAL NOT NULL,
+            max_reps INTEGER NOT NULL,
+            best_e1rm REAL NOT NULL,
+            set_count INTEGER NOT NULL,
+            total_volume REAL NOT NULL,
+            PRIMARY KEY (profile_id, exercise_id, weight_kg)
+        );
+
+        CREATE TRIGGER IF NOT EXISTS personal_bests_set_insert
+        AFTER INSERT ON workout_sets
+        BEGIN
+            INSERT INTO personal_bests
+                (profile_id, exercise_id, weight_kg, max_reps, best_e1rm, set_count, total_volume)
+            SELECT profile_id, NEW.exercise_id, NEW.weight_kg, NEW.reps,
+                   NEW.weight_kg * (1 + NEW.reps / 30.0), 1, NEW.weight_kg * NEW.reps
+            FROM workouts
+            WHERE id = NEW.workout_id AND profile_id IS NOT NULL
+            ON CONFLICT(profile_id, exercise_id, weight_kg) DO UPDATE SET
+                max_reps = MAX(max_reps, excluded.max_reps),
+                best_e1rm = MAX(best_e1rm, excluded.best_e1rm),
+                set_count = set_count + excluded.set_count,
+                total_volume = total_volume + excluded.total_volume;
+        END;
+
+        -- Runs before the cascade removes the sets, then rebuilds the touched exercises from what remains.
+        CREATE TRIGGER IF NOT EXISTS personal_bests_workout_delete
+        BEFORE DELETE ON workouts
+        BEGIN
+            DELETE FROM personal_bests
+            WHERE profile_id = OLD.profile_id
+              AND exercise_id IN (SELECT exercise_id FROM workout_sets WHERE workout_id = OLD.id);
+            {PERSONAL_BESTS_AGGREGATE}
+            WHERE w.profile_id = OLD.profile_id
+              AND ws.workout_id <> OLD.id
+              AND ws.exercise_id IN (SELECT exercise_id FROM workout_sets WHERE workout_id = OLD.id)
+            GROUP BY w.profile_id, ws.exercise_id, ws.weight_kg;
+        END;
+        """
+    )
+    if backfill:
+        conn.execute(
+            PERSONAL_BESTS_AGGREGATE
+            + "WHERE w.profile_id IS NOT NULL GROUP BY w.profile_id, ws.exercise_id, ws.weight_kg"
         )
 
-        default = conn.execute("SELECT id FROM profiles ORDER BY id LIMIT 1").fetchone()
-        if not default:
-            default_id = conn.execute(
-                "INSERT INTO profiles(name, created_at) VALUES (?, ?)",
-                ("Tobias", datetime.now().isoformat(timespec="seconds")),
-            ).lastrowid
-        else:
-            default_id = default["id"]
 
-        _migrate_local_program_profiles(conn, int(default_id))
-        if not _sqlite_column_exists(conn, "workouts", "profile_id"):
-            conn.execute("ALTER TABLE workouts ADD COLUMN profile_id INTEGER REFERENCES profiles(id)")
-        conn.execute("UPDATE workouts SET profile_id = ? WHERE profile_id IS NULL", (default_id,))
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    _execute_statements(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS program_exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            day_name TEXT NOT NULL,
+            exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+            sort_order INTEGER NOT NULL,
+            sets INTEGER NOT NULL,
+            rep_min INTEGER NOT NULL,
+            rep_max INTEGER NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1
+        );
+
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER REFERENCES profiles(id),
+            workout_date TEXT NOT NULL,
+            day_name TEXT NOT NULL,
+            notes TEXT DEFAULT '',
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+            exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+            set_no INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight_kg REAL NOT NULL,
+            is_pr INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(workout_id, exercise_id, set_no)
+        );
+        """
+    )
+    _default_profile_id(conn)
+
+
+def _default_profile_id(conn: sqlite3.Connection) -> int:
+    default = conn.execute("SELECT id FROM profiles ORDER BY id LIMIT 1").fetchone()
+    if default:
+        return int(default["id"])
+    return int(
+        conn.execute(
+            "INSERT INTO profiles(name, created_at) VALUES (?, ?)",
+            ("Tobias", datetime.now().isoformat(timespec="seconds")),
+        ).lastrowid
+    )
+
+
+def _migrate_program_profiles(conn: sqlite3.Connection) -> None:
+    _migrate_local_program_profiles(conn, _default_profile_id(conn))
+
+
+def _migrate_workout_profiles(conn: sqlite3.Connection) -> None:
+    if not _sqlite_column_exists(conn, "workouts", "profile_id"):
+        conn.execute("ALTER TABLE workouts ADD COLUMN profile_id INTEGER REFERENCES profiles(id)")
+    conn.execute("UPDATE workouts SET profile_id = ? WHERE profile_id IS NULL", (_default_profile_id(conn),))
+
+
+def _create_program_profile_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS program_profile_exercise_idx "
+        "ON program_exercises(profile_id, day_name, exercise_id)"
+    )
+
+
+def _create_workout_profile_date_index(conn: sqlite3.Connection) -> None:
+    # Same index as workouts_profile_date_idx in Supabase; serves the overview reads.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS workouts_profile_date_idx "
+        "ON workouts(profile_id, workout_date DESC, id DESC)"
+    )
+
+
+# Applied steps are recorded by name in schema_migrations. app_v2 and app_v3 share gymapp.db with
+# different step lists, so a single PRAGMA user_version number could not describe both. Steps stay idempotent.
+SCHEMA_STEPS: list[tuple[str, Callable[[sqlite3.Connection], None]]] = [
+    ("base_tables", _create_base_tables),
+    ("program_profiles", _migrate_program_profiles),
+    ("workout_profiles", _migrate_workout_profiles),
+    ("program_profile_index", _create_program_profile_index),
+    ("personal_bests", _install_personal_bests),
+    ("workout_profile_date_index", _create_workout_profile_date_index),
+]
+
+
+@st.cache_resource(show_spinner=False)
+def _migrated_schema(path: str) -> bool:
+    # Runs once per process and database file; warm reruns only hit the cache.
+    with db_connection() as conn:
         conn.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS program_profile_exercise_idx "
-            "ON program_exercises(profile_id, day_name, exercise_id)"
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"
         )
+        applied = {row["name"] for row in conn.execute("SELECT name FROM schema_migrations")}
+    for name, step in SCHEMA_STEPS:
+        if name in applied:
+            continue
+        with db_connection() as conn:
+            # One write transaction per step, so the step and its record commit together. Another process
+            # starting at the same moment waits here and then finds the step already recorded.
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE name = ?", (name,)).fetchone():
+                continue
+            step(conn)
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_migrations(name, applied_at) VALUES (?, ?)",
+                (name, datetime.now().isoformat(timespec="seconds")),
+            )
+    return True
 
 
-def clear_data_cache() -> None:
-    st.cache_data.clear()
+@timed
+def init_db() -> None:
+    if use_supabase():
+        return
+    _migrated_schema(str(DB_PATH))
 
 
-@st.cache_data(ttl=30, show_spinner=False)
+@st.cache_resource
+def data_versions() -> DataVersions:
+    return DataVersions()
+
+
+def data_version(profile_id: int, kind: str) -> int:
+    return data_versions().versions.get((profile_id, kind), 0)
+
+
+def invalidate_profile_data(profile_id: int, *kinds: str) -> None:
+    # Cached readers take the version as an argument, so bumping it only misses that profile's entries.
+    versions = data_versions()
+    with versions.lock:
+        for kind in kinds:
+            versions.versions[(profile_id, kind)] = versions.versions.get((profile_id, kind), 0) + 1
+
+
+@timed
 def list_profiles() -> list[Profile]:
+    return _list_profiles()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_profiles() -> list[Profile]:
     if use_supabase():
         rows = supabase_client().table("profiles").select("id,name").order("id").execute().data or []
         return [Profile(int(row["id"]), row["name"]) for row in rows]
@@ -324,23 +839,32 @@ def list_profiles() -> list[Profile]:
     return [Profile(int(row["id"]), row["name"]) for row in rows]
 
 
-def _ensure_exercise(name: str) -> int:
-    if use_supabase():
-        sb = supabase_client()
-        rows = sb.table("exercises").select("id").eq("name", name).limit(1).execute().data or []
-        if rows:
-            return int(rows[0]["id"])
-        return int(sb.table("exercises").insert({"name": name}).execute().data[0]["id"])
-    with db_connection() as conn:
-        conn.execute("INSERT OR IGNORE INTO exercises(name) VALUES (?)", (name,))
-        return int(conn.execute("SELECT id FROM exercises WHERE name = ?", (name,)).fetchone()["id"])
+def starter_program_rows() -> list[dict]:
+    return [
+        {"day_name": day_name, "name": name, "sort_order": order, "sets": sets, "rep_min": rep_min, "rep_max": rep_max}
+        for day_name, exercises in STARTER_PROGRAM.items()
+        for order, (name, sets, rep_min, rep_max) in enumerate(exercises, start=1)
+    ]
 
 
+@timed(cached=False)
 def seed_program_for_profile(profile_id: int) -> None:
+    # Answered from the program cache, which the Today view reads anyway. A program whose exercises
+    # are all deactivated is still the user's program, so an empty one falls back to a cached check
+    # for any row, active or not; only a profile without rows costs a write.
+    if any(program_by_day(profile_id).values()):
+        return
+    if _has_program_rows(profile_id, data_version(profile_id, "program")):
+        return
+    _seed_starter_program(profile_id)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _has_program_rows(profile_id: int, version: int) -> bool:
     if use_supabase():
-        sb = supabase_client()
-        existing = (
-            sb.table("program_exercises")
+        rows = (
+            supabase_client()
+            .table("program_exercises")
             .select("id")
             .eq("profile_id", profile_id)
             .limit(1)
@@ -348,48 +872,43 @@ def seed_program_for_profile(profile_id: int) -> None:
             .data
             or []
         )
-        if existing:
-            return
-        rows = []
-        for day_name, exercises in STARTER_PROGRAM.items():
-            for order, (name, sets, rep_min, rep_max) in enumerate(exercises, start=1):
-                rows.append(
-                    {
-                        "profile_id": profile_id,
-                        "day_name": day_name,
-                        "exercise_id": _ensure_exercise(name),
-                        "sort_order": order,
-                        "sets": sets,
-                        "rep_min": rep_min,
-                        "rep_max": rep_max,
-                        "active": True,
-                    }
-                )
-        sb.table("program_exercises").insert(rows).execute()
+        return bool(rows)
+    with db_connection() as conn:
+        return conn.execute(
+            "SELECT 1 FROM program_exercises WHERE profile_id = ? LIMIT 1", (profile_id,)
+        ).fetchone() is not None
+
+
+def _seed_starter_program(profile_id: int) -> None:
+    rows = starter_program_rows()
+    if use_supabase():
+        try:
+            supabase_client().rpc("seed_starter_program", {"p_profile_id": profile_id, "p_rows": rows}).execute()
+        except Exception as exc:
+            raise RuntimeError("Kunde inte skapa startprogrammet. Databasen behöver v9-migreringen.") from exc
+        invalidate_profile_data(profile_id, "program")
         return
 
+    values = ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(rows))
+    params = [value for row in rows for value in (row["day_name"], row["name"], row["sort_order"], row["sets"], row["rep_min"], row["rep_max"])]
     with db_connection() as conn:
-        exists = conn.execute(
-            "SELECT 1 FROM program_exercises WHERE profile_id = ? LIMIT 1", (profile_id,)
-        ).fetchone()
-        if exists:
-            return
-        for day_name, exercises in STARTER_PROGRAM.items():
-            for order, (name, sets, rep_min, rep_max) in enumerate(exercises, start=1):
-                conn.execute("INSERT OR IGNORE INTO exercises(name) VALUES (?)", (name,))
-                exercise_id = conn.execute(
-                    "SELECT id FROM exercises WHERE name = ?", (name,)
-                ).fetchone()["id"]
-                conn.execute(
-                    """
-                    INSERT INTO program_exercises
-                        (profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, 1)
-                    """,
-                    (profile_id, day_name, exercise_id, order, sets, rep_min, rep_max),
-                )
+        conn.executemany("INSERT OR IGNORE INTO exercises(name) VALUES (?)", [(row["name"],) for row in rows])
+        conn.execute(
+            f"""
+            WITH starter(day_name, name, sort_order, sets, rep_min, rep_max) AS (VALUES {values})
+            INSERT INTO program_exercises
+                (profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
+            SELECT ?, starter.day_name, e.id, starter.sort_order, starter.sets, starter.rep_min, starter.rep_max, 1
+            FROM starter
+            JOIN exercises e ON e.name = starter.name
+            WHERE NOT EXISTS (SELECT 1 FROM program_exercises WHERE profile_id = ?)
+            """,
+            (*params, profile_id, profile_id),
+        )
+    invalidate_profile_data(profile_id, "program")
 
 
+@timed(cached=False)
 def create_profile(name: str) -> Profile:
     clean_name = " ".join(name.strip().split())
     if not clean_name:
@@ -410,20 +929,39 @@ def create_profile(name: str) -> Profile:
             ).lastrowid
         profile = Profile(int(profile_id), clean_name)
 
-    seed_program_for_profile(profile.id)
-    clear_data_cache()
+    _seed_starter_program(profile.id)
+    _list_profiles.clear()
     return profile
 
 
+@timed
 def list_program(profile_id: int, day_name: str) -> list[ProgramExercise]:
+    return program_by_day(profile_id).get(day_name, [])
+
+
+@timed
+def program_by_day(profile_id: int) -> dict[str, list[ProgramExercise]]:
+    return _program_by_day(profile_id, data_version(profile_id, "program"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _program_by_day(profile_id: int, version: int) -> dict[str, list[ProgramExercise]]:
+    # All four days in one query; day switches and widget reruns then read from the cache.
+    days: dict[str, list[ProgramExercise]] = {day_name: [] for day_name in DAY_NAMES}
+    for exercise in _fetch_program(profile_id):
+        days.setdefault(exercise.day_name, []).append(exercise)
+    return days
+
+
+def _fetch_program(profile_id: int) -> list[ProgramExercise]:
     if use_supabase():
         rows = (
             supabase_client()
             .table("program_exercises")
             .select("id,exercise_id,day_name,sort_order,sets,rep_min,rep_max,exercises(name)")
             .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
             .eq("active", True)
+            .order("day_name")
             .order("sort_order")
             .execute()
             .data
@@ -450,16 +988,21 @@ def list_program(profile_id: int, day_name: str) -> list[ProgramExercise]:
                    pe.sets, pe.rep_min, pe.rep_max
             FROM program_exercises pe
             JOIN exercises e ON e.id = pe.exercise_id
-            WHERE pe.profile_id = ? AND pe.day_name = ? AND pe.active = 1
-            ORDER BY pe.sort_order, e.name
+            WHERE pe.profile_id = ? AND pe.active = 1
+            ORDER BY pe.day_name, pe.sort_order, e.name
             """,
-            (profile_id, day_name),
+            (profile_id,),
         ).fetchall()
     return [ProgramExercise(**dict(row)) for row in rows]
 
 
-@st.cache_data(ttl=30, show_spinner=False)
+@timed
 def profile_overview(profile_id: int) -> tuple[int, str | None]:
+    return _profile_overview(profile_id, data_version(profile_id, "overview"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _profile_overview(profile_id: int, version: int) -> tuple[int, str | None]:
     if use_supabase():
         result = (
             supabase_client()
@@ -482,6 +1025,49 @@ def profile_overview(profile_id: int) -> tuple[int, str | None]:
     return count, row["day_name"] if row else None
 
 
+@timed
+def profile_overviews(profile_ids: list[int]) -> dict[int, ProfileOverview]:
+    # Keyed on every profile's overview version, so a save only misses the entry it changed.
+    return _profile_overviews(tuple((pid, data_version(pid, "overview")) for pid in profile_ids))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _profile_overviews(versions: tuple[tuple[int, int], ...]) -> dict[int, ProfileOverview]:
+    # One grouped read for the Profiles view instead of two queries per profile.
+    profile_ids = [pid for pid, _ in versions]
+    overviews = {pid: ProfileOverview() for pid in profile_ids}
+    if not profile_ids:
+        return overviews
+    if use_supabase():
+        try:
+            rows = supabase_client().rpc("profile_overviews", {"p_profile_ids": profile_ids}).execute().data or []
+        except Exception as exc:
+            raise RuntimeError("Kunde inte läsa profilöversikten. Databasen behöver v10-migreringen.") from exc
+    else:
+        with db_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT profile_id, workout_count, last_workout_date, last_day_name
+                FROM (
+                    SELECT profile_id,
+                           workout_date AS last_workout_date,
+                           day_name AS last_day_name,
+                           COUNT(*) OVER (PARTITION BY profile_id) AS workout_count,
+                           ROW_NUMBER() OVER (PARTITION BY profile_id ORDER BY workout_date DESC, id DESC) AS position
+                    FROM workouts
+                    WHERE profile_id IN ({",".join("?" * len(profile_ids))})
+                )
+                WHERE position = 1
+                """,
+                profile_ids,
+            ).fetchall()
+    for row in rows:
+        overviews[int(row["profile_id"])] = ProfileOverview(
+            int(row["workout_count"]), row["last_workout_date"], row["last_day_name"]
+        )
+    return overviews
+
+
 def suggested_day(profile_id: int) -> str:
     _, last_day = profile_overview(profile_id)
     if last_day not in DAY_NAMES:
@@ -489,46 +1075,78 @@ def suggested_day(profile_id: int) -> str:
     return DAY_NAMES[(DAY_NAMES.index(last_day) + 1) % len(DAY_NAMES)]
 
 
-@st.cache_data(ttl=30, show_spinner=False)
-def history_dataframe(profile_id: int) -> pd.DataFrame:
-    columns = ["workout_id", "set_id", "datum", "pass", "anteckning", "ovning", "exercise_id", "set_nr", "vikt_kg", "reps", "pb"]
-    if use_supabase():
-        rows = (
-            supabase_client()
-            .table("workout_sets")
-            .select(
-                "id,exercise_id,set_no,weight_kg,reps,is_pr,"
-                "workouts!inner(id,profile_id,workout_date,day_name,notes),exercises(name)"
-            )
-            .eq("workouts.profile_id", profile_id)
-            .order("id")
-            .execute()
-            .data
-            or []
+@st.cache_resource
+def history_store() -> HistoryStore:
+    return HistoryStore()
+
+
+def supabase_pages(query: Callable[[], Any], after_id: int = 0, page_size: int = SUPABASE_PAGE_SIZE) -> Iterator[list[dict]]:
+    # Stop on an empty page, not a short one: a max-rows setting below page_size shortens every page.
+    last_id = after_id
+    while True:
+        rows = query().gt("id", last_id).order("id").limit(page_size).execute().data or []
+        if not rows:
+            return
+        yield rows
+        last_id = int(rows[-1]["id"])
+
+
+def typed_history(frame: pd.DataFrame) -> pd.DataFrame:
+    # Cast once at load time so the render path never has to re-cast whole columns.
+    typed = frame.astype(HISTORY_DTYPES)
+    typed["datum"] = pd.to_datetime(typed["datum"])
+    return typed
+
+
+def as_kg(value: Any) -> float:
+    # vikt_kg is float32, so round away the noise before a weight is shown or saved.
+    return round(float(value), 2)
+
+
+def _history_page_frame(rows: list[dict]) -> pd.DataFrame:
+    data = []
+    for row in rows:
+        workout = row.get("workouts") or {}
+        exercise = row.get("exercises") or {}
+        data.append(
+            {
+                "workout_id": workout.get("id"),
+                "set_id": row.get("id"),
+                "datum": workout.get("workout_date"),
+                "pass": workout.get("day_name"),
+                "anteckning": workout.get("notes") or "",
+                "ovning": exercise.get("name"),
+                "exercise_id": row.get("exercise_id"),
+                "set_nr": row.get("set_no"),
+                "vikt_kg": row.get("weight_kg"),
+                "reps": row.get("reps"),
+                "pb": row.get("is_pr"),
+            }
         )
-        data = []
-        for row in rows:
-            workout = row.get("workouts") or {}
-            exercise = row.get("exercises") or {}
-            data.append(
-                {
-                    "workout_id": workout.get("id"),
-                    "set_id": row.get("id"),
-                    "datum": workout.get("workout_date"),
-                    "pass": workout.get("day_name"),
-                    "anteckning": workout.get("notes") or "",
-                    "ovning": exercise.get("name"),
-                    "exercise_id": row.get("exercise_id"),
-                    "set_nr": row.get("set_no"),
-                    "vikt_kg": row.get("weight_kg"),
-                    "reps": row.get("reps"),
-                    "pb": row.get("is_pr"),
-                }
+    return pd.DataFrame(data, columns=HISTORY_COLUMNS)
+
+
+def _fetch_history_rows(profile_id: int, after_set_id: int = 0) -> pd.DataFrame:
+    if use_supabase():
+        def query() -> Any:
+            return (
+                supabase_client()
+                .table("workout_sets")
+                .select(
+                    "id,exercise_id,set_no,weight_kg,reps,is_pr,"
+                    "workouts!inner(id,profile_id,workout_date,day_name,notes),exercises(name)"
+                )
+                .eq("workouts.profile_id", profile_id)
             )
-        return pd.DataFrame(data, columns=columns)
+
+        # Each page is turned into a small frame right away, so the raw JSON never piles up.
+        frames = [_history_page_frame(rows) for rows in supabase_pages(query, after_set_id)]
+        if not frames:
+            return typed_history(pd.DataFrame(columns=HISTORY_COLUMNS))
+        return typed_history(pd.concat(frames, ignore_index=True))
 
     with db_connection() as conn:
-        return pd.read_sql_query(
+        frame = pd.read_sql_query(
             """
             SELECT w.id AS workout_id, ws.id AS set_id, w.workout_date AS datum,
                    w.day_name AS pass, w.notes AS anteckning, e.name AS ovning,
@@ -537,60 +1155,252 @@ def history_dataframe(profile_id: int) -> pd.DataFrame:
             FROM workout_sets ws
             JOIN workouts w ON w.id = ws.workout_id
             JOIN exercises e ON e.id = ws.exercise_id
-            WHERE w.profile_id = ?
+            WHERE w.profile_id = ? AND ws.id > ?
             ORDER BY w.workout_date, w.id, ws.id
             """,
             conn,
-            params=(profile_id,),
+            params=(profile_id, after_set_id),
+        )
+    return typed_history(frame)
+
+
+def _history_totals(profile_id: int) -> tuple[int, int]:
+    # Number of sets and highest set id in the database, to check a delta-refreshed snapshot against.
+    if use_supabase():
+        result = (
+            supabase_client()
+            .table("workout_sets")
+            .select("id,workouts!inner(profile_id)", count="exact")
+            .eq("workouts.profile_id", profile_id)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        )
+        rows = result.data or []
+        return int(result.count or 0), int(rows[0]["id"]) if rows else 0
+    with db_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT COUNT(*), COALESCE(MAX(ws.id), 0)
+            FROM workout_sets ws
+            JOIN workouts w ON w.id = ws.workout_id
+            WHERE w.profile_id = ?
+            """,
+            (profile_id,),
+        ).fetchone()
+    return int(row[0]), int(row[1])
+
+
+def _current_snapshot(store: HistoryStore, profile_id: int) -> HistorySnapshot:
+    # A refresh only fetches rows past the last seen set id, then checks the set count and max(id)
+    # against the database. A mismatch means sets were deleted, or committed out of id order, by
+    # someone else (app_v2, another replica), and the profile is loaded again in full. So is a
+    # snapshot older than HISTORY_FULL_RELOAD_SECONDS.
+    # The store lock guards reading and installing state only, never the fetch, so one slow profile
+    # load does not hold up every other profile's reads.
+    version = data_version(profile_id, "history")
+    with store.lock:
+        snapshot = store.snapshots.get(profile_id)
+        if snapshot is None:
+            snapshot = store.snapshots[profile_id] = HistorySnapshot(typed_history(pd.DataFrame(columns=HISTORY_COLUMNS)))
+        now = time.monotonic()
+        if snapshot.version == version and now - snapshot.refreshed_at < HISTORY_TTL_SECONDS:
+            return snapshot
+        full = snapshot.last_set_id == 0 or now - snapshot.loaded_at >= HISTORY_FULL_RELOAD_SECONDS
+        after_set_id = 0 if full else snapshot.last_set_id
+        known_sets = len(snapshot.frame)
+    delta = _fetch_history_rows(profile_id, after_set_id)
+    if not full:
+        expected = (known_sets + len(delta), int(delta["set_id"].max()) if not delta.empty else after_set_id)
+        if _history_totals(profile_id) != expected:
+            full = True
+            delta = _fetch_history_rows(profile_id, 0)
+    with store.lock:
+        if data_version(profile_id, "history") != version:
+            # Invalidated mid-fetch, e.g. by a deleted workout; the next read fetches again.
+            return snapshot
+        if full:
+            snapshot.frame = delta.sort_values(["datum", "workout_id", "set_id"], kind="stable", ignore_index=True)
+            snapshot.last_set_id = int(delta["set_id"].max()) if not delta.empty else 0
+            snapshot.loaded_at = time.monotonic()
+            snapshot.index = None
+        else:
+            # Another thread may have installed some of these rows while this one was fetching.
+            delta = delta[delta["set_id"] > snapshot.last_set_id]
+            if not delta.empty:
+                # Categories differ between the snapshot and the delta, so re-type after concatenating.
+                frame = delta if snapshot.frame.empty else typed_history(pd.concat([snapshot.frame, delta], ignore_index=True))
+                snapshot.frame = frame.sort_values(["datum", "workout_id", "set_id"], kind="stable", ignore_index=True)
+                snapshot.last_set_id = int(delta["set_id"].max())
+                snapshot.index = None
+        snapshot.refreshed_at = time.monotonic()
+        snapshot.version = version
+    return snapshot
+
+
+@timed
+def history_dataframe(profile_id: int) -> pd.DataFrame:
+    """The profile's sets, oldest first, as a shallow copy of the snapshot every session shares.
+
+    Treat it as read-only: adding or replacing columns only touches the copy, but anything that
+    writes into existing values should work on `.copy()` of it.
+    """
+    return _current_snapshot(history_store(), profile_id).frame.copy(deep=False)
+
+
+@timed
+def history_index(profile_id: int) -> HistoryIndex:
+    store = history_store()
+    snapshot = _current_snapshot(store, profile_id)
+    with store.lock:
+        frame, index = snapshot.frame, snapshot.index
+    if index is None:
+        index = build_history_index(frame)
+        with store.lock:
+            if snapshot.frame is frame:
+                snapshot.index = index
+    return index
+
+
+def build_history_index(history: pd.DataFrame) -> HistoryIndex:
+    ordered = history.sort_values(["datum", "workout_id", "set_nr"], kind="stable")
+    best_reps = ordered.groupby(["exercise_id", "vikt_kg"], observed=True)["reps"].max()
+    index: HistoryIndex = {}
+    for exercise_id, rows in ordered.groupby("exercise_id", sort=False, observed=True):
+        latest = rows[rows["workout_id"] == rows["workout_id"].iat[-1]]
+        by_weight: dict[float, int] = {}
+        for weight, reps in best_reps.loc[exercise_id].items():
+            # float32 weights that differ only in noise round to the same key; keep the better set.
+            key = as_kg(weight)
+            by_weight[key] = max(by_weight.get(key, 0), int(reps))
+        max_weight = max(by_weight)
+        index[int(exercise_id)] = ExerciseHistory(
+            sets=rows.reset_index(drop=True),
+            last_weight=as_kg(latest["vikt_kg"].iat[-1]),
+            last_reps=tuple(latest["reps"].tolist()),
+            max_weight=max_weight,
+            max_weight_reps=by_weight[max_weight],
         )
+    return index
 
 
-def best_for_exercise(name: str, history: pd.DataFrame) -> tuple[float, int] | None:
-    rows = history[history["ovning"] == name]
-    if rows.empty:
+@timed
+def personal_best_reps(profile_id: int, exercise_ids: list[int]) -> dict[tuple[int, float], int]:
+    if use_supabase():
+        try:
+            rows = (
+                supabase_client()
+                .table("personal_bests")
+                .select("exercise_id,weight_kg,max_reps")
+                .eq("profile_id", profile_id)
+                .in_("exercise_id", exercise_ids)
+                .execute()
+                .data
+                or []
+            )
+        except Exception as exc:
+            raise RuntimeError("Kunde inte läsa PB-tabellen. Databasen behöver v5-migreringen.") from exc
+    else:
+        placeholders = ",".join("?" * len(exercise_ids))
+        with db_connection() as conn:
+            rows = conn.execute(
+                f"SELECT exercise_id, weight_kg, max_reps FROM personal_bests WHERE profile_id = ? AND exercise_id IN ({placeholders})",
+                (profile_id, *exercise_ids),
+            ).fetchall()
+    return {(int(row["exercise_id"]), as_kg(row["weight_kg"])): int(row["max_reps"]) for row in rows}
+
+
+def forget_history_workout(profile_id: int, workout_id: int) -> None:
+    store = history_store()
+    with store.lock:
+        snapshot = store.snapshots.get(profile_id)
+        if snapshot is not None and not snapshot.frame.empty:
+            frame = snapshot.frame
+            snapshot.frame = frame[frame["workout_id"] != workout_id].reset_index(drop=True)
+            snapshot.index = None
+
+
+def best_for_exercise(exercise_id: int, index: HistoryIndex) -> tuple[float, int] | None:
+    entry = index.get(exercise_id)
+    if entry is None:
         return None
-    max_weight = float(rows["vikt_kg"].max())
-    max_reps = int(rows.loc[rows["vikt_kg"].astype(float) == max_weight, "reps"].max())
-    return max_weight, max_reps
+    return entry.max_weight, entry.max_weight_reps
+
+
+BARBELL_LOWER = ["knäböj", "frontböj", "marklyft", "raka marklyft"]
 
 
 def weight_step_for(name: str) -> float:
-    barbell_lower = ["knäböj", "frontböj", "marklyft", "raka marklyft"]
-    return 5.0 if any(term in name.lower() for term in barbell_lower) else 2.5
-
-
-def suggest_weight(exercise: ProgramExercise, history: pd.DataFrame) -> WeightSuggestion:
-    rows = history[history["exercise_id"].astype(str) == str(exercise.exercise_id)] if not history.empty else history
-    if rows.empty:
-        return WeightSuggestion(0.0, "Välj startvikt", "Första gången du loggar övningen.")
-
-    rows = rows.sort_values(["datum", "workout_id", "set_nr"])
-    latest_workout = rows.iloc[-1]["workout_id"]
-    latest = rows[rows["workout_id"] == latest_workout].sort_values("set_nr")
-    last_weight = float(latest.iloc[-1]["vikt_kg"])
-    reps = [int(value) for value in latest["reps"].tolist()]
-    step = weight_step_for(exercise.name)
-
-    if len(reps) < exercise.sets:
-        return WeightSuggestion(last_weight, f"Behåll {last_weight:g} kg", "Förra loggen hade färre set än programmet.")
-    if all(rep >= exercise.rep_max for rep in reps):
-        suggested = last_weight + step
-        return WeightSuggestion(suggested, f"Höj till {suggested:g} kg", "Alla set nådde övre repmålet senast.")
-    if all(rep < exercise.rep_min for rep in reps):
-        suggested = max(0.0, last_weight - step)
-        return WeightSuggestion(suggested, f"Sänk till {suggested:g} kg", "Alla set låg under repmålet senast.")
-    return WeightSuggestion(last_weight, f"Behåll {last_weight:g} kg", f"Senast: {', '.join(map(str, reps))} reps.")
-
-
-def _pr_flags(exercise_id: int, weight: float, reps: list[int], history: pd.DataFrame) -> list[bool]:
-    if history.empty:
-        running_best = 0
-    else:
-        previous = history[
-            (history["exercise_id"].astype(str) == str(exercise_id))
-            & (history["vikt_kg"].astype(float) == float(weight))
-        ]
-        running_best = int(previous["reps"].max()) if not previous.empty else 0
+    return 5.0 if any(term in name.lower() for term in BARBELL_LOWER) else 2.5
+
+
+SUGGESTION_TEXTS = {
+    "start": ("Välj startvikt", "Första gången du loggar övningen."),
+    "short": ("Behåll {weight:g} kg", "Förra loggen hade färre set än programmet."),
+    "raise": ("Höj till {weight:g} kg", "Alla set nådde övre repmålet senast."),
+    "lower": ("Sänk till {weight:g} kg", "Alla set låg under repmålet senast."),
+    "hold": ("Behåll {weight:g} kg", "Senast: {reps} reps."),
+}
+
+
+def suggest_weights(plan: list[ProgramExercise], history: pd.DataFrame) -> pd.DataFrame:
+    # The progression rules for a whole day in one pass, indexed by exercise_id. From each exercise's
+    # latest workout: no history -> start; fewer sets than planned -> keep the weight; every set at
+    # rep_max or above -> raise by the step; every set under rep_min -> lower by the step, not below 0;
+    # otherwise keep the weight.
+    exercises = list({exercise.exercise_id: exercise for exercise in plan}.values())
+    exercise_ids = pd.Index([exercise.exercise_id for exercise in exercises], dtype="int64")
+    sets = np.array([exercise.sets for exercise in exercises])
+    rep_min = np.array([exercise.rep_min for exercise in exercises])
+    rep_max = np.array([exercise.rep_max for exercise in exercises])
+    step = np.array([weight_step_for(exercise.name) for exercise in exercises])
+
+    rows = history[history["exercise_id"].isin(exercise_ids)]
+    slot = exercise_ids.get_indexer(rows["exercise_id"])
+    workout = rows["workout_id"].to_numpy()
+    # Chronological within each exercise, with the exercise as the primary key.
+    order = np.lexsort((rows["set_nr"].to_numpy(), workout, rows["datum"].to_numpy(), slot))
+    slot, workout = slot[order], workout[order]
+    group_sizes = np.bincount(slot, minlength=len(exercises))
+    group_sizes = group_sizes[group_sizes > 0]
+    latest = workout == np.repeat(workout[np.cumsum(group_sizes) - 1], group_sizes)
+    slot = slot[latest]
+    reps = rows["reps"].to_numpy()[order][latest]
+    weights = rows["vikt_kg"].to_numpy()[order][latest]
+
+    logged_sets = np.bincount(slot, minlength=len(exercises))
+    at_max = np.bincount(slot, weights=reps >= rep_max[slot], minlength=len(exercises)) == logged_sets
+    under_min = np.bincount(slot, weights=reps < rep_min[slot], minlength=len(exercises)) == logged_sets
+    last_weight = np.zeros(len(exercises))
+    last_weight[slot] = [as_kg(weight) for weight in weights]
+    last_reps = [()] * len(exercises)
+    for chunk_slot, chunk in zip(np.unique(slot), np.split(reps, np.flatnonzero(np.diff(slot)) + 1)):
+        last_reps[chunk_slot] = tuple(chunk.tolist())
+
+    seen = logged_sets > 0
+    short = seen & (logged_sets < sets)
+    raise_ = seen & ~short & at_max
+    lower = seen & ~short & ~raise_ & under_min
+    suggested = np.select([raise_, lower], [last_weight + step, np.maximum(0.0, last_weight - step)], last_weight)
+    actions = np.select([~seen, short, raise_, lower], ["start", "short", "raise", "lower"], "hold")
+
+    texts = [
+        tuple(text.format(weight=weight, reps=", ".join(map(str, reps))) for text in SUGGESTION_TEXTS[action])
+        for action, weight, reps in zip(actions, suggested.tolist(), last_reps)
+    ]
+    return pd.DataFrame(
+        {
+            "weight": suggested,
+            "reps": last_reps,
+            "label": [label for label, _ in texts],
+            "reason": [reason for _, reason in texts],
+        },
+        index=exercise_ids.rename("exercise_id"),
+    )
+
+
+def _pr_flags(exercise_id: int, weight: float, reps: list[int], bests: dict[tuple[int, float], int]) -> list[bool]:
+    running_best = bests.get((exercise_id, as_kg(weight)), 0)
     flags = []
     for rep in reps:
         flags.append(rep > running_best)
@@ -598,13 +1408,15 @@ def _pr_flags(exercise_id: int, weight: float, reps: list[int], history: pd.Data
     return flags
 
 
-def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str, logged: list[dict], history: pd.DataFrame) -> None:
+@timed(cached=False)
+def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str, logged: list[dict]) -> None:
     if not logged:
         raise ValueError("Markera minst en övning som klar.")
 
+    bests = personal_best_reps(profile_id, [item["exercise_id"] for item in logged])
     set_rows = []
     for item in logged:
-        flags = _pr_flags(item["exercise_id"], item["weight_kg"], item["reps"], history)
+        flags = _pr_flags(item["exercise_id"], item["weight_kg"], item["reps"], bests)
         for set_no, (reps, is_pr) in enumerate(zip(item["reps"], flags), start=1):
             set_rows.append(
                 {
@@ -632,7 +1444,7 @@ def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str,
             ).execute()
         except Exception as exc:
             raise RuntimeError("Kunde inte spara passet atomiskt. Databasen behöver v3-migreringen.") from exc
-        clear_data_cache()
+        invalidate_profile_data(profile_id, "overview", "history", "recent", "bests")
         return
 
     with db_connection() as conn:
@@ -653,94 +1465,102 @@ def save_workout(profile_id: int, day_name: str, workout_date: date, notes: str,
                 for row in set_rows
             ],
         )
-    clear_data_cache()
-
-
-def update_program_exercise(row_id: int, profile_id: int, sets: int, rep_min: int, rep_max: int, sort_order: int) -> None:
-    payload = {"sets": sets, "rep_min": rep_min, "rep_max": rep_max, "sort_order": sort_order}
+    invalidate_profile_data(profile_id, "overview", "history", "recent", "bests")
+
+
+@timed(cached=False)
+def update_program_exercises(profile_id: int, day_name: str, changes: list[dict]) -> None:
+    """Write every changed row of a day in one transaction: sort_order, sets, rep range and active flag."""
+    rows = [
+        {
+            "id": int(row["id"]),
+            "sort_order": int(row["sort_order"]),
+            "sets": int(row["sets"]),
+            "rep_min": int(row["rep_min"]),
+            "rep_max": int(row["rep_max"]),
+            "active": bool(row["active"]),
+        }
+        for row in changes
+    ]
+    if not rows:
+        return
+    if any(row["rep_max"] < row["rep_min"] for row in rows):
+        raise ValueError("Rep max måste vara minst lika högt som rep min.")
     if use_supabase():
-        supabase_client().table("program_exercises").update(payload).eq("id", row_id).eq("profile_id", profile_id).execute()
+        try:
+            supabase_client().rpc(
+                "update_program_exercises_bulk",
+                {"p_profile_id": profile_id, "p_day_name": day_name, "p_rows": rows},
+            ).execute()
+        except Exception as exc:
+            raise RuntimeError("Kunde inte spara programmet. Databasen behöver v8-migreringen.") from exc
     else:
         with db_connection() as conn:
-            conn.execute(
-                "UPDATE program_exercises SET sets=?, rep_min=?, rep_max=?, sort_order=? WHERE id=? AND profile_id=?",
-                (sets, rep_min, rep_max, sort_order, row_id, profile_id),
+            conn.executemany(
+                """
+                UPDATE program_exercises SET sort_order=?, sets=?, rep_min=?, rep_max=?, active=?
+                WHERE id=? AND profile_id=? AND day_name=?
+                """,
+                [
+                    (row["sort_order"], row["sets"], row["rep_min"], row["rep_max"], int(row["active"]), row["id"], profile_id, day_name)
+                    for row in rows
+                ],
             )
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "program")
 
 
+@timed(cached=False)
 def add_program_exercise(profile_id: int, day_name: str, name: str, sets: int, rep_min: int, rep_max: int) -> None:
     clean_name = " ".join(name.strip().split())
     if not clean_name:
         raise ValueError("Skriv ett övningsnamn först.")
     if rep_max < rep_min:
         raise ValueError("Rep max måste vara minst lika högt som rep min.")
-    exercise_id = _ensure_exercise(clean_name)
 
+    # Exercise lookup, next sort_order and the upsert happen in one round trip, so they cannot race an edit.
+    # A re-added exercise is reactivated and moved to the end of the day on both backends.
     if use_supabase():
-        sb = supabase_client()
-        existing = (
-            sb.table("program_exercises")
-            .select("id")
-            .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
-            .eq("exercise_id", exercise_id)
-            .limit(1)
-            .execute().data or []
-        )
-        orders = (
-            sb.table("program_exercises")
-            .select("sort_order")
-            .eq("profile_id", profile_id)
-            .eq("day_name", day_name)
-            .order("sort_order", desc=True)
-            .limit(1)
-            .execute().data or []
-        )
-        order = int(orders[0]["sort_order"]) + 1 if orders else 1
-        payload = {
-            "profile_id": profile_id,
-            "day_name": day_name,
-            "exercise_id": exercise_id,
-            "sort_order": order,
-            "sets": sets,
-            "rep_min": rep_min,
-            "rep_max": rep_max,
-            "active": True,
-        }
-        if existing:
-            sb.table("program_exercises").update(payload).eq("id", existing[0]["id"]).execute()
-        else:
-            sb.table("program_exercises").insert(payload).execute()
+        try:
+            supabase_client().rpc(
+                "add_program_exercise_atomic",
+                {
+                    "p_profile_id": profile_id,
+                    "p_day_name": day_name,
+                    "p_exercise_name": clean_name,
+                    "p_sets": sets,
+                    "p_rep_min": rep_min,
+                    "p_rep_max": rep_max,
+                },
+            ).execute()
+        except Exception as exc:
+            raise RuntimeError("Kunde inte lägga till övningen. Databasen behöver v7-migreringen.") from exc
     else:
         with db_connection() as conn:
-            order = int(conn.execute(
-                "SELECT COALESCE(MAX(sort_order),0)+1 FROM program_exercises WHERE profile_id=? AND day_name=?",
-                (profile_id, day_name),
-            ).fetchone()[0])
+            conn.execute("INSERT OR IGNORE INTO exercises(name) VALUES (?)", (clean_name,))
             conn.execute(
                 """
                 INSERT INTO program_exercises(profile_id,day_name,exercise_id,sort_order,sets,rep_min,rep_max,active)
-                VALUES (?,?,?,?,?,?,?,1)
+                SELECT ?, ?, e.id,
+                       (SELECT COALESCE(MAX(sort_order),0)+1 FROM program_exercises WHERE profile_id=? AND day_name=?),
+                       ?, ?, ?, 1
+                FROM exercises e
+                WHERE e.name=?
                 ON CONFLICT(profile_id,day_name,exercise_id) DO UPDATE SET
-                    active=1, sets=excluded.sets, rep_min=excluded.rep_min, rep_max=excluded.rep_max
+                    active=1, sort_order=excluded.sort_order,
+                    sets=excluded.sets, rep_min=excluded.rep_min, rep_max=excluded.rep_max
                 """,
-                (profile_id, day_name, exercise_id, order, sets, rep_min, rep_max),
+                (profile_id, day_name, profile_id, day_name, sets, rep_min, rep_max, clean_name),
             )
-    clear_data_cache()
+    invalidate_profile_data(profile_id, "program")
 
 
-def deactivate_program_exercise(row_id: int, profile_id: int) -> None:
-    if use_supabase():
-        supabase_client().table("program_exercises").update({"active": False}).eq("id", row_id).eq("profile_id", profile_id).execute()
-    else:
-        with db_connection() as conn:
-            conn.execute("UPDATE program_exercises SET active=0 WHERE id=? AND profile_id=?", (row_id, profile_id))
-    clear_data_cache()
+@timed
+def recent_workouts(profile_id: int, limit: int = HISTORY_PAGE_SIZE, offset: int = 0) -> list[dict]:
+    return _recent_workouts(profile_id, limit, offset, data_version(profile_id, "recent"))
 
 
 @st.cache_data(ttl=30, show_spinner=False)
-def recent_workouts(profile_id: int, limit: int = 20) -> list[dict]:
+def _recent_workouts(profile_id: int, limit: int, offset: int, version: int) -> list[dict]:
     if use_supabase():
         return (
             supabase_client().table("workouts")
@@ -748,52 +1568,92 @@ def recent_workouts(profile_id: int, limit: int = 20) -> list[dict]:
             .eq("profile_id", profile_id)
             .order("workout_date", desc=True)
             .order("id", desc=True)
-            .limit(limit)
+            .range(offset, offset + limit - 1)
             .execute().data or []
         )
+    # One query for the page and all of its sets; the LEFT JOIN keeps workouts without sets.
     with db_connection() as conn:
-        workouts = [dict(row) for row in conn.execute(
-            "SELECT id,workout_date,day_name,notes FROM workouts WHERE profile_id=? ORDER BY workout_date DESC,id DESC LIMIT ?",
-            (profile_id, limit),
-        ).fetchall()]
-        for workout in workouts:
-            workout["workout_sets"] = [dict(row) for row in conn.execute(
-                """
-                SELECT ws.id,ws.set_no,ws.reps,ws.weight_kg,ws.is_pr,e.name
-                FROM workout_sets ws JOIN exercises e ON e.id=ws.exercise_id
-                WHERE ws.workout_id=? ORDER BY ws.id
-                """,
-                (workout["id"],),
-            ).fetchall()]
-    return workouts
+        rows = conn.execute(
+            """
+            WITH page AS (
+                SELECT id, workout_date, day_name, notes FROM workouts
+                WHERE profile_id=? ORDER BY workout_date DESC, id DESC LIMIT ? OFFSET ?
+            )
+            SELECT p.id AS workout_id, p.workout_date, p.day_name, p.notes,
+                   ws.id, ws.set_no, ws.reps, ws.weight_kg, ws.is_pr, e.name
+            FROM page p
+            LEFT JOIN workout_sets ws ON ws.workout_id=p.id
+            LEFT JOIN exercises e ON e.id=ws.exercise_id
+            ORDER BY p.workout_date DESC, p.id DESC, ws.id
+            """,
+            (profile_id, limit, offset),
+        ).fetchall()
+    workouts: dict[int, dict] = {}
+    for row in rows:
+        workout = workouts.setdefault(
+            row["workout_id"],
+            {
+                "id": row["workout_id"],
+                "workout_date": row["workout_date"],
+                "day_name": row["day_name"],
+                "notes": row["notes"],
+                "workout_sets": [],
+            },
+        )
+        if row["id"] is not None:
+            workout["workout_sets"].append(
+                {key: row[key] for key in ("id", "set_no", "reps", "weight_kg", "is_pr", "name")}
+            )
+    return list(workouts.values())
 
 
+@timed(cached=False)
 def delete_workout(workout_id: int, profile_id: int) -> None:
     if use_supabase():
         supabase_client().table("workouts").delete().eq("id", workout_id).eq("profile_id", profile_id).execute()
     else:
         with db_connection() as conn:
             conn.execute("DELETE FROM workouts WHERE id=? AND profile_id=?", (workout_id, profile_id))
-    clear_data_cache()
+    forget_history_workout(profile_id, workout_id)
+    # Bumping "history" too makes a delta fetch already in flight drop its result, which may
+    # still hold the deleted sets.
+    invalidate_profile_data(profile_id, "history", "overview", "recent", "bests")
 
 
-def pb_summary_dataframe(history: pd.DataFrame) -> pd.DataFrame:
-    if history.empty:
-        return history
-    df = history.copy()
-    df["volym"] = df["vikt_kg"].astype(float) * df["reps"].astype(int)
-    df["est_1rm"] = df["vikt_kg"].astype(float) * (1 + df["reps"].astype(int) / 30)
-    summary = (
-        df.groupby("ovning", as_index=False)
-        .agg(
-            tyngsta_vikt=("vikt_kg", "max"),
-            basta_reps=("reps", "max"),
-            basta_est_1rm=("est_1rm", "max"),
-            total_volym=("volym", "sum"),
-            antal_set=("set_nr", "count"),
-        )
-        .sort_values(["basta_est_1rm", "tyngsta_vikt"], ascending=False)
-    )
+@timed
+def pb_summary_dataframe(profile_id: int) -> pd.DataFrame:
+    return _pb_summary_dataframe(profile_id, data_version(profile_id, "bests"))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _pb_summary_dataframe(profile_id: int, version: int) -> pd.DataFrame:
+    # One row per exercise, aggregated by the database from personal_bests.
+    columns = ["ovning", "tyngsta_vikt", "basta_reps", "basta_est_1rm", "total_volym", "antal_set"]
+    if use_supabase():
+        try:
+            rows = supabase_client().rpc("pb_summary", {"p_profile_id": profile_id}).execute().data or []
+        except Exception as exc:
+            raise RuntimeError("Kunde inte läsa PB-sammanställningen. Databasen behöver v6-migreringen.") from exc
+        summary = pd.DataFrame(rows, columns=columns)
+    else:
+        with db_connection() as conn:
+            summary = pd.read_sql_query(
+                """
+                SELECT e.name AS ovning, MAX(pb.weight_kg) AS tyngsta_vikt, MAX(pb.max_reps) AS basta_reps,
+                       MAX(pb.best_e1rm) AS basta_est_1rm, SUM(pb.total_volume) AS total_volym,
+                       SUM(pb.set_count) AS antal_set
+                FROM personal_bests pb
+                JOIN exercises e ON e.id = pb.exercise_id
+                WHERE pb.profile_id = ?
+                GROUP BY e.name
+                ORDER BY basta_est_1rm DESC, tyngsta_vikt DESC, ovning
+                """,
+                conn,
+                params=(profile_id,),
+            )
+    if summary.empty:
+        return summary
+    summary = summary.astype({"tyngsta_vikt": float, "basta_reps": int, "basta_est_1rm": float, "total_volym": float, "antal_set": int})
     summary["basta_est_1rm"] = summary["basta_est_1rm"].round(1)
     summary["total_volym"] = summary["total_volym"].round(0).astype(int)
     return summary
@@ -805,8 +1665,8 @@ def trend_dataframe(exercise_name: str, history: pd.DataFrame) -> pd.DataFrame:
     df = history[history["ovning"] == exercise_name].copy()
     if df.empty:
         return df
-    df["est_1rm"] = df["vikt_kg"].astype(float) * (1 + df["reps"].astype(int) / 30)
-    df["volym"] = df["vikt_kg"].astype(float) * df["reps"].astype(int)
+    df["est_1rm"] = df["vikt_kg"] * (1 + df["reps"] / 30)
+    df["volym"] = df["vikt_kg"] * df["reps"]
     return (
         df.groupby("datum", as_index=False)
         .agg(est_1rm=("est_1rm", "max"), volym=("volym", "sum"), toppvikt=("vikt_kg", "max"))
@@ -814,6 +1674,79 @@ def trend_dataframe(exercise_name: str, history: pd.DataFrame) -> pd.DataFrame:
     )
 
 
+@st.cache_resource
+def page_load_slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(PAGE_LOAD_WORKERS)
+
+
+def _start_page_load(ctx: Any, timings: RerunTimings | None, fn: Callable[..., Any], *args: Any) -> Future:
+    # Cached readers look up the current session, so each read runs on a short-lived thread that gets
+    # the script run context before it starts, through the public add_script_run_ctx. Nothing is left
+    # attached to a thread that outlives the rerun; page_load_slots bounds how many reads run at once.
+    slots = page_load_slots()
+    future: Future = Future()
+
+    def run() -> None:
+        _call_state.recorder = timings
+        with slots:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    thread = threading.Thread(target=run, name="page-load", daemon=True)
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    thread.start()
+    return future
+
+
+def load_page_data(profile_id: int | None, view: str) -> list[Profile]:
+    """Warm every independent read the page needs at the same time and return the profiles.
+
+    The readers are the usual cached functions, so main() and the views pick the results up from
+    the cache afterwards. Errors are left for those calls to raise and handle as before.
+    """
+    ctx = get_script_run_ctx()
+    timings = getattr(_call_state, "recorder", None)
+
+    def warm(pid: int) -> list[Future]:
+        readers: list[Callable[[int], Any]] = [profile_overview]
+        if view == VIEWS[0]:
+            readers += [program_by_day, history_index]
+        return [_start_page_load(ctx, timings, reader, pid) for reader in readers]
+
+    # The profile from the last run is almost always still valid, so it need not wait for list_profiles.
+    pending = warm(profile_id) if profile_id is not None else []
+    profiles = _start_page_load(ctx, timings, list_profiles).result()
+    if profile_id is None and profiles:
+        pending = warm(profiles[0].id)
+    wait(pending)
+    return profiles
+
+
+def render_timings(timings: RerunTimings) -> None:
+    calls = pd.DataFrame([asdict(call) for call in timings.calls], columns=[name for name in CallTiming.__dataclass_fields__])
+    total = (time.perf_counter() - timings.started_at) * 1000
+    with st.sidebar.expander("Tidsmätning", expanded=False):
+        queries = int(calls.loc[calls["depth"] == 0, "queries"].sum())
+        st.caption(
+            f"Körning {timings.rerun} · {total:.0f} ms totalt · {len(calls)} anrop · "
+            f"{int((calls['cache'] == 'miss').sum())} cachemissar · {queries} frågor"
+        )
+        calls["function"] = [("  " * depth) + name for name, depth in zip(calls["function"], calls["depth"])]
+        calls["rows"] = calls["rows"].astype("Int64")
+        st.dataframe(
+            calls[["function", "ms", "cache", "backend", "rows", "queries", "thread"]].rename(
+                columns={"function": "Funktion", "cache": "Cache", "backend": "Backend", "rows": "Rader", "queries": "Frågor", "thread": "Tråd"}
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if timings.log_path is not None:
+            st.caption(f"Loggas även till {timings.log_path}")
+
+
 def page_styles() -> None:
     st.markdown(
         """
@@ -881,17 +1814,18 @@ def render_today(profile: Profile) -> None:
     selected_day = st.selectbox("Pass", DAY_NAMES, index=DAY_NAMES.index(st.session_state.get(key, default_day)), key=key)
     workout_date = st.date_input("Datum", value=date.today(), key=f"date_{profile.id}")
     plan = list_program(profile.id, selected_day)
-    history = history_dataframe(profile.id)
+    index = history_index(profile.id)
     if not plan:
         st.info("Det finns inga övningar i det här passet.")
         return
+    suggestions = suggest_weights(plan, history_dataframe(profile.id))
 
     logged: list[dict] = []
     with st.form(f"log_workout_{profile.id}_{selected_day}"):
         notes = st.text_area("Anteckning", placeholder="Valfritt, t.ex. sömn, energi eller skada.")
         for exercise in plan:
-            pb = best_for_exercise(exercise.name, history)
-            suggestion = suggest_weight(exercise, history)
+            pb = best_for_exercise(exercise.exercise_id, index)
+            suggestion = suggestions.loc[exercise.exercise_id]
             with st.container(border=True):
                 hint = f"{exercise.sets} set · {exercise.rep_min}-{exercise.rep_max} reps"
                 if pb:
@@ -917,7 +1851,7 @@ def render_today(profile: Profile) -> None:
 
     if submitted:
         try:
-            save_workout(profile.id, selected_day, workout_date, notes, logged, history)
+            save_workout(profile.id, selected_day, workout_date, notes, logged)
         except Exception as exc:
             st.error(str(exc))
         else:
@@ -929,26 +1863,47 @@ def render_today(profile: Profile) -> None:
 def render_program(profile: Profile) -> None:
     selected_day = st.selectbox("Välj pass att redigera", DAY_NAMES, key=f"program_day_{profile.id}")
     rows = list_program(profile.id, selected_day)
-    for row in rows:
-        with st.expander(f"{row.sort_order}. {row.name} · {row.sets} set · {row.rep_min}-{row.rep_max} reps"):
-            with st.form(f"edit_program_{profile.id}_{row.id}"):
-                order = st.number_input("Ordning", 1, 50, int(row.sort_order), key=f"sort_{profile.id}_{row.id}")
-                sets = st.number_input("Set", 1, 10, int(row.sets), key=f"sets_{profile.id}_{row.id}")
-                rep_min = st.number_input("Rep min", 1, 50, int(row.rep_min), key=f"min_{profile.id}_{row.id}")
-                rep_max = st.number_input("Rep max", 1, 50, int(row.rep_max), key=f"max_{profile.id}_{row.id}")
-                save_col, remove_col = st.columns(2)
-                with save_col:
-                    save = st.form_submit_button("Spara", use_container_width=True, type="primary")
-                with remove_col:
-                    remove = st.form_submit_button("Ta bort", use_container_width=True)
-            if save:
-                if rep_max < rep_min:
-                    st.error("Rep max måste vara minst lika högt som rep min.")
-                else:
-                    update_program_exercise(row.id, profile.id, int(sets), int(rep_min), int(rep_max), int(order))
-                    st.rerun()
-            if remove:
-                deactivate_program_exercise(row.id, profile.id)
+    if rows:
+        grid = pd.DataFrame(
+            [
+                {
+                    "id": row.id,
+                    "sort_order": row.sort_order,
+                    "name": row.name,
+                    "sets": row.sets,
+                    "rep_min": row.rep_min,
+                    "rep_max": row.rep_max,
+                    "active": True,
+                }
+                for row in rows
+            ]
+        ).set_index("id")
+        # The whole day is edited in one form, so restructuring it costs one write and one rerun.
+        with st.form(f"edit_program_{profile.id}_{selected_day}"):
+            edited = st.data_editor(
+                grid,
+                key=f"program_grid_{profile.id}_{selected_day}",
+                hide_index=True,
+                use_container_width=True,
+                disabled=["name"],
+                column_order=["sort_order", "name", "sets", "rep_min", "rep_max", "active"],
+                column_config={
+                    "sort_order": st.column_config.NumberColumn("Ordning", min_value=1, max_value=50, step=1, required=True),
+                    "name": st.column_config.TextColumn("Övning"),
+                    "sets": st.column_config.NumberColumn("Set", min_value=1, max_value=10, step=1, required=True),
+                    "rep_min": st.column_config.NumberColumn("Rep min", min_value=1, max_value=50, step=1, required=True),
+                    "rep_max": st.column_config.NumberColumn("Rep max", min_value=1, max_value=50, step=1, required=True),
+                    "active": st.column_config.CheckboxColumn("Aktiv", help="Avmarkera för att ta bort övningen från passet."),
+                },
+            )
+            save = st.form_submit_button("Spara alla", use_container_width=True, type="primary")
+        if save:
+            changed = edited[(edited != grid).any(axis=1)].drop(columns="name")
+            try:
+                update_program_exercises(profile.id, selected_day, changed.reset_index().to_dict("records"))
+            except Exception as exc:
+                st.error(str(exc))
+            else:
                 st.rerun()
 
     st.subheader("Lägg till övning")
@@ -972,7 +1927,11 @@ def render_program(profile: Profile) -> None:
 
 
 def render_personal_bests(profile: Profile) -> None:
-    summary = pb_summary_dataframe(history_dataframe(profile.id))
+    try:
+        summary = pb_summary_dataframe(profile.id)
+    except RuntimeError as exc:
+        st.error(str(exc))
+        return
     if summary.empty:
         st.info("Spara några pass först, så bygger appen en PB-sida åt profilen.")
         return
@@ -990,7 +1949,11 @@ def render_personal_bests(profile: Profile) -> None:
 
 def render_charts(profile: Profile) -> None:
     history = history_dataframe(profile.id)
-    summary = pb_summary_dataframe(history)
+    try:
+        summary = pb_summary_dataframe(profile.id)
+    except RuntimeError as exc:
+        st.error(str(exc))
+        return
     if summary.empty:
         st.info("När profilen har sparat pass syns utvecklingen här.")
         return
@@ -1002,10 +1965,23 @@ def render_charts(profile: Profile) -> None:
 
 
 def render_history(profile: Profile) -> None:
-    workouts = recent_workouts(profile.id)
-    if not workouts:
+    page_key = f"history_page_{profile.id}"
+    page = st.session_state.get(page_key, 0)
+    # One extra row tells whether an older page exists without a separate count query.
+    workouts = recent_workouts(profile.id, HISTORY_PAGE_SIZE + 1, page * HISTORY_PAGE_SIZE)
+    has_older = len(workouts) > HISTORY_PAGE_SIZE
+    workouts = workouts[:HISTORY_PAGE_SIZE]
+    if not workouts and page == 0:
         st.info("Ingen historik ännu.")
         return
+    if page or has_older:
+        newer_col, older_col = st.columns(2)
+        if newer_col.button("Nyare pass", key=f"history_newer_{profile.id}", disabled=page == 0, use_container_width=True):
+            st.session_state[page_key] = page - 1
+            st.rerun()
+        if older_col.button("Äldre pass", key=f"history_older_{profile.id}", disabled=not has_older, use_container_width=True):
+            st.session_state[page_key] = page + 1
+            st.rerun()
     for workout in workouts:
         with st.expander(f"{workout['workout_date']} · {workout['day_name']}"):
             if workout.get("notes"):
@@ -1023,10 +1999,19 @@ def render_history(profile: Profile) -> None:
 
 
 def render_profiles(active_profile: Profile) -> None:
-    for profile in list_profiles():
-        count, _ = profile_overview(profile.id)
+    profiles = list_profiles()
+    try:
+        overviews = profile_overviews([profile.id for profile in profiles])
+    except RuntimeError as exc:
+        st.error(str(exc))
+        overviews = {}
+    for profile in profiles:
+        # Without the overviews (the error is shown above) the profiles are still listed by name.
+        overview = overviews.get(profile.id)
+        count = f" · {overview.workouts} pass" if overview else ""
+        last = f" · senast {overview.last_date}" if overview and overview.last_date else ""
         marker = " · aktiv" if profile.id == active_profile.id else ""
-        st.write(f"**{profile.name}** · {count} pass{marker}")
+        st.write(f"**{profile.name}**{count}{last}{marker}")
     st.subheader("Ny profil")
     with st.form("create_profile"):
         name = st.text_input("Namn", placeholder="T.ex. Erik")
@@ -1047,19 +2032,20 @@ def render_export(profile: Profile) -> None:
     if df.empty:
         st.info("Det finns inget att exportera ännu.")
         return
-    visible = df[["datum","pass","ovning","set_nr","vikt_kg","reps","pb"]]
+    visible = df[["datum","pass","ovning","set_nr","vikt_kg","reps","pb"]].assign(datum=df["datum"].dt.strftime("%Y-%m-%d"))
     st.dataframe(visible, use_container_width=True, hide_index=True)
     st.download_button("Ladda ner CSV", data=visible.to_csv(index=False).encode("utf-8"), file_name=f"lyftlogg-{profile.name.lower()}.csv", mime="text/csv", use_container_width=True)
 
 
 def main() -> None:
     st.set_page_config(page_title="Lyftlogg", page_icon="🏋️", layout="centered")
+    timings = start_rerun_timings()
     page_styles()
     require_pin_if_configured()
     init_db()
 
     try:
-        profiles = list_profiles()
+        profiles = load_page_data(st.session_state.get("profile_id"), st.session_state.get("active_view", VIEWS[0]))
     except Exception:
         st.error("Databasen behöver uppgraderas till Lyftlogg v3 innan appen kan starta.")
         st.caption("Kör filen supabase_migration_profiles_v3.sql i Supabase SQL Editor.")
@@ -1112,6 +2098,12 @@ def main() -> None:
 
     if use_supabase() and not uses_server_key():
         st.caption("Säkerhetsuppgradering väntar: lägg till service_role_key i Streamlit Secrets.")
+        if st.button("Läs in Secrets igen", key="reload_storage_backend"):
+            reload_storage_backend()
+            st.rerun()
+
+    if timings is not None:
+        render_timings(timings)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,4 @@
+"""Benchmarks for the Lyftlogg data paths.
+
+    python -m benchmarks.run --help
+"""
@@ -0,0 +1,109 @@
+"""Time the batch progression engine for a whole day against one call per exercise.
+
+Run from the repository root:
+
+    python benchmarks/bench_progression.py --workouts 400 --repeat 20
+
+That both give the same suggestions is checked by tests/test_progression.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app_v3  # noqa: E402
+
+
+def synthetic_plan(exercises: int) -> list[app_v3.ProgramExercise]:
+    names = ["Knäböj", "Bänkpress", "Marklyft", "Rodd", "Militärpress", "Frontböj", "Chins", "Dips"]
+    return [
+        app_v3.ProgramExercise(
+            id=index + 1,
+            exercise_id=index + 1,
+            name=f"{names[index % len(names)]} {index}",
+            day_name="Pass 1",
+            sort_order=index,
+            sets=3 + index % 2,
+            rep_min=6 + index % 3,
+            rep_max=10 + index % 3,
+        )
+        for index in range(exercises)
+    ]
+
+
+def synthetic_history(plan: list[app_v3.ProgramExercise], workouts: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    set_id = 0
+    for workout_id in range(1, workouts + 1):
+        day = start + timedelta(days=int(workout_id * 2))
+        # Leave the last exercise without history so the start-weight branch is covered.
+        for exercise in plan[:-1]:
+            if rng.random() < 0.3:
+                continue
+            weight = float(rng.integers(8, 200)) * 2.5 / 2
+            for set_no in range(1, exercise.sets + 1 - int(rng.random() < 0.1)):
+                set_id += 1
+                rows.append(
+                    {
+                        "workout_id": workout_id,
+                        "set_id": set_id,
+                        "datum": day.isoformat(),
+                        "pass": "Pass 1",
+                        "anteckning": "",
+                        "ovning": exercise.name,
+                        "exercise_id": exercise.exercise_id,
+                        "set_nr": set_no,
+                        "vikt_kg": weight,
+                        "reps": int(rng.integers(exercise.rep_min - 2, exercise.rep_max + 2)),
+                        "pb": False,
+                    }
+                )
+    return app_v3.typed_history(pd.DataFrame(rows, columns=app_v3.HISTORY_COLUMNS))
+
+
+def per_exercise(plan: list[app_v3.ProgramExercise], history: pd.DataFrame) -> list[pd.DataFrame]:
+    return [app_v3.suggest_weights([exercise], history) for exercise in plan]
+
+
+def batch(plan: list[app_v3.ProgramExercise], history: pd.DataFrame) -> pd.DataFrame:
+    return app_v3.suggest_weights(plan, history)
+
+
+def best_of(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exercises", type=int, default=8)
+    parser.add_argument("--workouts", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    plan = synthetic_plan(args.exercises)
+    history = synthetic_history(plan, args.workouts)
+    per_exercise_s = best_of(lambda: per_exercise(plan, history), args.repeat)
+    batch_s = best_of(lambda: batch(plan, history), args.repeat)
+    print(f"{len(history)} sets, {len(plan)} exercises")
+    print(f"per exercise  {per_exercise_s * 1000:8.2f} ms")
+    print(f"batch         {batch_s * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
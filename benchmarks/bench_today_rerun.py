@@ -0,0 +1,147 @@
+"""Time a rep change on app_v2's Idag screen: full script rerun vs. one exercise-card fragment.
+
+Run from the repository root:
+
+    python benchmarks/bench_today_rerun.py --workouts 300 --repeat 10
+
+The app is copied into a temporary directory so its gymapp.db is a throwaway
+database filled with synthetic history. Both numbers come from the same AppTest session
+of the real app: first ordinary reruns, then reruns of the fragment that holds the card
+whose reps input was changed, the way Streamlit handles a widget inside ``st.fragment``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import streamlit.testing.v1.app_test as app_test_module
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def prepare(workdir: Path, workouts: int) -> Path:
+    shutil.copy(ROOT / "app_v2.py", workdir / "app_v2.py")
+    if (ROOT / "assets").exists():
+        shutil.copytree(ROOT / "assets", workdir / "assets")
+    app = AppTest.from_file(str(workdir / "app_v2.py"), default_timeout=60)
+    app.run()
+
+    rng = random.Random(7)
+    conn = sqlite3.connect(workdir / "gymapp.db")
+    plan = conn.execute(
+        "SELECT day_name, exercise_id, sets, rep_min, rep_max FROM program_exercises WHERE profile_id = 1 AND active = 1"
+    ).fetchall()
+    start = date(2024, 1, 1)
+    for number in range(workouts):
+        day_name = f"Pass {number % 4 + 1}"
+        workout_id = conn.execute(
+            "INSERT INTO workouts(profile_id, workout_date, day_name, notes, created_at) VALUES (1, ?, ?, '', ?)",
+            ((start + timedelta(days=number * 2)).isoformat(), day_name, start.isoformat()),
+        ).lastrowid
+        for plan_day, exercise_id, sets, rep_min, rep_max in plan:
+            if plan_day != day_name:
+                continue
+            weight = rng.randrange(8, 160) * 2.5 / 2
+            conn.executemany(
+                "INSERT INTO workout_sets(workout_id, exercise_id, set_no, reps, weight_kg) VALUES (?, ?, ?, ?, ?)",
+                [(workout_id, exercise_id, set_no, rng.randint(rep_min - 2, rep_max + 1), weight) for set_no in range(1, sets + 1)],
+            )
+    conn.commit()
+    conn.close()
+    return workdir / "app_v2.py"
+
+
+class FragmentRunner(LocalScriptRunner):
+    """Script runner that turns AppTest's next run into a rerun of one fragment.
+
+    This is what the browser asks for when a widget inside an ``st.fragment`` changes.
+    AppTest itself only does full runs, so the fragment id is swapped into the request.
+    AppTest also builds a new script cache per run and would recompile the app every
+    time; a server keeps one, so every runner here shares a single cache.
+    """
+
+    fragment_id: str | None = None
+    last: FragmentRunner | None = None
+    script_cache = ScriptCache()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._script_cache = FragmentRunner.script_cache
+
+    def request_rerun(self, rerun_data: RerunData) -> bool:
+        FragmentRunner.last = self
+        if FragmentRunner.fragment_id:
+            rerun_data = replace(rerun_data, fragment_id_queue=[FragmentRunner.fragment_id])
+            # The runner was created with a pending full rerun, which would swallow the fragment.
+            self._requests = ScriptRequests()
+        return super().request_rerun(rerun_data)
+
+
+def card_fragment_id(key: str) -> str:
+    """Return the id of the fragment that rendered the widget with ``key`` in the last run."""
+    for msg in FragmentRunner.last.forward_msgs():
+        if msg.HasField("delta") and msg.delta.HasField("new_element"):
+            element = msg.delta.new_element
+            if element.WhichOneof("type") == "number_input" and element.number_input.id.endswith(key):
+                if not msg.delta.fragment_id:
+                    raise RuntimeError(f"{key} is not rendered inside a fragment")
+                return msg.delta.fragment_id
+    raise RuntimeError(f"No number input {key} in the last run")
+
+
+def time_reruns(app: AppTest, key: str, repeat: int) -> list[float]:
+    timings = []
+    for attempt in range(repeat):
+        app.number_input(key=key).set_value(5 + attempt % 5)
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workouts", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = prepare(Path(tmp), args.workouts)
+        app_test_module.LocalScriptRunner = FragmentRunner
+        try:
+            app = AppTest.from_file(str(script), default_timeout=60)
+            app.run()
+            key = next(widget.key for widget in app.number_input if widget.key and widget.key.startswith("reps_"))
+            full_timings = time_reruns(app, key, args.repeat)
+            FragmentRunner.fragment_id = card_fragment_id(key)
+            card_timings = time_reruns(app, key, args.repeat)
+            rendered = len(app.number_input)
+        finally:
+            app_test_module.LocalScriptRunner = LocalScriptRunner
+
+    print(f"{args.workouts} workouts, median of {args.repeat} rep changes")
+    print(f"full script rerun  {statistics.median(full_timings) * 1000:8.1f} ms")
+    print(f"card fragment      {statistics.median(card_timings) * 1000:8.1f} ms  ({rendered} inputs rerendered)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
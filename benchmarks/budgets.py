@@ -0,0 +1,168 @@
+"""Check app_v3's query budgets on synthetic data, on SQLite and on the Supabase stand-in.
+
+Run from the repository root:
+
+    python -m benchmarks.budgets
+
+CI runs the same checks through pytest (tests/test_query_budgets.py).
+
+Every check runs its call inside app_v3.query_budget, which counts the SQLite statements
+and Supabase requests that the call issues. The process exits with status 1 when a call
+goes over its budget or repeats a statement more often than max_repeats, so an N+1 loop
+fails the build instead of reaching production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable
+
+import app_v3
+from benchmarks.run import BACKENDS, Fixture, backend, build_fixture, prepared_database
+from benchmarks.synthetic import SyntheticData, SyntheticSpec
+
+@dataclass(frozen=True)
+class Budget:
+    sqlite: int
+    supabase: int
+    max_repeats: int | None = 1
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str
+    # Does any setup and returns the call that is measured.
+    prepare: Callable[[Fixture, SyntheticData], Callable[[], Any]]
+    budget: Callable[[Fixture, SyntheticData], Budget]
+
+
+def _cold_history(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    app_v3.history_store().snapshots.pop(fixture.profile_id, None)
+    return lambda: app_v3.history_dataframe(fixture.profile_id)
+
+
+def _cold(kind: str, reader: Callable[[int], Any]) -> Callable[[Fixture, SyntheticData], Callable[[], Any]]:
+    def prepare(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+        app_v3.invalidate_profile_data(fixture.profile_id, kind)
+        return lambda: reader(fixture.profile_id)
+    return prepare
+
+
+def _all_profile_overviews(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    for profile_id in data.profile_ids:
+        app_v3.invalidate_profile_data(profile_id, "overview")
+    return lambda: app_v3.profile_overviews(data.profile_ids)
+
+
+def _new_profile() -> int:
+    with app_v3.db_connection() as conn:
+        return int(
+            conn.execute(
+                "INSERT INTO profiles(name, created_at) VALUES (?, ?)",
+                (f"Budget {datetime.now().isoformat()}", datetime.now().isoformat(timespec="seconds")),
+            ).lastrowid
+        )
+
+
+def _seed_new_profile(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    profile_id = _new_profile()
+    return lambda: app_v3.seed_program_for_profile(profile_id)
+
+
+def _seed_deactivated_profile(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    profile_id = _new_profile()
+    app_v3.seed_program_for_profile(profile_id)
+    with app_v3.db_connection() as conn:
+        conn.execute("UPDATE program_exercises SET active = 0 WHERE profile_id = ?", (profile_id,))
+    app_v3.invalidate_profile_data(profile_id, "program")
+    return lambda: app_v3.seed_program_for_profile(profile_id)
+
+
+def _seed_seeded_profile(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    profile_id = _new_profile()
+    app_v3.seed_program_for_profile(profile_id)
+    app_v3.program_by_day(profile_id)
+    return lambda: app_v3.seed_program_for_profile(profile_id)
+
+
+def _update_program(fixture: Fixture, data: SyntheticData) -> Callable[[], Any]:
+    changes = [
+        {"id": row.id, "sort_order": row.sort_order, "sets": row.sets + 1, "rep_min": row.rep_min, "rep_max": row.rep_max, "active": True}
+        for row in fixture.plan
+    ]
+    return lambda: app_v3.update_program_exercises(fixture.profile_id, fixture.day_name, changes)
+
+
+CHECKS = [
+    # Pages of SUPABASE_PAGE_SIZE sets are the same request by design, so repeats are allowed here;
+    # one more, empty, page ends the loop.
+    Check(
+        "history_dataframe",
+        _cold_history,
+        lambda fixture, data: Budget(1, math.ceil(len(fixture.history) / app_v3.SUPABASE_PAGE_SIZE) + 1, None),
+    ),
+    Check("recent_workouts", _cold("recent", app_v3.recent_workouts), lambda fixture, data: Budget(1, 1)),
+    Check("pb_summary_dataframe", _cold("bests", app_v3.pb_summary_dataframe), lambda fixture, data: Budget(1, 1)),
+    Check("program_by_day", _cold("program", app_v3.program_by_day), lambda fixture, data: Budget(1, 1)),
+    # All profiles in one grouped read, however many there are.
+    Check("profile_overviews", _all_profile_overviews, lambda fixture, data: Budget(1, 1)),
+    Check(
+        "save_workout",
+        lambda fixture, data: lambda: app_v3.save_workout(fixture.profile_id, fixture.day_name, date.today(), "", fixture.logged),
+        lambda fixture, data: Budget(3, 2),
+    ),
+    Check(
+        "add_program_exercise",
+        lambda fixture, data: lambda: app_v3.add_program_exercise(fixture.profile_id, fixture.day_name, "Budgetövning", 3, 8, 12),
+        lambda fixture, data: Budget(2, 1),
+    ),
+    Check("update_program_exercises", _update_program, lambda fixture, data: Budget(1, 1)),
+    # A new profile costs the program read, the any-row check and one bulk seed; the per-session
+    # check after that is a cache hit. A fully deactivated program is read but never reseeded.
+    Check("seed_program_for_profile", _seed_new_profile, lambda fixture, data: Budget(4, 3)),
+    Check("seed_program, cache-träff", _seed_seeded_profile, lambda fixture, data: Budget(0, 0)),
+    Check("seed_program, avaktiverat", _seed_deactivated_profile, lambda fixture, data: Budget(2, 2)),
+]
+
+
+def measure(check: Check, backend_name: str, fixture: Fixture, data: SyntheticData) -> tuple[int, int]:
+    """Run one check on the active backend; returns (queries used, limit) or raises QueryBudgetExceeded."""
+    budget = check.budget(fixture, data)
+    limit = getattr(budget, backend_name)
+    call = check.prepare(fixture, data)
+    with app_v3.query_budget(**{backend_name: limit}, max_repeats=budget.max_repeats) as count:
+        call()
+    return getattr(count, backend_name), limit
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=3)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--exercises-per-day", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    failures = 0
+    with prepared_database(SyntheticSpec(args.profiles, args.years, args.exercises_per_day)) as (data, client):
+        for name in BACKENDS:
+            with backend(name, client):
+                fixture = build_fixture(data.profile_ids[0])
+                for check in CHECKS:
+                    try:
+                        used, limit = measure(check, name, fixture, data)
+                    except app_v3.QueryBudgetExceeded as exc:
+                        failures += 1
+                        print(f"FAIL {name:9} {check.name:28} {exc}")
+                        continue
+                    print(f"ok   {name:9} {check.name:28} {used:4} / {limit}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+"""In-process stand-in for the supabase-py client, served from the benchmark's SQLite database.
+
+It covers the PostgREST calls app_v3 makes: table().select() with embedded resources (including
+`!inner` embeds filtered with a dotted column), eq/gt/in_ filters, order, limit, range,
+count="exact", insert, update and delete, plus the RPC functions from the Supabase migrations.
+Every execute() counts as one request and can sleep for a simulated network round trip, so
+benchmarks see the request count that the real client would pay for.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+# (table, embedded table) -> (column on table, column on embedded table)
+RELATIONS = {
+    ("workout_sets", "workouts"): ("workout_id", "id"),
+    ("workout_sets", "exercises"): ("exercise_id", "id"),
+    ("program_exercises", "exercises"): ("exercise_id", "id"),
+    ("personal_bests", "exercises"): ("exercise_id", "id"),
+    ("workouts", "workout_sets"): ("id", "workout_id"),
+}
+TO_MANY = {("workouts", "workout_sets")}
+BOOLEAN_COLUMNS = {"is_pr", "active"}
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+# Stay well below SQLite's host parameter limit when embedding large pages.
+IN_CHUNK = 900
+
+
+@dataclass
+class Embed:
+    table: str
+    inner: bool
+    columns: list[str]
+    embeds: list[Embed] = field(default_factory=list)
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def parse_select(text: str) -> tuple[list[str], list[Embed]]:
+    columns, embeds = [], []
+    for part in _split_top_level(text):
+        if "(" not in part:
+            columns.append(part)
+            continue
+        head, body = part.split("(", 1)
+        table, _, hint = head.partition("!")
+        inner_columns, inner_embeds = parse_select(body[:-1])
+        embeds.append(Embed(table.strip(), hint.strip() == "inner", inner_columns, inner_embeds))
+    return columns, embeds
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: int | None = None
+
+
+class FakeQuery:
+    def __init__(self, client: FakeSupabase, table: str) -> None:
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.payload: Any = None
+        self.columns = ["*"]
+        self.embeds: list[Embed] = []
+        self.filters: list[tuple[str, str, Any]] = []
+        self.orders: list[tuple[str, bool]] = []
+        self.row_limit: int | None = None
+        self.row_offset = 0
+        self.count: str | None = None
+
+    def select(self, columns: str = "*", count: str | None = None) -> FakeQuery:
+        self.columns, self.embeds = parse_select(columns)
+        self.count = count
+        return self
+
+    def insert(self, rows: dict | list[dict]) -> FakeQuery:
+        self.action, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values: dict) -> FakeQuery:
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self) -> FakeQuery:
+        self.action = "delete"
+        return self
+
+    def _filter(self, column: str, operator: str, value: Any) -> FakeQuery:
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> FakeQuery:
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values: list) -> FakeQuery:
+        return self._filter(column, "in", list(values))
+
+    def order(self, column: str, desc: bool = False) -> FakeQuery:
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> FakeQuery:
+        self.row_limit = count
+        return self
+
+    def range(self, start: int, end: int) -> FakeQuery:
+        self.row_offset, self.row_limit = start, end - start + 1
+        return self
+
+    def _where(self) -> tuple[str, str, list]:
+        joins, clauses, params = [], [], []
+        for column, operator, value in self.filters:
+            if "." in column:
+                embedded, column = column.split(".", 1)
+                embed = next((item for item in self.embeds if item.table == embedded and item.inner), None)
+                if embed is None:
+                    raise NotImplementedError(f"filter on non-inner embed {embedded}")
+                local, remote = RELATIONS[(self.table, embedded)]
+                alias = f"j_{embedded}"
+                join = f"JOIN {embedded} {alias} ON {alias}.{remote} = t.{local}"
+                if join not in joins:
+                    joins.append(join)
+                target = f"{alias}.{column}"
+            else:
+                target = f"t.{column}"
+            if operator == "in":
+                clauses.append(f"{target} IN ({','.join('?' * len(value))})" if value else "0")
+                params += value
+            else:
+                clauses.append(f"{target} {OPERATORS[operator]} ?")
+                params.append(value)
+        return " ".join(joins), " AND ".join(clauses) or "1", params
+
+    def execute(self) -> FakeResponse:
+        self.client.record_request()
+        conn = self.client.conn
+        if self.action == "insert":
+            inserted = []
+            with conn:
+                for row in self.payload:
+                    keys = list(row)
+                    cursor = conn.execute(
+                        f"INSERT INTO {self.table}({','.join(keys)}) VALUES ({','.join('?' * len(keys))})",
+                        [row[key] for key in keys],
+                    )
+                    inserted.append({**row, "id": cursor.lastrowid})
+            return FakeResponse(inserted)
+
+        joins, where, params = self._where()
+        if self.action in ("update", "delete"):
+            # Mutations only use plain column filters in the app, so no join is needed.
+            with conn:
+                if self.action == "update":
+                    keys = list(self.payload)
+                    conn.execute(
+                        f"UPDATE {self.table} AS t SET {', '.join(f'{key} = ?' for key in keys)} WHERE {where}",
+                        [self.payload[key] for key in keys] + params,
+                    )
+                else:
+                    conn.execute(f"DELETE FROM {self.table} AS t WHERE {where}", params)
+            return FakeResponse([])
+
+        order = ", ".join(f"t.{column} {'DESC' if desc else 'ASC'}" for column, desc in self.orders) or "t.rowid"
+        sql = f"SELECT t.* FROM {self.table} t {joins} WHERE {where} ORDER BY {order}"
+        page_params = list(params)
+        row_limit = self.row_limit
+        if self.client.max_rows is not None:
+            row_limit = min(row_limit if row_limit is not None else self.client.max_rows, self.client.max_rows)
+        if row_limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            page_params += [row_limit, self.row_offset]
+        rows = [dict(row) for row in conn.execute(sql, page_params)]
+        count = None
+        if self.count == "exact":
+            count = int(conn.execute(f"SELECT COUNT(*) FROM {self.table} t {joins} WHERE {where}", params).fetchone()[0])
+        return FakeResponse(self.client.shape(self.table, rows, self.columns, self.embeds), count)
+
+
+class FakeRpc:
+    def __init__(self, client: FakeSupabase, name: str, params: dict) -> None:
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        self.client.record_request()
+        function = RPC_FUNCTIONS.get(self.name)
+        if function is None:
+            raise NotImplementedError(f"rpc {self.name}")
+        with self.client.conn:
+            return FakeResponse(function(self.client.conn, **self.params))
+
+
+class FakeSupabase:
+    def __init__(self, path: Path, latency_ms: float = 0.0, max_rows: int | None = None) -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.latency_s = latency_ms / 1000
+        # Like PostgREST's db-max-rows: every select is cut off here, whatever limit it asked for.
+        self.max_rows = max_rows
+        self.requests = 0
+
+    def record_request(self) -> None:
+        self.requests += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: dict | None = None) -> FakeRpc:
+        return FakeRpc(self, name, params or {})
+
+    def shape(self, table: str, rows: list[dict], columns: list[str], embeds: list[Embed]) -> list[dict]:
+        """Attach embedded resources with one query per embed, then keep only the selected columns."""
+        for embed in embeds:
+            local, remote = RELATIONS[(table, embed.table)]
+            keys = sorted({row[local] for row in rows if row[local] is not None})
+            related: list[dict] = []
+            for start in range(0, len(keys), IN_CHUNK):
+                chunk = keys[start:start + IN_CHUNK]
+                related += [
+                    dict(row)
+                    for row in self.conn.execute(
+                        f"SELECT * FROM {embed.table} WHERE {remote} IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                        chunk,
+                    )
+                ]
+            shaped = self.shape(embed.table, related, embed.columns, embed.embeds)
+            if (table, embed.table) in TO_MANY:
+                grouped: dict[Any, list[dict]] = {}
+                for source, row in zip(related, shaped):
+                    grouped.setdefault(source[remote], []).append(row)
+                for row in rows:
+                    row[f"_embed_{embed.table}"] = grouped.get(row[local], [])
+            else:
+                by_key = {source[remote]: row for source, row in zip(related, shaped)}
+                for row in rows:
+                    row[f"_embed_{embed.table}"] = by_key.get(row[local])
+        result = []
+        for row in rows:
+            picked = dict(row) if columns == ["*"] else {column: row[column] for column in columns if column}
+            picked = {key: value for key, value in picked.items() if not key.startswith("_embed_")}
+            for column in BOOLEAN_COLUMNS.intersection(picked):
+                picked[column] = bool(picked[column])
+            for embed in embeds:
+                picked[embed.table] = row[f"_embed_{embed.table}"]
+            result.append(picked)
+        return result
+
+
+def _save_workout_atomic(
+    conn: sqlite3.Connection, p_profile_id: int, p_workout_date: str, p_day_name: str, p_notes: str, p_sets: list[dict]
+) -> int:
+    workout_id = conn.execute(
+        "INSERT INTO workouts(profile_id, workout_date, day_name, notes, created_at) VALUES (?, ?, ?, ?, datetime('now'))",
+        (p_profile_id, p_workout_date, p_day_name, p_notes or ""),
+    ).lastrowid
+    conn.executemany(
+        "INSERT INTO workout_sets(workout_id, exercise_id, set_no, reps, weight_kg, is_pr) VALUES (?, ?, ?, ?, ?, ?)",
+        [(workout_id, row["exercise_id"], row["set_no"], row["reps"], row["weight_kg"], int(row.get("is_pr", False))) for row in p_sets],
+    )
+    return int(workout_id)
+
+
+def _pb_summary(conn: sqlite3.Connection, p_profile_id: int) -> list[dict]:
+    rows = conn.execute(
+        """
+        SELECT e.name AS ovning, MAX(pb.weight_kg) AS tyngsta_vikt, MAX(pb.max_reps) AS basta_reps,
+               MAX(pb.best_e1rm) AS basta_est_1rm, SUM(pb.total_volume) AS total_volym,
+               SUM(pb.set_count) AS antal_set
+        FROM personal_bests pb
+        JOIN exercises e ON e.id = pb.exercise_id
+        WHERE pb.profile_id = ?
+        GROUP BY e.name
+        ORDER BY basta_est_1rm DESC, tyngsta_vikt DESC, ovning
+        """,
+        (p_profile_id,),
+    )
+    return [dict(row) for row in rows]
+
+
+def _add_program_exercise_atomic(
+    conn: sqlite3.Connection, p_profile_id: int, p_day_name: str, p_exercise_name: str, p_sets: int, p_rep_min: int, p_rep_max: int
+) -> int:
+    conn.execute("INSERT OR IGNORE INTO exercises(name) VALUES (?)", (p_exercise_name,))
+    conn.execute(
+        """
+        INSERT INTO program_exercises(profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
+        SELECT ?, ?, e.id,
+               (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM program_exercises WHERE profile_id = ? AND day_name = ?),
+               ?, ?, ?, 1
+        FROM exercises e WHERE e.name = ?
+        ON CONFLICT(profile_id, day_name, exercise_id) DO UPDATE SET
+            active = 1, sort_order = excluded.sort_order,
+            sets = excluded.sets, rep_min = excluded.rep_min, rep_max = excluded.rep_max
+        """,
+        (p_profile_id, p_day_name, p_profile_id, p_day_name, p_sets, p_rep_min, p_rep_max, p_exercise_name),
+    )
+    return int(
+        conn.execute(
+            "SELECT pe.id FROM program_exercises pe JOIN exercises e ON e.id = pe.exercise_id "
+            "WHERE pe.profile_id = ? AND pe.day_name = ? AND e.name = ?",
+            (p_profile_id, p_day_name, p_exercise_name),
+        ).fetchone()[0]
+    )
+
+
+def _update_program_exercises_bulk(conn: sqlite3.Connection, p_profile_id: int, p_day_name: str, p_rows: list[dict]) -> int:
+    cursor = conn.executemany(
+        "UPDATE program_exercises SET sort_order = ?, sets = ?, rep_min = ?, rep_max = ?, active = ? "
+        "WHERE id = ? AND profile_id = ? AND day_name = ?",
+        [
+            (row["sort_order"], row["sets"], row["rep_min"], row["rep_max"], int(row["active"]), row["id"], p_profile_id, p_day_name)
+            for row in p_rows
+        ],
+    )
+    return cursor.rowcount
+
+
+def _seed_starter_program(conn: sqlite3.Connection, p_profile_id: int, p_rows: list[dict]) -> int:
+    if conn.execute("SELECT 1 FROM program_exercises WHERE profile_id = ? LIMIT 1", (p_profile_id,)).fetchone():
+        return 0
+    conn.executemany("INSERT OR IGNORE INTO exercises(name) VALUES (?)", [(row["name"],) for row in p_rows])
+    cursor = conn.executemany(
+        "INSERT INTO program_exercises(profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active) "
+        "SELECT ?, ?, id, ?, ?, ?, ?, 1 FROM exercises WHERE name = ?",
+        [(p_profile_id, row["day_name"], row["sort_order"], row["sets"], row["rep_min"], row["rep_max"], row["name"]) for row in p_rows],
+    )
+    return cursor.rowcount
+
+
+def _profile_overviews(conn: sqlite3.Connection, p_profile_ids: list[int]) -> list[dict]:
+    rows = conn.execute(
+        f"""
+        SELECT profile_id, workout_count, last_workout_date, last_day_name
+        FROM (
+            SELECT profile_id, workout_date AS last_workout_date, day_name AS last_day_name,
+                   COUNT(*) OVER (PARTITION BY profile_id) AS workout_count,
+                   ROW_NUMBER() OVER (PARTITION BY profile_id ORDER BY workout_date DESC, id DESC) AS position
+            FROM workouts
+            WHERE profile_id IN ({",".join("?" * len(p_profile_ids))})
+        )
+        WHERE position = 1
+        """,
+        p_profile_ids,
+    )
+    found = {row["profile_id"]: dict(row) for row in rows}
+    return [
+        found.get(profile_id, {"profile_id": profile_id, "workout_count": 0, "last_workout_date": None, "last_day_name": None})
+        for profile_id in p_profile_ids
+    ]
+
+
+RPC_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "save_workout_atomic": _save_workout_atomic,
+    "pb_summary": _pb_summary,
+    "add_program_exercise_atomic": _add_program_exercise_atomic,
+    "update_program_exercises_bulk": _update_program_exercises_bulk,
+    "seed_starter_program": _seed_starter_program,
+    "profile_overviews": _profile_overviews,
+}
@@ -0,0 +1,237 @@
+"""Time app_v3's data paths on synthetic multi-year history, on SQLite and on the Supabase stand-in.
+
+Run from the repository root:
+
+    python -m benchmarks.run --profiles 2 --years 3 --exercises-per-day 5 --output bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 20
+
+Each scenario starts from a cold cache for the reader it measures, the way a save or a
+TTL expiry leaves it. Results are written as JSON; with --baseline every median is compared
+with the earlier run and the exit status is 1 if any scenario got slower than --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from unittest import mock
+
+import pandas as pd
+import streamlit as st
+
+import app_v3
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import SyntheticData, SyntheticSpec, populate
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BACKENDS = ["sqlite", "supabase"]
+
+
+@dataclass
+class Fixture:
+    profile_id: int
+    day_name: str
+    plan: list[app_v3.ProgramExercise]
+    history: pd.DataFrame
+    index: app_v3.HistoryIndex
+    bests: dict[tuple[int, float], int]
+    logged: list[dict]
+    exercise_name: str
+
+
+@dataclass
+class Result:
+    backend: str
+    scenario: str
+    median_ms: float
+    min_ms: float
+    max_ms: float
+    requests: float | None
+
+
+def build_fixture(profile_id: int) -> Fixture:
+    day_name = app_v3.DAY_NAMES[0]
+    plan = app_v3.list_program(profile_id, day_name)
+    history = app_v3.history_dataframe(profile_id)
+    index = app_v3.history_index(profile_id)
+    suggestions = app_v3.suggest_weights(plan, history)
+    logged = [
+        {
+            "exercise_id": exercise.exercise_id,
+            "weight_kg": float(suggestions.loc[exercise.exercise_id, "weight"]),
+            "reps": [exercise.rep_max] * exercise.sets,
+        }
+        for exercise in plan
+    ]
+    return Fixture(
+        profile_id=profile_id,
+        day_name=day_name,
+        plan=plan,
+        history=history,
+        index=index,
+        bests=app_v3.personal_best_reps(profile_id, [exercise.exercise_id for exercise in plan]),
+        logged=logged,
+        exercise_name=plan[0].name,
+    )
+
+
+def cold_history(fixture: Fixture) -> Any:
+    app_v3.history_store().snapshots.pop(fixture.profile_id, None)
+    return app_v3.history_dataframe(fixture.profile_id)
+
+
+def cold_pb_summary(fixture: Fixture) -> Any:
+    app_v3.invalidate_profile_data(fixture.profile_id, "bests")
+    return app_v3.pb_summary_dataframe(fixture.profile_id)
+
+
+def cold_recent_workouts(fixture: Fixture) -> Any:
+    app_v3.invalidate_profile_data(fixture.profile_id, "recent")
+    return app_v3.recent_workouts(fixture.profile_id)
+
+
+SCENARIOS: dict[str, Callable[[Fixture], Any]] = {
+    "history_dataframe": cold_history,
+    "suggest_weights": lambda f: app_v3.suggest_weights(f.plan, f.history),
+    "_pr_flags": lambda f: [app_v3._pr_flags(item["exercise_id"], item["weight_kg"], item["reps"], f.bests) for item in f.logged],
+    "pb_summary_dataframe": cold_pb_summary,
+    "trend_dataframe": lambda f: app_v3.trend_dataframe(f.exercise_name, f.history),
+    "recent_workouts": cold_recent_workouts,
+    # Last, because every run adds a workout to the profile.
+    "save_workout": lambda f: app_v3.save_workout(f.profile_id, f.day_name, date.today(), "", f.logged),
+}
+
+
+@contextmanager
+def prepared_database(spec: SyntheticSpec, latency_ms: float = 0.0) -> Iterator[tuple[SyntheticData, FakeSupabase]]:
+    """A throwaway database filled with synthetic history, and the Supabase stand-in serving it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "gymapp.db"
+        with mock.patch.object(app_v3, "DB_PATH", db_path):
+            app_v3.init_db()
+            with app_v3.db_connection() as conn:
+                data = populate(conn, spec)
+            client = FakeSupabase(db_path, latency_ms)
+            try:
+                yield data, client
+            finally:
+                client.conn.close()
+
+
+@contextmanager
+def backend(name: str, client: FakeSupabase) -> Iterator[None]:
+    st.cache_data.clear()
+    app_v3.history_store().snapshots.clear()
+    if name == "sqlite":
+        yield
+        return
+    # Patch the cached client rather than supabase_client(), so the app's own request counting still applies.
+    stand_in = app_v3.StorageBackend("supabase", "http://fake-supabase", "fake", server_key=True)
+    with mock.patch.object(app_v3, "storage_backend", lambda: stand_in), mock.patch.object(app_v3, "_supabase_client", lambda: client):
+        yield
+
+
+def time_scenario(function: Callable[[Fixture], Any], fixture: Fixture, repeat: int, client: FakeSupabase | None) -> tuple[list[float], float | None]:
+    function(fixture)
+    before = client.requests if client else 0
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(fixture)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, (client.requests - before) / repeat if client else None
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[Result], baseline_path: Path, threshold: float) -> bool:
+    baseline = {(row["backend"], row["scenario"]): row["median_ms"] for row in json.loads(baseline_path.read_text())["results"]}
+    regressed = False
+    print(f"\ncompared with {baseline_path} (threshold {threshold:g} %)")
+    for result in results:
+        before = baseline.get((result.backend, result.scenario))
+        if not before:
+            continue
+        change = (result.median_ms - before) / before * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{result.backend:9} {result.scenario:22} {before:9.2f} -> {result.median_ms:9.2f} ms  {change:+6.1f} %{flag}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--exercises-per-day", type=int, default=5)
+    parser.add_argument("--workouts-per-week", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated round trip per Supabase request")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="earlier --output file to compare with")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+    # Cached functions warn about the missing Streamlit runtime on every call outside `streamlit run`.
+    logging.disable(logging.CRITICAL)
+
+    spec = SyntheticSpec(args.profiles, args.years, args.exercises_per_day, args.workouts_per_week)
+    scenarios = {name: SCENARIOS[name] for name in SCENARIOS if not args.scenario or name in args.scenario}
+    results: list[Result] = []
+    with prepared_database(spec, args.latency_ms) as (data, client):
+        print(f"{spec.profiles} profiles, {data.workouts} workouts, {data.sets} sets, median of {args.repeat}")
+        for name in BACKENDS:
+            with backend(name, client):
+                fixture = build_fixture(data.profile_ids[0])
+                for scenario, function in scenarios.items():
+                    timings, requests = time_scenario(function, fixture, args.repeat, client if name == "supabase" else None)
+                    result = Result(name, scenario, statistics.median(timings), min(timings), max(timings), requests)
+                    results.append(result)
+                    per_call = f"{requests:5.1f} req" if requests is not None else ""
+                    print(f"{name:9} {scenario:22} {result.median_ms:9.2f} ms  {per_call}")
+
+    report = {
+        "meta": {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workouts": data.workouts,
+            "sets": data.sets,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            **asdict(spec),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline:
+        return int(compare(results, args.baseline, args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
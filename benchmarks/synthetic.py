@@ -0,0 +1,112 @@
+"""Synthetic multi-year training history in the app_v3 schema.
+
+The tables are created by app_v3's own migrations (init_db), so the data always matches
+what the app reads. The Supabase schema in supabase_schema_v2.sql and its migrations has
+the same tables and columns, which is what lets benchmarks.fake_supabase serve this data.
+"""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+DAY_NAMES = ["Pass 1", "Pass 2", "Pass 3", "Pass 4"]
+EXERCISE_NAMES = [
+    "Knäböj", "Bänkpress", "Marklyft", "Militärpress", "Skivstångsrodd", "Chins", "Dips", "Frontböj",
+    "Raka marklyft", "Lutande hantelpress", "Hip thrust", "Latsdrag", "Face pull", "Bicepscurl hantlar",
+    "Triceps pushdown", "Sidolyft hantlar", "Bulgarian split squat", "Vadpress", "Kabel-flyes", "Goblet squat",
+]
+REP_RANGES = [(3, 6), (5, 8), (6, 10), (8, 12), (10, 15)]
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    profiles: int = 2
+    years: float = 3.0
+    exercises_per_day: int = 5
+    workouts_per_week: int = 3
+    seed: int = 7
+
+
+@dataclass(frozen=True)
+class SyntheticData:
+    profile_ids: list[int]
+    workouts: int
+    sets: int
+
+
+def exercise_names(count: int) -> list[str]:
+    return [
+        EXERCISE_NAMES[index] if index < len(EXERCISE_NAMES) else f"{EXERCISE_NAMES[index % len(EXERCISE_NAMES)]} {index // len(EXERCISE_NAMES) + 1}"
+        for index in range(count)
+    ]
+
+
+def populate(conn: sqlite3.Connection, spec: SyntheticSpec, today: date | None = None) -> SyntheticData:
+    """Fill an initialised database with profiles, a four-day program each and `spec.years` of workouts.
+
+    Weights follow double progression: a lift goes up one step once every set reaches the top of
+    its rep range, and drops back after a bad session, so personal bests and trends look real.
+    """
+    rng = random.Random(spec.seed)
+    today = today or date.today()
+    now = datetime.now().isoformat(timespec="seconds")
+    names = exercise_names(spec.exercises_per_day * len(DAY_NAMES))
+    conn.executemany("INSERT OR IGNORE INTO exercises(name) VALUES (?)", [(name,) for name in names])
+    exercise_ids = {row[1]: int(row[0]) for row in conn.execute("SELECT id, name FROM exercises")}
+
+    profile_ids = []
+    workouts = sets = 0
+    first_day = today - timedelta(days=round(spec.years * 365))
+    for number in range(1, spec.profiles + 1):
+        profile_id = int(
+            conn.execute("INSERT INTO profiles(name, created_at) VALUES (?, ?)", (f"Profil {number}", now)).lastrowid
+        )
+        profile_ids.append(profile_id)
+
+        program: dict[str, list[tuple[int, int, int, int]]] = {}
+        for day_index, day_name in enumerate(DAY_NAMES):
+            day_exercises = names[day_index * spec.exercises_per_day:(day_index + 1) * spec.exercises_per_day]
+            program[day_name] = [
+                (exercise_ids[name], rng.choice([3, 3, 4]), *rng.choice(REP_RANGES)) for name in day_exercises
+            ]
+            conn.executemany(
+                """
+                INSERT INTO program_exercises(profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+                """,
+                [
+                    (profile_id, day_name, exercise_id, order, set_count, rep_min, rep_max)
+                    for order, (exercise_id, set_count, rep_min, rep_max) in enumerate(program[day_name], start=1)
+                ],
+            )
+
+        weights = {exercise_id: rng.randrange(8, 40) * 2.5 for day in program.values() for exercise_id, *_ in day}
+        workout_date = first_day
+        session = 0
+        while workout_date <= today:
+            day_name = DAY_NAMES[session % len(DAY_NAMES)]
+            workout_id = conn.execute(
+                "INSERT INTO workouts(profile_id, workout_date, day_name, notes, created_at) VALUES (?, ?, ?, ?, ?)",
+                (profile_id, workout_date.isoformat(), day_name, "" if rng.random() < 0.9 else "Sov dåligt", now),
+            ).lastrowid
+            rows = []
+            for exercise_id, set_count, rep_min, rep_max in program[day_name]:
+                weight = weights[exercise_id]
+                reps = [max(1, min(rep_max, rep_min + rng.randint(-2, rep_max - rep_min + 1))) for _ in range(set_count)]
+                rows += [(workout_id, exercise_id, set_no, rep, weight) for set_no, rep in enumerate(reps, start=1)]
+                if min(reps) >= rep_max:
+                    weights[exercise_id] = weight + 2.5
+                elif max(reps) < rep_min:
+                    weights[exercise_id] = max(2.5, weight - 2.5)
+            conn.executemany(
+                "INSERT INTO workout_sets(workout_id, exercise_id, set_no, reps, weight_kg) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            workouts += 1
+            sets += len(rows)
+            session += 1
+            workout_date += timedelta(days=max(1, round(rng.uniform(0.7, 1.3) * 7 / spec.workouts_per_week)))
+    return SyntheticData(profile_ids, workouts, sets)
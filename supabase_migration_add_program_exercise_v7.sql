@@ -0,0 +1,79 @@
+begin;
+
+-- One round trip for "Lägg till övning": the exercise lookup, the next sort_order
+-- and the upsert run in a single transaction, so they cannot race a concurrent edit.
+create or replace function public.add_program_exercise_atomic(
+  p_profile_id bigint,
+  p_day_name text,
+  p_exercise_name text,
+  p_sets integer,
+  p_rep_min integer,
+  p_rep_max integer
+) returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  target_exercise_id bigint;
+  program_row_id bigint;
+begin
+  if not exists (select 1 from public.profiles where id = p_profile_id) then
+    raise exception 'Profile not found';
+  end if;
+
+  if p_day_name not in ('Pass 1', 'Pass 2', 'Pass 3', 'Pass 4') then
+    raise exception 'Invalid workout day';
+  end if;
+
+  if coalesce(trim(p_exercise_name), '') = '' then
+    raise exception 'Exercise name is required';
+  end if;
+
+  if p_rep_max < p_rep_min then
+    raise exception 'rep_max must be at least rep_min';
+  end if;
+
+  insert into public.exercises(name)
+  values (p_exercise_name)
+  on conflict (name) do nothing;
+
+  select id into target_exercise_id
+  from public.exercises
+  where name = p_exercise_name;
+
+  -- Serialise adds to the same day so two callers cannot pick the same sort_order.
+  perform pg_advisory_xact_lock(hashtextextended(p_profile_id::text || ':' || p_day_name, 0));
+
+  insert into public.program_exercises
+    (profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
+  select
+    p_profile_id,
+    p_day_name,
+    target_exercise_id,
+    coalesce(max(sort_order), 0) + 1,
+    p_sets,
+    p_rep_min,
+    p_rep_max,
+    true
+  from public.program_exercises
+  where profile_id = p_profile_id
+    and day_name = p_day_name
+  on conflict (profile_id, day_name, exercise_id) do update set
+    active = true,
+    sort_order = excluded.sort_order,
+    sets = excluded.sets,
+    rep_min = excluded.rep_min,
+    rep_max = excluded.rep_max
+  returning id into program_row_id;
+
+  return program_row_id;
+end;
+$$;
+
+revoke all on function public.add_program_exercise_atomic(bigint, text, text, integer, integer, integer)
+  from public, anon, authenticated;
+grant execute on function public.add_program_exercise_atomic(bigint, text, text, integer, integer, integer)
+  to service_role;
+
+commit;
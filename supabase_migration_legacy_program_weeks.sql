@@ -0,0 +1,56 @@
+begin;
+
+-- For the legacy app.py schema. Older seeding could write the same (week, day, exercise_id)
+-- more than once; keep one row of each so the key can be made unique.
+delete from public.program_weeks a
+using public.program_weeks b
+where a.week = b.week
+  and a.day = b.day
+  and a.exercise_id = b.exercise_id
+  and a.ctid > b.ctid;
+
+-- Backs upsert(on_conflict="week,day,exercise_id") in seed_program and the Program tab.
+create unique index if not exists program_weeks_week_day_exercise_idx
+  on public.program_weeks(week, day, exercise_id);
+
+-- "Initiera programdata": the upsert and the removal of rows that are no longer part of
+-- the program run in one transaction, so a failed reseed never leaves half a program.
+create or replace function public.sync_program_weeks(
+  p_upsert jsonb,
+  p_delete jsonb
+) returns integer
+language plpgsql
+set search_path = public
+as $$
+declare
+  upserted_rows integer;
+  deleted_rows integer;
+begin
+  if jsonb_typeof(p_upsert) <> 'array' or jsonb_typeof(p_delete) <> 'array' then
+    raise exception 'Rows must be arrays';
+  end if;
+
+  insert into public.program_weeks(week, day, exercise_id, sets, rep_min, rep_max)
+  select r.week, r.day, r.exercise_id, r.sets, r.rep_min, r.rep_max
+  from jsonb_populate_recordset(null::public.program_weeks, p_upsert) as r
+  on conflict (week, day, exercise_id) do update set
+    sets = excluded.sets,
+    rep_min = excluded.rep_min,
+    rep_max = excluded.rep_max;
+  get diagnostics upserted_rows = row_count;
+
+  delete from public.program_weeks pw
+  using jsonb_populate_recordset(null::public.program_weeks, p_delete) as d
+  where pw.week = d.week
+    and pw.day = d.day
+    and pw.exercise_id = d.exercise_id;
+  get diagnostics deleted_rows = row_count;
+
+  return upserted_rows + deleted_rows;
+end;
+$$;
+
+-- app.py connects with the anon key, and the function runs with the caller's rights.
+grant execute on function public.sync_program_weeks(jsonb, jsonb) to anon, authenticated;
+
+commit;
@@ -0,0 +1,35 @@
+begin;
+
+-- Requires supabase_migration_personal_bests_v5.sql.
+create or replace function public.pb_summary(p_profile_id bigint)
+returns table (
+  ovning text,
+  tyngsta_vikt numeric,
+  basta_reps integer,
+  basta_est_1rm numeric,
+  total_volym numeric,
+  antal_set bigint
+)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select
+    e.name,
+    max(pb.weight_kg),
+    max(pb.max_reps),
+    max(pb.best_e1rm),
+    sum(pb.total_volume),
+    sum(pb.set_count)
+  from public.personal_bests pb
+  join public.exercises e on e.id = pb.exercise_id
+  where pb.profile_id = p_profile_id
+  group by e.name
+  order by max(pb.best_e1rm) desc, max(pb.weight_kg) desc, e.name
+$$;
+
+revoke all on function public.pb_summary(bigint) from public, anon, authenticated;
+grant execute on function public.pb_summary(bigint) to service_role;
+
+commit;
@@ -0,0 +1,93 @@
+begin;
+
+create table if not exists public.personal_bests (
+  profile_id bigint not null references public.profiles(id) on delete cascade,
+  exercise_id bigint not null references public.exercises(id) on delete cascade,
+  weight_kg numeric not null,
+  max_reps integer not null,
+  best_e1rm numeric not null,
+  set_count integer not null,
+  total_volume numeric not null,
+  primary key (profile_id, exercise_id, weight_kg)
+);
+
+-- Both triggers run inside the writing statement, so save_workout_atomic and
+-- workout deletes update the table in the same transaction as the sets.
+create or replace function public.personal_bests_set_insert()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.personal_bests
+    (profile_id, exercise_id, weight_kg, max_reps, best_e1rm, set_count, total_volume)
+  select w.profile_id, new.exercise_id, new.weight_kg, new.reps,
+         new.weight_kg * (1 + new.reps / 30.0), 1, new.weight_kg * new.reps
+  from public.workouts w
+  where w.id = new.workout_id
+  on conflict (profile_id, exercise_id, weight_kg) do update set
+    max_reps = greatest(personal_bests.max_reps, excluded.max_reps),
+    best_e1rm = greatest(personal_bests.best_e1rm, excluded.best_e1rm),
+    set_count = personal_bests.set_count + excluded.set_count,
+    total_volume = personal_bests.total_volume + excluded.total_volume;
+  return new;
+end;
+$$;
+
+-- Runs before the cascade removes the sets, then rebuilds the touched exercises from what remains.
+create or replace function public.personal_bests_workout_delete()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  delete from public.personal_bests
+  where profile_id = old.profile_id
+    and exercise_id in (select exercise_id from public.workout_sets where workout_id = old.id);
+
+  insert into public.personal_bests
+    (profile_id, exercise_id, weight_kg, max_reps, best_e1rm, set_count, total_volume)
+  select w.profile_id, ws.exercise_id, ws.weight_kg, max(ws.reps),
+         max(ws.weight_kg * (1 + ws.reps / 30.0)), count(*), sum(ws.weight_kg * ws.reps)
+  from public.workout_sets ws
+  join public.workouts w on w.id = ws.workout_id
+  where w.profile_id = old.profile_id
+    and ws.workout_id <> old.id
+    and ws.exercise_id in (select exercise_id from public.workout_sets where workout_id = old.id)
+  group by w.profile_id, ws.exercise_id, ws.weight_kg;
+
+  return old;
+end;
+$$;
+
+drop trigger if exists personal_bests_set_insert on public.workout_sets;
+create trigger personal_bests_set_insert
+  after insert on public.workout_sets
+  for each row execute function public.personal_bests_set_insert();
+
+drop trigger if exists personal_bests_workout_delete on public.workouts;
+create trigger personal_bests_workout_delete
+  before delete on public.workouts
+  for each row execute function public.personal_bests_workout_delete();
+
+truncate public.personal_bests;
+
+insert into public.personal_bests
+  (profile_id, exercise_id, weight_kg, max_reps, best_e1rm, set_count, total_volume)
+select w.profile_id, ws.exercise_id, ws.weight_kg, max(ws.reps),
+       max(ws.weight_kg * (1 + ws.reps / 30.0)), count(*), sum(ws.weight_kg * ws.reps)
+from public.workout_sets ws
+join public.workouts w on w.id = ws.workout_id
+group by w.profile_id, ws.exercise_id, ws.weight_kg;
+
+alter table public.personal_bests enable row level security;
+
+revoke all on table public.personal_bests from anon, authenticated;
+revoke all on function public.personal_bests_set_insert() from public, anon, authenticated;
+revoke all on function public.personal_bests_workout_delete() from public, anon, authenticated;
+
+grant all on table public.personal_bests to service_role;
+
+commit;
@@ -0,0 +1,40 @@
+begin;
+
+-- Requires supabase_migration_profiles_v3.sql (workouts_profile_date_idx).
+-- Workout count, last workout date and last day for many profiles in one round trip.
+create or replace function public.profile_overviews(p_profile_ids bigint[])
+returns table (
+  profile_id bigint,
+  workout_count bigint,
+  last_workout_date date,
+  last_day_name text
+)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select
+    p.id,
+    c.workout_count,
+    l.workout_date,
+    l.day_name
+  from unnest(p_profile_ids) as p(id)
+  cross join lateral (
+    select count(*) as workout_count
+    from public.workouts w
+    where w.profile_id = p.id
+  ) c
+  left join lateral (
+    select w.workout_date, w.day_name
+    from public.workouts w
+    where w.profile_id = p.id
+    order by w.workout_date desc, w.id desc
+    limit 1
+  ) l on true
+$$;
+
+revoke all on function public.profile_overviews(bigint[]) from public, anon, authenticated;
+grant execute on function public.profile_overviews(bigint[]) to service_role;
+
+commit;
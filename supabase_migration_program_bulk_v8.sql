@@ -0,0 +1,59 @@
+begin;
+
+-- Saves every changed row of one program day from the "Spara alla" grid in a single transaction.
+create or replace function public.update_program_exercises_bulk(
+  p_profile_id bigint,
+  p_day_name text,
+  p_rows jsonb
+) returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  updated_rows integer;
+begin
+  if p_day_name not in ('Pass 1', 'Pass 2', 'Pass 3', 'Pass 4') then
+    raise exception 'Invalid workout day';
+  end if;
+
+  if jsonb_typeof(p_rows) <> 'array' then
+    raise exception 'Rows must be an array';
+  end if;
+
+  if exists (
+    select 1
+    from jsonb_to_recordset(p_rows) as r(rep_min integer, rep_max integer)
+    where r.rep_max < r.rep_min
+  ) then
+    raise exception 'rep_max must be at least rep_min';
+  end if;
+
+  update public.program_exercises pe
+  set
+    sort_order = r.sort_order,
+    sets = r.sets,
+    rep_min = r.rep_min,
+    rep_max = r.rep_max,
+    active = r.active
+  from jsonb_to_recordset(p_rows) as r(
+    id bigint,
+    sort_order integer,
+    sets integer,
+    rep_min integer,
+    rep_max integer,
+    active boolean
+  )
+  where pe.id = r.id
+    and pe.profile_id = p_profile_id
+    and pe.day_name = p_day_name;
+
+  get diagnostics updated_rows = row_count;
+  return updated_rows;
+end;
+$$;
+
+revoke all on function public.update_program_exercises_bulk(bigint, text, jsonb) from public, anon, authenticated;
+grant execute on function public.update_program_exercises_bulk(bigint, text, jsonb) to service_role;
+
+commit;
@@ -0,0 +1,66 @@
+begin;
+
+-- Seeds a new profile's starter program in one round trip: the exercise catalog is
+-- upserted and every program row inserted in the same transaction. Does nothing when
+-- the profile already has program rows, so two sessions cannot seed it twice.
+create or replace function public.seed_starter_program(
+  p_profile_id bigint,
+  p_rows jsonb
+) returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  inserted_rows integer;
+begin
+  if not exists (select 1 from public.profiles where id = p_profile_id) then
+    raise exception 'Profile not found';
+  end if;
+
+  if jsonb_typeof(p_rows) <> 'array' then
+    raise exception 'Rows must be an array';
+  end if;
+
+  perform pg_advisory_xact_lock(p_profile_id);
+
+  if exists (select 1 from public.program_exercises where profile_id = p_profile_id) then
+    return 0;
+  end if;
+
+  insert into public.exercises(name)
+  select distinct r.name
+  from jsonb_to_recordset(p_rows) as r(name text)
+  on conflict (name) do nothing;
+
+  insert into public.program_exercises
+    (profile_id, day_name, exercise_id, sort_order, sets, rep_min, rep_max, active)
+  select
+    p_profile_id,
+    r.day_name,
+    e.id,
+    r.sort_order,
+    r.sets,
+    r.rep_min,
+    r.rep_max,
+    true
+  from jsonb_to_recordset(p_rows) as r(
+    day_name text,
+    name text,
+    sort_order integer,
+    sets integer,
+    rep_min integer,
+    rep_max integer
+  )
+  join public.exercises e on e.name = r.name
+  where r.day_name in ('Pass 1', 'Pass 2', 'Pass 3', 'Pass 4');
+
+  get diagnostics inserted_rows = row_count;
+  return inserted_rows;
+end;
+$$;
+
+revoke all on function public.seed_starter_program(bigint, jsonb) from public, anon, authenticated;
+grant execute on function public.seed_starter_program(bigint, jsonb) to service_role;
+
+commit;
@@ -0,0 +1,42 @@
+"""Shared test setup, and the fixtures for the tests that need a real Postgres.
+
+The repository root goes on sys.path so the tests import app_v2, app_v3 and the
+benchmark helpers directly, whichever directory pytest is started from.
+
+Point TEST_DATABASE_URL at a throwaway database; its public schema is dropped and
+recreated for every test module. Without it those tests are skipped.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def scalar(conn, query: str, *params):
+    return conn.execute(query, params).fetchone()[0]
+
+
+@pytest.fixture(scope="module")
+def postgres():
+    psycopg = pytest.importorskip("psycopg")
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute("drop schema if exists public cascade")
+        conn.execute("create schema public")
+        # The roles Supabase provides; the migrations grant and revoke against them.
+        for role in ("anon", "authenticated", "service_role"):
+            conn.execute(
+                f"do $$ begin if not exists (select 1 from pg_roles where rolname = '{role}') "
+                f"then create role {role} nologin; end if; end $$"
+            )
+        yield conn
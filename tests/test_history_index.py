@@ -0,0 +1,39 @@
+"""The per-exercise history index: best reps per weight, and how app_v2 shares it."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import app_v2
+import app_v3
+
+
+def test_weights_that_round_together_keep_the_best_reps():
+    history = pd.DataFrame(
+        {
+            "workout_id": [1, 2],
+            "datum": ["2026-01-01", "2026-01-03"],
+            "set_nr": [1, 1],
+            "exercise_id": [7, 7],
+            # Distinct float32 values that both show as 62.5 kg.
+            "vikt_kg": np.array([62.5, 62.50001], dtype=np.float32),
+            "reps": [8, 5],
+        }
+    )
+    entry = app_v3.build_history_index(history)[7]
+    assert (entry.max_weight, entry.max_weight_reps) == (62.5, 8)
+
+
+def test_app_v2_index_is_rebuilt_only_when_the_history_version_changes(tmp_path):
+    with mock.patch.object(app_v2, "DB_PATH", tmp_path / "gymapp.db"):
+        app_v2._migrated_schema(str(app_v2.DB_PATH))
+        profile_id = app_v2.list_profiles()[0].id
+        with mock.patch.object(app_v2, "build_history_index", side_effect=lambda history: {}) as build:
+            first = app_v2.history_index(profile_id)
+            assert app_v2.history_index(profile_id) is first
+            app_v2.invalidate_profile_data(profile_id, "history")
+            assert app_v2.history_index(profile_id) is not first
+        assert build.call_count == 2
@@ -0,0 +1,45 @@
+"""Supabase history reads must return every set even when PostgREST caps each response."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+
+import app_v2
+import app_v3
+from benchmarks.run import backend, prepared_database
+from benchmarks.synthetic import SyntheticSpec
+
+# Below SUPABASE_PAGE_SIZE, like a project with a lowered max-rows setting.
+MAX_ROWS = 7
+
+
+@pytest.fixture(scope="module")
+def database():
+    with prepared_database(SyntheticSpec(profiles=1, years=0.2, exercises_per_day=3)) as (data, client):
+        client.max_rows = MAX_ROWS
+        yield data, client
+
+
+def test_app_v3_history_is_not_cut_off_by_max_rows(database):
+    data, client = database
+    profile_id = data.profile_ids[0]
+    with backend("sqlite", client):
+        expected = app_v3.history_dataframe(profile_id)
+    with backend("supabase", client):
+        history = app_v3.history_dataframe(profile_id)
+    assert len(expected) > MAX_ROWS
+    assert history["set_id"].tolist() == expected["set_id"].tolist()
+
+
+def test_app_v2_history_is_not_cut_off_by_max_rows(database):
+    data, client = database
+    profile_id = data.profile_ids[0]
+    with mock.patch.object(app_v2, "DB_PATH", app_v3.DB_PATH):
+        expected = app_v2.history_dataframe(profile_id)
+        with mock.patch.object(app_v2, "use_supabase", lambda: True), mock.patch.object(app_v2, "supabase_client", lambda: client):
+            app_v2.invalidate_profile_data(profile_id, "history")
+            history = app_v2.history_dataframe(profile_id)
+    assert len(expected) > MAX_ROWS
+    assert history["set_id"].tolist() == expected["set_id"].tolist()
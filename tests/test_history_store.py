@@ -0,0 +1,100 @@
+"""The shared history snapshot behind history_dataframe and history_index."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+
+import app_v3
+from benchmarks.run import backend, prepared_database
+from benchmarks.synthetic import SyntheticSpec
+
+
+@pytest.fixture(params=["sqlite", "supabase"])
+def profile_id(request):
+    with prepared_database(SyntheticSpec(profiles=1, years=0.2, exercises_per_day=3)) as (data, client):
+        with backend(request.param, client):
+            yield data.profile_ids[0]
+
+
+def write_elsewhere(sql: str, *params) -> None:
+    # A write by another process: straight to the database, without any invalidation.
+    with app_v3.db_connection() as conn:
+        conn.execute(sql, params)
+
+
+def read_after_ttl(profile_id: int) -> set[int]:
+    app_v3.history_store().snapshots[profile_id].refreshed_at = 0.0
+    return set(app_v3.history_dataframe(profile_id)["set_id"])
+
+
+def test_callers_cannot_change_the_shared_snapshot(profile_id):
+    history = app_v3.history_dataframe(profile_id)
+    history["extra"] = 1
+    history.sort_values("set_id", ascending=False, inplace=True)
+
+    again = app_v3.history_dataframe(profile_id)
+    assert "extra" not in again.columns
+    assert again["datum"].is_monotonic_increasing
+
+
+def test_fetch_runs_without_the_store_lock(profile_id):
+    store = app_v3.history_store()
+    fetch = app_v3._fetch_history_rows
+    held = []
+
+    def fetch_and_check(*args):
+        held.append(store.lock.locked())
+        return fetch(*args)
+
+    with mock.patch.object(app_v3, "_fetch_history_rows", fetch_and_check):
+        app_v3.history_index(profile_id)
+    assert held == [False]
+
+
+def test_delete_during_fetch_does_not_bring_the_sets_back(profile_id):
+    with app_v3.db_connection() as conn:
+        workout_id = conn.execute("SELECT id FROM workouts WHERE profile_id = ? LIMIT 1", (profile_id,)).fetchone()["id"]
+    fetch = app_v3._fetch_history_rows
+
+    def fetch_then_delete(*args):
+        rows = fetch(*args)
+        app_v3.delete_workout(workout_id, profile_id)
+        return rows
+
+    with mock.patch.object(app_v3, "_fetch_history_rows", fetch_then_delete):
+        app_v3.history_dataframe(profile_id)
+    assert workout_id not in set(app_v3.history_dataframe(profile_id)["workout_id"])
+
+
+def test_set_committed_below_the_watermark_is_picked_up(profile_id):
+    last = int(app_v3.history_dataframe(profile_id)["set_id"].max())
+    with app_v3.db_connection() as conn:
+        workout_id, exercise_id = conn.execute(
+            "SELECT workout_id, exercise_id FROM workout_sets WHERE id = ?", (last,)
+        ).fetchone()
+    insert = "INSERT INTO workout_sets(id, workout_id, exercise_id, set_no, reps, weight_kg) VALUES (?, ?, ?, ?, 5, 50)"
+    write_elsewhere(insert, last + 2, workout_id, exercise_id, 90)
+    assert last + 2 in read_after_ttl(profile_id)
+    # Committed after the higher id had already been seen.
+    write_elsewhere(insert, last + 1, workout_id, exercise_id, 91)
+    assert last + 1 in read_after_ttl(profile_id)
+
+
+def test_workout_deleted_elsewhere_disappears(profile_id):
+    history = app_v3.history_dataframe(profile_id)
+    workout_id = int(history["workout_id"].iat[0])
+    write_elsewhere("DELETE FROM workouts WHERE id = ?", workout_id)
+    remaining = read_after_ttl(profile_id)
+    assert remaining == set(history.loc[history["workout_id"] != workout_id, "set_id"])
+
+
+def test_snapshot_is_reloaded_in_full_after_a_while(profile_id):
+    history = app_v3.history_dataframe(profile_id)
+    set_id = int(history["set_id"].iat[0])
+    write_elsewhere("UPDATE workout_sets SET reps = 99 WHERE id = ?", set_id)
+    app_v3.history_store().snapshots[profile_id].loaded_at -= app_v3.HISTORY_FULL_RELOAD_SECONDS
+    read_after_ttl(profile_id)
+    reloaded = app_v3.history_dataframe(profile_id)
+    assert int(reloaded.loc[reloaded["set_id"] == set_id, "reps"].iat[0]) == 99
@@ -0,0 +1,72 @@
+"""supabase_migration_legacy_program_weeks.sql against app.py's legacy schema on a real Postgres."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from tests.conftest import ROOT, requires_postgres, scalar
+
+pytestmark = requires_postgres
+
+LEGACY_SCHEMA = """
+create table public.exercises (
+  id uuid primary key default gen_random_uuid(),
+  name text not null,
+  cue text,
+  icon_path text
+);
+create table public.program_weeks (
+  week integer not null,
+  day text not null,
+  exercise_id uuid not null references public.exercises(id),
+  sets integer not null,
+  rep_min integer not null,
+  rep_max integer not null
+);
+"""
+
+
+@pytest.fixture(scope="module")
+def db(postgres):
+    postgres.execute(LEGACY_SCHEMA)
+    return postgres
+
+
+def test_migration_removes_duplicates_and_backs_the_upsert(db):
+    squat = scalar(db, "insert into public.exercises(name) values ('Knäböj') returning id::text")
+    for sets in (3, 3, 4):
+        db.execute("insert into public.program_weeks values (1, 'Upper A', %s, %s, 6, 10)", (squat, sets))
+
+    db.execute((ROOT / "supabase_migration_legacy_program_weeks.sql").read_text())
+
+    assert scalar(db, "select count(*) from public.program_weeks") == 1
+    db.execute(
+        "insert into public.program_weeks values (1, 'Upper A', %s, 5, 6, 10) "
+        "on conflict (week, day, exercise_id) do update set sets = excluded.sets",
+        (squat,),
+    )
+    assert scalar(db, "select sets from public.program_weeks") == 5
+
+
+def test_sync_program_weeks_upserts_and_deletes_together(db):
+    bench = scalar(db, "insert into public.exercises(name) values ('Bänkpress') returning id::text")
+    squat = scalar(db, "select id::text from public.exercises where name = 'Knäböj'")
+    upsert = [
+        {"week": 1, "day": "Upper A", "exercise_id": bench, "sets": 3, "rep_min": 8, "rep_max": 12},
+        {"week": 2, "day": "Upper A", "exercise_id": squat, "sets": 4, "rep_min": 6, "rep_max": 10},
+    ]
+    delete = [{"week": 1, "day": "Upper A", "exercise_id": squat}]
+    assert scalar(db, "select public.sync_program_weeks(%s::jsonb, %s::jsonb)", json.dumps(upsert), json.dumps(delete)) == 3
+    rows = db.execute("select week, exercise_id::text from public.program_weeks order by week").fetchall()
+    assert rows == [(1, bench), (2, squat)]
+    assert scalar(db, "select has_function_privilege('anon', 'public.sync_program_weeks(jsonb, jsonb)', 'execute')")
+
+
+def test_sync_program_weeks_rolls_back_on_error(db):
+    bad = [{"week": 3, "day": "Upper A", "exercise_id": "00000000-0000-0000-0000-000000000000", "sets": 3, "rep_min": 8, "rep_max": 12}]
+    delete = [{"week": 1, "day": "Upper A", "exercise_id": scalar(db, "select id::text from public.exercises where name = 'Bänkpress'")}]
+    with pytest.raises(Exception):
+        db.execute("select public.sync_program_weeks(%s::jsonb, %s::jsonb)", (json.dumps(bad), json.dumps(delete)))
+    assert scalar(db, "select count(*) from public.program_weeks") == 2
@@ -0,0 +1,64 @@
+"""Page-load reads run on short-lived threads that get the session's script run context."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import app_v2
+import app_v3
+
+
+def session_ctx():
+    return SimpleNamespace(pages_manager=SimpleNamespace(main_script_hash="main"))
+
+
+START = pytest.mark.parametrize("start", [
+    lambda ctx, fn, *args: app_v3._start_page_load(ctx, None, fn, *args),
+    lambda ctx, fn, *args: app_v2._start_page_load(ctx, fn, *args),
+], ids=["app_v3", "app_v2"])
+
+
+@START
+def test_read_runs_with_the_session_context(start):
+    ctx = session_ctx()
+    seen = start(ctx, lambda: (get_script_run_ctx(suppress_warning=True), threading.current_thread())).result()
+    assert seen[0] is ctx
+    assert seen[1] is not threading.current_thread()
+    assert get_script_run_ctx(suppress_warning=True) is None
+
+
+@START
+def test_errors_reach_the_caller(start):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        start(None, fail).result()
+
+
+@START
+def test_reads_running_at_once_are_bounded(start):
+    running, peak, lock = 0, 0, threading.Lock()
+
+    def read():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    for future in [start(None, read) for _ in range(app_v3.PAGE_LOAD_WORKERS * 3)]:
+        future.result()
+    assert peak <= app_v3.PAGE_LOAD_WORKERS
+
+
+def test_read_gets_the_timing_recorder():
+    timings = object()
+    assert app_v3._start_page_load(None, timings, lambda: app_v3._call_state.recorder).result() is timings
@@ -0,0 +1,95 @@
+"""The batch progression rules in suggest_weights, in both apps."""
+
+from __future__ import annotations
+
+import random
+
+import pandas as pd
+import pytest
+
+import app_v2
+import app_v3
+
+APPS = pytest.mark.parametrize("app", [app_v3, app_v2], ids=["app_v3", "app_v2"])
+
+
+def exercise(app, exercise_id: int = 1, name: str = "Bänkpress", **fields):
+    values = {"sets": 3, "rep_min": 6, "rep_max": 10, **fields}
+    return app.ProgramExercise(id=exercise_id, exercise_id=exercise_id, name=name, day_name="Pass 1", sort_order=exercise_id, **values)
+
+
+def history(app, workouts: list[tuple[int, float, list[int]]], exercise_id: int = 1) -> pd.DataFrame:
+    """One row per set; each workout is (workout_id, weight, reps per set) and later ids are newer."""
+    rows = [
+        {
+            "workout_id": workout_id,
+            "set_id": workout_id * 100 + set_nr,
+            "datum": f"2026-01-{workout_id:02d}",
+            "pass": "Pass 1",
+            "anteckning": "",
+            "ovning": "Övning",
+            "exercise_id": exercise_id,
+            "set_nr": set_nr,
+            "vikt_kg": weight,
+            "reps": reps,
+            "pb": False,
+        }
+        for workout_id, weight, set_reps in workouts
+        for set_nr, reps in enumerate(set_reps, start=1)
+    ]
+    frame = pd.DataFrame(rows, columns=app_v3.HISTORY_COLUMNS)
+    return app.typed_history(frame) if app is app_v3 else frame
+
+
+def suggestion(app, plan_exercise, workouts) -> tuple[float, str, str]:
+    row = app.suggest_weights([plan_exercise], history(app, workouts)).loc[plan_exercise.exercise_id]
+    return float(row["weight"]), row["label"], row["reason"]
+
+
+@APPS
+@pytest.mark.parametrize("workouts, expected", [
+    ([], (0.0, "Välj startvikt", "Första gången du loggar övningen.")),
+    ([(1, 60.0, [10, 10, 10])], (62.5, "Höj till 62.5 kg", "Alla set nådde övre repmålet senast.")),
+    ([(1, 60.0, [11, 10, 12])], (62.5, "Höj till 62.5 kg", "Alla set nådde övre repmålet senast.")),
+    ([(1, 60.0, [10, 10, 9])], (60.0, "Behåll 60 kg", "Senast: 10, 10, 9 reps.")),
+    ([(1, 60.0, [5, 5, 5])], (57.5, "Sänk till 57.5 kg", "Alla set låg under repmålet senast.")),
+    ([(1, 60.0, [5, 5, 6])], (60.0, "Behåll 60 kg", "Senast: 5, 5, 6 reps.")),
+    ([(1, 2.0, [3, 3, 3])], (0.0, "Sänk till 0 kg", "Alla set låg under repmålet senast.")),
+    ([(1, 60.0, [10, 10])], (60.0, "Behåll 60 kg", "Förra loggen hade färre set än programmet.")),
+    ([(1, 50.0, [10, 10, 10]), (2, 60.0, [7, 7, 7])], (60.0, "Behåll 60 kg", "Senast: 7, 7, 7 reps.")),
+], ids=["no history", "rep_max", "above rep_max", "one under rep_max", "deload", "one at rep_min", "deload floor", "short", "latest workout"])
+def test_rules(app, workouts, expected):
+    assert suggestion(app, exercise(app), workouts) == expected
+
+
+@APPS
+def test_lower_body_barbell_lifts_step_by_five(app):
+    assert suggestion(app, exercise(app, name="Knäböj"), [(1, 100.0, [10, 10, 10])])[0] == 105.0
+
+
+def test_app_v2_start_values_before_the_first_log():
+    plan_exercise = exercise(app_v2, start_weight_kg=40.0, start_reps=(8, 8))
+    frame = app_v2.suggest_weights([plan_exercise], history(app_v2, []))
+    row = frame.loc[plan_exercise.exercise_id]
+    assert (row["weight"], row["label"], row["reps"]) == (40.0, "Börja på 40 kg", [8, 8, 6])
+
+
+@APPS
+def test_a_whole_day_matches_each_exercise_on_its_own(app):
+    rng = random.Random(7)
+    plan = [exercise(app, exercise_id, name=name, sets=3 + exercise_id % 2) for exercise_id, name in enumerate(["Knäböj", "Bänkpress", "Rodd", "Chins"], start=1)]
+    frames = []
+    for plan_exercise in plan[:-1]:
+        workouts = [
+            (workout_id, rng.randrange(8, 160) * 2.5 / 2, [rng.randint(4, 12) for _ in range(plan_exercise.sets - (rng.random() < 0.2))])
+            for workout_id in rng.sample(range(1, 29), 6)
+        ]
+        frames.append(history(app, workouts, plan_exercise.exercise_id))
+    day_history = pd.concat(frames, ignore_index=True)
+    if app is app_v3:
+        day_history = app.typed_history(day_history)
+
+    day = app.suggest_weights(plan, day_history)
+    for plan_exercise in plan:
+        alone = app.suggest_weights([plan_exercise], day_history)
+        pd.testing.assert_series_equal(day.loc[plan_exercise.exercise_id], alone.loc[plan_exercise.exercise_id])
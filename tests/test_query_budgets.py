@@ -0,0 +1,44 @@
+"""The query budgets from benchmarks.budgets, on SQLite and on the Supabase stand-in.
+
+A call that goes over its budget, or repeats one statement as in an N+1 loop, fails here.
+"""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+
+import app_v3
+from benchmarks.budgets import CHECKS, measure
+from benchmarks.run import BACKENDS, backend, build_fixture, prepared_database
+from benchmarks.synthetic import SyntheticSpec
+
+
+@pytest.fixture(scope="module")
+def database():
+    with prepared_database(SyntheticSpec(profiles=3, years=1.0, exercises_per_day=5)) as (data, client):
+        yield data, client
+
+
+@pytest.mark.parametrize("check", CHECKS, ids=lambda check: check.name)
+@pytest.mark.parametrize("backend_name", BACKENDS)
+def test_query_budget(database, backend_name, check):
+    data, client = database
+    with backend(backend_name, client):
+        used, limit = measure(check, backend_name, build_fixture(data.profile_ids[0]), data)
+    assert used <= limit
+
+
+def test_connections_are_only_traced_inside_a_budget(database):
+    with backend("sqlite", database[1]), mock.patch.object(app_v3, "_trace_sqlite", wraps=app_v3._trace_sqlite) as trace:
+        with app_v3.query_budget(sqlite=1):
+            with app_v3.db_connection() as conn:
+                conn.execute("SELECT 1")
+        traced_calls = trace.call_count
+        # Borrowed again outside the budget, the pooled connection must no longer call back.
+        with app_v3.db_connection() as again:
+            again.execute("SELECT 1")
+    assert again is conn
+    assert traced_calls > 0
+    assert trace.call_count == traced_calls
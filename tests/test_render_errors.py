@@ -0,0 +1,32 @@
+"""A missing Supabase migration shows up as one st.error on the page, not as a traceback."""
+
+from __future__ import annotations
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def page(module_name: str, db_path: str, patched: str, view: str) -> None:
+    import importlib
+    from unittest import mock
+
+    app = importlib.import_module(module_name)
+    error = RuntimeError("Databasen behöver migreringen.")
+    with mock.patch.object(app, "DB_PATH", app.Path(db_path)), mock.patch.object(app, patched, side_effect=error):
+        app._migrated_schema(db_path)
+        profile = app.list_profiles()[0]
+        getattr(app, view)(profile)
+
+
+# app_v2 computes its PB summary from the history frame, so only app_v3's PB and Trend views depend on v6.
+@pytest.mark.parametrize("module_name, patched, view", [
+    ("app_v3", "profile_overviews", "render_profiles"),
+    ("app_v2", "profile_overviews", "render_profiles"),
+    ("app_v3", "pb_summary_dataframe", "render_personal_bests"),
+    ("app_v3", "pb_summary_dataframe", "render_charts"),
+])
+def test_missing_migration_is_shown_as_an_error(tmp_path, module_name, patched, view):
+    app = AppTest.from_function(page, args=(module_name, str(tmp_path / "gymapp.db"), patched, view), default_timeout=30)
+    app.run()
+    assert not app.exception
+    assert [error.value for error in app.error] == ["Databasen behöver migreringen."]
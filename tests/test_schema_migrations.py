@@ -0,0 +1,45 @@
+"""SQLite schema steps commit together with their schema_migrations record, or not at all."""
+
+from __future__ import annotations
+
+import sqlite3
+from unittest import mock
+
+import pytest
+
+import app_v2
+import app_v3
+
+
+@pytest.fixture(params=[app_v3, app_v2], ids=["app_v3", "app_v2"])
+def app(request, tmp_path):
+    with mock.patch.object(request.param, "DB_PATH", tmp_path / "gymapp.db"):
+        yield request.param
+
+
+def recorded(app) -> set[str]:
+    with app.db_connection() as conn:
+        return {row["name"] for row in conn.execute("SELECT name FROM schema_migrations")}
+
+
+def table_exists(app, name: str) -> bool:
+    with app.db_connection() as conn:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def test_every_step_is_recorded(app):
+    app._migrated_schema(str(app.DB_PATH))
+    assert recorded(app) == {name for name, _ in app.SCHEMA_STEPS}
+
+
+def test_failed_step_rolls_back_its_earlier_statements(app):
+    def broken(conn):
+        app._execute_statements(conn, "CREATE TABLE half_done (x INTEGER);\nCREATE TABLE broken (;\n")
+
+    steps = [*app.SCHEMA_STEPS, ("broken", broken)]
+    with mock.patch.object(app, "SCHEMA_STEPS", steps), pytest.raises(sqlite3.OperationalError):
+        app._migrated_schema(str(app.DB_PATH))
+
+    assert not table_exists(app, "half_done")
+    assert "broken" not in recorded(app)
+    assert recorded(app) == {name for name, _ in app.SCHEMA_STEPS}
@@ -0,0 +1,38 @@
+"""The starter program is only written for a profile that has no program rows at all."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+
+import app_v3
+from benchmarks.budgets import _new_profile
+from benchmarks.run import backend, prepared_database
+from benchmarks.synthetic import SyntheticSpec
+
+
+@pytest.fixture(params=["sqlite", "supabase"])
+def backend_name(request):
+    with prepared_database(SyntheticSpec(profiles=1, years=0.1, exercises_per_day=2)) as (_, client):
+        with backend(request.param, client):
+            yield request.param
+
+
+def test_deactivated_program_is_not_reseeded(backend_name):
+    profile_id = _new_profile()
+    app_v3.seed_program_for_profile(profile_id)
+    with app_v3.db_connection() as conn:
+        conn.execute("UPDATE program_exercises SET active = 0 WHERE profile_id = ?", (profile_id,))
+    app_v3.invalidate_profile_data(profile_id, "program")
+
+    with mock.patch.object(app_v3, "_seed_starter_program") as seed:
+        app_v3.seed_program_for_profile(profile_id)
+    seed.assert_not_called()
+    assert not any(app_v3.program_by_day(profile_id).values())
+
+
+def test_profile_without_rows_is_seeded(backend_name):
+    profile_id = _new_profile()
+    app_v3.seed_program_for_profile(profile_id)
+    assert any(app_v3.program_by_day(profile_id).values())
@@ -0,0 +1,106 @@
+"""Apply the Supabase schema and every migration to a real Postgres and call each RPC.
+
+The benchmarks serve these functions from benchmarks.fake_supabase, which never runs the
+SQL, so this is what catches a missing overload or a typo before it reaches Supabase.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import ROOT, requires_postgres, scalar
+
+pytestmark = requires_postgres
+
+
+def migration_files() -> list[Path]:
+    versioned = [
+        (int(match.group(1)), path)
+        for path in ROOT.glob("supabase_migration_*_v*.sql")
+        if (match := re.search(r"_v(\d+)\.sql$", path.name))
+    ]
+    return [ROOT / "supabase_schema_v2.sql"] + [path for _, path in sorted(versioned)]
+
+
+@pytest.fixture(scope="module")
+def db(postgres):
+    for path in migration_files():
+        postgres.execute(path.read_text())
+    return postgres
+
+
+@pytest.fixture
+def profile_id(db) -> int:
+    return scalar(db, "insert into public.profiles(name) values (%s) returning id", f"Test {os.urandom(4).hex()}")
+
+
+def test_migrations_apply_in_order(db):
+    functions = {row[0] for row in db.execute("select proname from pg_proc where pronamespace = 'public'::regnamespace")}
+    assert {
+        "save_workout_atomic",
+        "pb_summary",
+        "add_program_exercise_atomic",
+        "update_program_exercises_bulk",
+        "seed_starter_program",
+        "profile_overviews",
+    } <= functions
+
+
+def test_add_program_exercise_appends_and_reactivates(db, profile_id):
+    first = scalar(db, "select public.add_program_exercise_atomic(%s, 'Pass 1', 'Knäböj', 3, 5, 8)", profile_id)
+    second = scalar(db, "select public.add_program_exercise_atomic(%s, 'Pass 1', 'Bänkpress', 3, 6, 10)", profile_id)
+    orders = dict(db.execute("select id, sort_order from public.program_exercises where profile_id = %s", (profile_id,)).fetchall())
+    assert orders == {first: 1, second: 2}
+
+    db.execute("update public.program_exercises set active = false where id = %s", (first,))
+    again = scalar(db, "select public.add_program_exercise_atomic(%s, 'Pass 1', 'Knäböj', 4, 5, 8)", profile_id)
+    assert again == first
+    assert db.execute("select active, sets, sort_order from public.program_exercises where id = %s", (first,)).fetchone() == (True, 4, 3)
+
+
+def test_update_program_exercises_bulk(db, profile_id):
+    row_id = scalar(db, "select public.add_program_exercise_atomic(%s, 'Pass 2', 'Marklyft', 3, 3, 6)", profile_id)
+    rows = [{"id": row_id, "sort_order": 5, "sets": 4, "rep_min": 4, "rep_max": 6, "active": False}]
+    assert scalar(db, "select public.update_program_exercises_bulk(%s, 'Pass 2', %s::jsonb)", profile_id, json.dumps(rows)) == 1
+    assert db.execute(
+        "select sort_order, sets, rep_min, rep_max, active from public.program_exercises where id = %s", (row_id,)
+    ).fetchone() == (5, 4, 4, 6, False)
+
+
+def test_save_workout_pb_summary_and_overviews(db, profile_id):
+    exercise_id = scalar(db, "insert into public.exercises(name) values ('Chins') on conflict (name) do update set name = excluded.name returning id")
+    sets = [{"exercise_id": exercise_id, "set_no": number, "reps": 8, "weight_kg": 10} for number in (1, 2)]
+    scalar(db, "select public.save_workout_atomic(%s, '2026-01-02', 'Pass 3', '', %s::jsonb)", profile_id, json.dumps(sets))
+    assert db.execute("select ovning, antal_set from public.pb_summary(%s)", (profile_id,)).fetchall() == [("Chins", 2)]
+
+    empty = scalar(db, "insert into public.profiles(name) values ('Tom profil') returning id")
+    overviews = db.execute(
+        "select profile_id, workout_count, last_workout_date::text, last_day_name from public.profile_overviews(%s)",
+        ([profile_id, empty],),
+    ).fetchall()
+    assert sorted(overviews) == sorted([(profile_id, 1, "2026-01-02", "Pass 3"), (empty, 0, None, None)])
+
+
+def test_seed_starter_program_runs_once(db, profile_id):
+    rows = [
+        {"day_name": "Pass 1", "name": "Knäböj", "sort_order": 1, "sets": 4, "rep_min": 5, "rep_max": 8},
+        {"day_name": "Pass 1", "name": "Ny övning", "sort_order": 2, "sets": 3, "rep_min": 8, "rep_max": 12},
+    ]
+    assert scalar(db, "select public.seed_starter_program(%s, %s::jsonb)", profile_id, json.dumps(rows)) == 2
+    assert scalar(db, "select public.seed_starter_program(%s, %s::jsonb)", profile_id, json.dumps(rows)) == 0
+
+
+def test_functions_are_only_executable_by_service_role(db):
+    for signature in (
+        "public.add_program_exercise_atomic(bigint, text, text, integer, integer, integer)",
+        "public.update_program_exercises_bulk(bigint, text, jsonb)",
+        "public.seed_starter_program(bigint, jsonb)",
+        "public.profile_overviews(bigint[])",
+    ):
+        assert scalar(db, "select has_function_privilege('service_role', %s, 'execute')", signature)
+        assert not scalar(db, "select has_function_privilege('anon', %s, 'execute')", signature)